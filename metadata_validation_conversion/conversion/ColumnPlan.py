@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+
+import xlrd
+
+from metadata_validation_conversion.constants import COLUMN_PLAN_CACHE_SIZE
+
+column_plans = OrderedDict()
+column_plans_lock = threading.Lock()
+
+
+class ColumnPlan:
+    """
+    Compiled mapping of template columns to fields of converted record, it
+    depends only on header row and rules, so it is built once per template
+    layout and then applied to every row
+    """
+    def __init__(self, structure, json_types):
+        """
+        :param structure: dict with field names and indexes of every type of
+        fields (core, type, module, custom)
+        :param json_types: dict with type of fields as keys and name of
+        record section these fields go to as values (None for top level)
+        """
+        self.structure = structure
+        self.groups = list()
+        for fields_type, section in json_types.items():
+            fields = list()
+            for field_name, indexes in structure[fields_type].items():
+                date_field = 'date' in field_name
+                if isinstance(indexes, list):
+                    cells = [self.compile_cells(index, date_field)
+                             for index in indexes]
+                    fields.append((field_name, True, cells))
+                else:
+                    fields.append((field_name, False,
+                                   self.compile_cells(indexes, date_field)))
+            self.groups.append((section, fields))
+
+    @staticmethod
+    def compile_cells(indexes, date_field):
+        """
+        This function will compile subfields of field
+        :param indexes: dict with subfield names as keys and column indexes
+        as values
+        :param date_field: True if field holds date
+        :return: list of (subfield name, column index, is term, is date)
+        """
+        return [(subfield_name, index, subfield_name == 'term',
+                 date_field and subfield_name == 'value')
+                for subfield_name, index in indexes.items()]
+
+    def get_record(self, row_values, datemode):
+        """
+        This function will convert row of template into record
+        :param row_values: list of cell values
+        :param datemode: datemode of workbook to convert dates
+        :return: dict with required information
+        """
+        record = dict()
+        for section, fields in self.groups:
+            if section is None:
+                holder = record
+            else:
+                holder = record.setdefault(section, dict())
+            for field_name, is_array, cells in fields:
+                if is_array:
+                    values = list()
+                    for array_cells in cells:
+                        value = self.get_value(row_values, array_cells,
+                                               datemode)
+                        if len(value) != 0:
+                            values.append(value)
+                    if len(values) != 0:
+                        holder[field_name] = values
+                else:
+                    value = self.get_value(row_values, cells, datemode)
+                    if len(value) != 0:
+                        holder[field_name] = value
+        return record
+
+    @staticmethod
+    def get_value(row_values, cells, datemode):
+        """
+        This function will create dict with values of subfields
+        :param row_values: list of cell values
+        :param cells: compiled subfields of field
+        :param datemode: datemode of workbook to convert dates
+        :return: dict with subfield names as keys and cell values as values
+        """
+        value = dict()
+        for subfield_name, index, is_term, is_date in cells:
+            cell_value = row_values[index]
+            if isinstance(cell_value, str):
+                cell_value = cell_value.strip()
+                if cell_value == '':
+                    continue
+                # Convert all "_" in term ids to ":" as required by validator
+                if is_term and "_" in cell_value:
+                    cell_value = cell_value.replace("_", ":")
+            # Convert date data to string (as Excel stores date in float
+            # format)
+            elif is_date and isinstance(cell_value, float):
+                y, m, d, _, _, _ = xlrd.xldate_as_tuple(cell_value, datemode)
+                cell_value = f"{y}-{m:02d}-{d:02d}"
+            value[subfield_name] = cell_value
+        return value
+
+
+def get_column_plan(key):
+    """
+    This function will return cached column plan
+    :param key: key of template layout
+    :return: column plan or None if it isn't cached
+    """
+    with column_plans_lock:
+        plan = column_plans.get(key)
+        if plan is not None:
+            column_plans.move_to_end(key)
+        return plan
+
+
+def add_column_plan(key, plan):
+    """
+    This function will cache column plan, least recently used plans are
+    removed when there are more than COLUMN_PLAN_CACHE_SIZE of them
+    :param key: key of template layout
+    :param plan: column plan to cache
+    """
+    with column_plans_lock:
+        column_plans[key] = plan
+        column_plans.move_to_end(key)
+        while len(column_plans) > COLUMN_PLAN_CACHE_SIZE:
+            column_plans.popitem(last=False)
@@ -1,117 +1,177 @@
+import hashlib
 import json
 import xlrd
 import os
 import re
-from metadata_validation_conversion.constants import ALLOWED_SHEET_NAMES, \
-    SKIP_PROPERTIES, SPECIAL_PROPERTIES, JSON_TYPES, \
+import zipfile
+from metadata_validation_conversion.constants import XLSX_STREAMING_READER, \
+    ALLOWED_SHEET_NAMES, SKIP_PROPERTIES, SPECIAL_PROPERTIES, JSON_TYPES, \
     SAMPLES_SPECIFIC_JSON_TYPES, EXPERIMENTS_SPECIFIC_JSON_TYPES, \
     CHIP_SEQ_INPUT_DNA_JSON_TYPES, CHIP_SEQ_DNA_BINDING_PROTEINS_JSON_TYPES, \
     EXPERIMENT_ALLOWED_SPECIAL_SHEET_NAMES, MODULE_RULES, \
     SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES, SPECIMEN_TELEOST_EMBRYO_JSON_TYPES, \
     SPECIMEN_TELEOST_POST_HATCHING_JSON_TYPES
 from metadata_validation_conversion.helpers import convert_to_snake_case, \
-    get_rules_json
+    get_rules_json, get_rules_urls
+from metadata_validation_conversion.schema_cache import schema_cache
+from .ColumnPlan import ColumnPlan, get_column_plan, add_column_plan
+from .XlsxStreamReader import XlsxStreamReader
 
 
 class ReadExcelFile:
-    def __init__(self, file_path, json_type):
+    def __init__(self, file_path, json_type, streaming=None):
         self.file_path = file_path
         self.json_type = json_type
         self.headers = list()
         self.array_fields = list()
         self.wb_datemode = None
+        self.streaming = XLSX_STREAMING_READER if streaming is None \
+            else streaming
 
     def start_conversion(self):
         """
         Main function that will convert xlsx file to proper json format
         :return: submitted data in proper json format
         """
-        bovreg_submission = False
-        wb = xlrd.open_workbook(self.file_path)
+        wb = self.open_workbook()
+        try:
+            return self.convert_workbook(wb)
+        finally:
+            wb.release_resources()
+
+    def open_workbook(self):
+        """
+        This function will open workbook with streaming reader if it is
+        enabled, old xls files are always read by xlrd
+        :return: workbook object
+        """
+        if self.streaming and zipfile.is_zipfile(self.file_path):
+            return XlsxStreamReader(self.file_path)
+        return xlrd.open_workbook(self.file_path)
+
+    @staticmethod
+    def iter_row_values(sheet):
+        """
+        This function will iterate over values of all rows of sheet
+        :param sheet: xlrd or streaming sheet
+        :return: generator of lists of cell values
+        """
+        if hasattr(sheet, 'iter_row_values'):
+            return sheet.iter_row_values()
+        return (sheet.row_values(row_number)
+                for row_number in range(sheet.nrows))
+
+    def convert_workbook(self, wb):
+        """
+        This function will convert all sheets of workbook
+        :param wb: workbook object
+        :return: submitted data in proper json format
+        """
         self.wb_datemode = wb.datemode
+        sheets = wb.sheets()
+        results = self.merge_sheets(
+            sheets, (self.convert_sheet(sh) for sh in sheets))
+        os.remove(self.file_path)
+        return results
+
+    def merge_sheets(self, sheets, sheets_results):
+        """
+        This function will merge results of all sheets in order of sheets in
+        template, the first error stops conversion
+        :param sheets: list of sheets
+        :param sheets_results: generator of results of convert_sheet for
+        every sheet
+        :return: submitted data in proper json format
+        """
+        bovreg_submission = False
         data = dict()
         structure = dict()
-        for sh in wb.sheets():
-            if sh.name not in ALLOWED_SHEET_NAMES:
-                if sh.name == 'faang_field_values':
-                    continue
-                elif sh.name == 'organoid' or sh.name == 'teleostei embryo' or sh.name == 'teleostei post-hatching' or sh.name == 'single cell specimen':
-                    try:
-                        sh.row_values(1)
-                        return 'Error: internal error', structure
-                    except IndexError:
-                        continue
-                elif sh.name in EXPERIMENT_ALLOWED_SPECIAL_SHEET_NAMES \
-                        and self.json_type == 'experiments' \
-                        or self.json_type == 'analyses':
-                    special_sheet_data = self.get_additional_data(
-                        sh, sh.name, EXPERIMENT_ALLOWED_SPECIAL_SHEET_NAMES)
-                    if 'Error' in special_sheet_data:
-                        os.remove(self.file_path)
-                        return special_sheet_data, structure
-                    data[convert_to_snake_case(sh.name)] = special_sheet_data
-                    continue
-                elif sh.name in SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES \
-                        and self.json_type == 'samples':
-                    special_sheet_data = self.get_additional_data(
-                        sh, sh.name, SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES)
-                    if 'Error' in special_sheet_data:
-                        os.remove(self.file_path)
-                        return special_sheet_data, structure
-                    data[convert_to_snake_case(sh.name)] = special_sheet_data
-                    continue
-                else:
-                    os.remove(self.file_path)
-                    return f"Error: there are no rules for {sh.name} type!", \
-                           structure
+        for sh, sheet_results in zip(sheets, sheets_results):
+            error, sheet_data, sheet_structure, sheet_bovreg = sheet_results
+            if sheet_structure is not None:
+                structure[convert_to_snake_case(sh.name)] = sheet_structure
+            if error is not None:
+                return error, structure
+            if sheet_data is not None:
+                data[convert_to_snake_case(sh.name)] = sheet_data
+            if sheet_bovreg:
+                bovreg_submission = True
+        return data, structure, bovreg_submission
+
+    def convert_sheet(self, sh):
+        """
+        This function will convert one sheet of workbook
+        :param sh: sheet object
+        :return: error (None if there are no errors), data of sheet (None if
+        there is no data), structure of sheet (None if sheet has no rules)
+        and whether sheet has BovReg private records
+        """
+        if sh.name not in ALLOWED_SHEET_NAMES:
+            if sh.name == 'faang_field_values':
+                return None, None, None, False
+            elif sh.name == 'organoid' or sh.name == 'teleostei embryo' or sh.name == 'teleostei post-hatching' or sh.name == 'single cell specimen':
+                if sh.nrows > 1:
+                    return 'Error: internal error', None, None, False
+                return None, None, None, False
+            elif sh.name in EXPERIMENT_ALLOWED_SPECIAL_SHEET_NAMES \
+                    and self.json_type == 'experiments' \
+                    or self.json_type == 'analyses':
+                special_sheet_data = self.get_additional_data(
+                    sh, sh.name, EXPERIMENT_ALLOWED_SPECIAL_SHEET_NAMES)
+                if 'Error' in special_sheet_data:
+                    return special_sheet_data, None, None, False
+                return None, special_sheet_data, None, False
+            elif sh.name in SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES \
+                    and self.json_type == 'samples':
+                special_sheet_data = self.get_additional_data(
+                    sh, sh.name, SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES)
+                if 'Error' in special_sheet_data:
+                    return special_sheet_data, None, None, False
+                return None, special_sheet_data, None, False
             else:
-                tmp = list()
-                self.headers = [
-                    convert_to_snake_case(item) for item in sh.row_values(0)]
-                try:
-                    field_names_indexes = self.get_field_names_and_indexes(
-                        sh.name)
-                    structure[convert_to_snake_case(sh.name)] = \
-                        field_names_indexes
-                except ValueError as err:
-                    os.remove(self.file_path)
-                    return err.args[0], structure
-                for row_number in range(1, sh.nrows):
-                    sample_data = self.get_sample_data(
-                        sh.row_values(row_number), field_names_indexes, sh.name)
-                    material_consistency = \
-                        self.check_sheet_name_material_consistency(sample_data,
-                                                                   sh.name)
-                    if material_consistency is not False:
-                        os.remove(self.file_path)
-                        return material_consistency, structure
+                return f"Error: there are no rules for {sh.name} type!", \
+                       None, None, False
+        bovreg_submission = False
+        tmp = list()
+        rows = self.iter_row_values(sh)
+        header_row = next(rows, None)
+        if header_row is None:
+            return f"Error: sheet {sh.name} is empty", None, None, False
+        self.headers = [convert_to_snake_case(item) for item in header_row]
+        try:
+            column_plan = self.get_column_plan(sh.name)
+        except ValueError as err:
+            return err.args[0], None, None, False
+        for row_values in rows:
+            sample_data = self.get_sample_data(row_values, column_plan)
+            material_consistency = \
+                self.check_sheet_name_material_consistency(sample_data,
+                                                           sh.name)
+            if material_consistency is not False:
+                return material_consistency, None, column_plan.structure, \
+                       False
 
-                    tmp.append(sample_data)
+            tmp.append(sample_data)
 
-                    # Check for BovReg private submission
-                    sc_prj = None
-                    if self.json_type == 'samples' and 'secondary_project' in \
-                            sample_data['samples_core']:
-                        sc_prj = \
-                            sample_data['samples_core']['secondary_project']
-                    elif self.json_type == 'experiments' \
-                            and 'secondary_project' in \
-                            sample_data['experiments_core']:
-                        sc_prj = \
-                            sample_data['experiments_core']['secondary_project']
-                    elif self.json_type == 'analyses' \
-                            and 'secondary_project' in sample_data:
-                        sc_prj = sample_data['secondary_project']
-                    if sc_prj and sc_prj[0]['value'] == 'BovReg':
-                        bovreg_submission = True
+            # Check for BovReg private submission
+            sc_prj = None
+            if self.json_type == 'samples' and 'secondary_project' in \
+                    sample_data['samples_core']:
+                sc_prj = sample_data['samples_core']['secondary_project']
+            elif self.json_type == 'experiments' \
+                    and 'secondary_project' in \
+                    sample_data['experiments_core']:
+                sc_prj = sample_data['experiments_core']['secondary_project']
+            elif self.json_type == 'analyses' \
+                    and 'secondary_project' in sample_data:
+                sc_prj = sample_data['secondary_project']
+            if sc_prj and sc_prj[0]['value'] == 'BovReg':
+                bovreg_submission = True
 
-                if len(tmp) > 0:
-                    data[convert_to_snake_case(sh.name)] = tmp
-        os.remove(self.file_path)
-        return data, structure, bovreg_submission
+        return None, tmp if len(tmp) > 0 else None, column_plan.structure, \
+            bovreg_submission
 
-    @staticmethod
-    def get_additional_data(table_object, sheet_name,
+    def get_additional_data(self, table_object, sheet_name,
                             allowed_sheet_names):
         """
         This function will parse study sheet of a table
@@ -122,12 +182,14 @@ class ReadExcelFile:
         """
         data = list()
         sheet_fields = allowed_sheet_names[sheet_name]
-        for row_number in range(1, table_object.nrows):
+        rows = self.iter_row_values(table_object)
+        # skip headers
+        next(rows, None)
+        for row_values in rows:
             tmp = dict()
             for index, additional_field in enumerate(sheet_fields['all']):
                 try:
-                    tmp[additional_field] = table_object.row_values(
-                        row_number)[index]
+                    tmp[additional_field] = row_values[index]
                 except IndexError:
                     if additional_field in sheet_fields['mandatory']:
                         error_field_name = ' '.join(additional_field.split('_'))
@@ -143,6 +205,28 @@ class ReadExcelFile:
             return f"Error: data for '{sheet_name}' sheet was not provided"
         return data
 
+    def get_column_plan(self, sheet_name):
+        """
+        This function will return column plan for sheet, plans are cached by
+        sheet name, header row and digests of rules, so the same template
+        layout is only compiled once
+        :param sheet_name: name of the sheet
+        :return: column plan
+        """
+        url = ALLOWED_SHEET_NAMES[sheet_name]
+        urls = get_rules_urls(url, self.json_type, MODULE_RULES.get(sheet_name))
+        layout = json.dumps([self.json_type, sheet_name, self.headers,
+                             [schema_cache.get_digest(rules_url)
+                              for rules_url in urls]], default=str)
+        key = hashlib.sha1(layout.encode('utf-8')).hexdigest()
+        column_plan = get_column_plan(key)
+        if column_plan is None:
+            column_plan = ColumnPlan(
+                self.get_field_names_and_indexes(sheet_name),
+                self.get_json_types(sheet_name))
+            add_column_plan(key, column_plan)
+        return column_plan
+
     def get_field_names_and_indexes(self, sheet_name):
         """
         This function will create dict with field_names as keys and field
@@ -336,151 +420,39 @@ class ReadExcelFile:
                 second_subfield = 'term'
             return {first_subfield: index, second_subfield: index + 1}
 
-    def get_sample_data(self, input_data, field_names_indexes, name):
+    def get_json_types(self, name):
         """
-        This function will fetch information about organism
-        :param input_data: row from template to fetch information from
-        :param field_names_indexes: dict with field names and indexes from json
+        This function will return sections of record for every type of fields
         :param name: name of the sheet
-        :return: dict with required information
+        :return: dict with types of fields as keys and sections as values
         """
-        organism_to_validate = dict()
         if name == 'chip-seq input dna':
-            json_types = {**EXPERIMENTS_SPECIFIC_JSON_TYPES, **JSON_TYPES,
-                          **CHIP_SEQ_INPUT_DNA_JSON_TYPES}
+            return {**EXPERIMENTS_SPECIFIC_JSON_TYPES, **JSON_TYPES,
+                    **CHIP_SEQ_INPUT_DNA_JSON_TYPES}
         elif name == 'chip-seq dna-binding proteins':
-            json_types = {**EXPERIMENTS_SPECIFIC_JSON_TYPES, **JSON_TYPES,
-                          **CHIP_SEQ_DNA_BINDING_PROTEINS_JSON_TYPES}
+            return {**EXPERIMENTS_SPECIFIC_JSON_TYPES, **JSON_TYPES,
+                    **CHIP_SEQ_DNA_BINDING_PROTEINS_JSON_TYPES}
         elif name == 'teleostei embryo':
-            json_types = {**SAMPLES_SPECIFIC_JSON_TYPES, **JSON_TYPES,
-                          **SPECIMEN_TELEOST_EMBRYO_JSON_TYPES}
+            return {**SAMPLES_SPECIFIC_JSON_TYPES, **JSON_TYPES,
+                    **SPECIMEN_TELEOST_EMBRYO_JSON_TYPES}
         elif name == 'teleostei post-hatching':
-            json_types = {**SAMPLES_SPECIFIC_JSON_TYPES, **JSON_TYPES,
-                          **SPECIMEN_TELEOST_POST_HATCHING_JSON_TYPES}
+            return {**SAMPLES_SPECIFIC_JSON_TYPES, **JSON_TYPES,
+                    **SPECIMEN_TELEOST_POST_HATCHING_JSON_TYPES}
+        elif self.json_type == 'samples':
+            return {**SAMPLES_SPECIFIC_JSON_TYPES, **JSON_TYPES}
+        elif self.json_type == 'analyses':
+            return {**JSON_TYPES}
         else:
-            if self.json_type == 'samples':
-                json_types = {**SAMPLES_SPECIFIC_JSON_TYPES, **JSON_TYPES}
-            elif self.json_type == 'analyses':
-                json_types = {**JSON_TYPES}
-            else:
-                json_types = {**EXPERIMENTS_SPECIFIC_JSON_TYPES, **JSON_TYPES}
-        for k, v in json_types.items():
-            if v is not None:
-                organism_to_validate.setdefault(v, dict())
-                for field_name, indexes in field_names_indexes[k].items():
-                    date_field = self.check_cell_is_date(field_name)
-                    time_field = self.check_cell_is_time(field_name)
-                    self.add_row(field_name, indexes, organism_to_validate[v],
-                                 input_data, date_field, time_field)
-            else:
-                for field_name, indexes in field_names_indexes[k].items():
-                    date_field = self.check_cell_is_date(field_name)
-                    time_field = self.check_cell_is_time(field_name)
-                    self.add_row(field_name, indexes, organism_to_validate,
-                                 input_data, date_field, time_field)
-        return organism_to_validate
+            return {**EXPERIMENTS_SPECIFIC_JSON_TYPES, **JSON_TYPES}
 
-    @staticmethod
-    def check_cell_is_date(field_name):
-        """
-        This function will check that current column is date field
-        :param field_name: name of column
-        :return: True if column is date and False otherwise
+    def get_sample_data(self, input_data, column_plan):
         """
-        if 'date' in field_name:
-            return True
-        else:
-            return False
-
-    @staticmethod
-    def check_cell_is_time(field_name):
-        """
-        This function will check that current column is time field
-        :param field_name: name of column
-        :return: True if column is time field and False otherwise
-        """
-        return field_name in ['sampling_day_start_time', 'sampling_day_end_time']
-
-    def add_row(self, field_name, indexes, organism_to_validate, input_data,
-                date_field, time_field):
-        """
-        High-level function to get data from table
-        :param field_name: name of the field to add
-        :param indexes: subfields of this field
-        :param organism_to_validate: results holder
-        :param input_data: row from table
-        :param date_field: date field to check
-        :param time_field: time field to check
-        """
-        if isinstance(indexes, list):
-            tmp_list = list()
-            for index in indexes:
-                tmp_data = self.get_data(input_data, date_field, time_field,
-                                         **index)
-                if len(tmp_data) != 0:
-                    tmp_list.append(tmp_data)
-            if len(tmp_list) != 0:
-                organism_to_validate[field_name] = tmp_list
-        else:
-            self.check_existence(field_name, organism_to_validate,
-                                 self.get_data(input_data, date_field, time_field,
-                                               **indexes))
-
-    def get_data(self, input_data, date_field, time_field, **fields):
-        """
-        This function will create dict with required fields and required
-        information
-        :param input_data: row from template
-        :param date_field: boolean value is this data is date data
-        :param time_field: boolean value is this data is time data
-        :param fields: dict with field name as key and field index as value
+        This function will fetch information about organism
+        :param input_data: row from template to fetch information from
+        :param column_plan: column plan of the sheet
         :return: dict with required information
         """
-        data_to_return = dict()
-        for field_name, field_index in fields.items():
-            cell_value = input_data[field_index]
-            if cell_value is not None and isinstance(cell_value, str):
-                cell_value = cell_value.strip()
-            if cell_value != '':
-                # Convert all "_" in term ids to ":" as required by validator
-                if field_name == 'term' and isinstance(cell_value, str)  \
-                        and "_" in cell_value:
-                    cell_value = cell_value.replace("_", ":")
-
-                # Convert date data to string (as Excel stores date in float
-                # format)
-                if date_field is True and isinstance(cell_value, float) \
-                        and field_name == 'value':
-                    y, m, d, _, _, _ = xlrd.xldate_as_tuple(cell_value,
-                                                            self.wb_datemode)
-                    m = self.add_leading_zero(m)
-                    d = self.add_leading_zero(d)
-                    cell_value = f"{y}-{m}-{d}"
-                data_to_return[field_name] = cell_value
-        return data_to_return
-
-    @staticmethod
-    def check_existence(field_name, data_to_validate, template_data):
-        """
-        This function will check whether template_data has required field
-        :param field_name: name of field
-        :param data_to_validate: data dict for validation
-        :param template_data: template data to check
-        """
-        if len(template_data) != 0:
-            data_to_validate[field_name] = template_data
-
-    @staticmethod
-    def add_leading_zero(date_item):
-        """
-        This function will add leading zero if date is just one number
-        :param date_item: item to check
-        :return: date item in proper format (01, 02, etc...)
-        """
-        if date_item < 10:
-            return f"0{date_item}"
-        else:
-            return date_item
+        return column_plan.get_record(input_data, self.wb_datemode)
 
     def check_sheet_name_material_consistency(self, sample_data, name):
         """
@@ -0,0 +1,285 @@
+import zipfile
+
+from lxml import etree
+from xlrd.xlsx import U_SSML12, U_ODREL, U_PKGREL, V_TAG, F_TAG, IS_TAG, \
+    cooked_text, get_text_from_si_or_is, cnv_xsd_boolean, \
+    error_code_from_text, unescape
+
+ROW_TAG = U_SSML12 + 'row'
+CELL_TAG = U_SSML12 + 'c'
+SI_TAG = U_SSML12 + 'si'
+# value of cell that xlrd doesn't store at all
+NO_CELL = object()
+
+
+class XlsxStreamReader:
+    """
+    Read-only xlsx reader that never keeps whole sheet in memory, rows are
+    parsed one by one and have the same values as xlrd.Sheet.row_values
+    """
+    def __init__(self, file_path):
+        self.zip_file = zipfile.ZipFile(file_path)
+        self.component_names = {name.replace('\\', '/').lower(): name
+                                for name in self.zip_file.namelist()}
+        self.datemode = 0
+        self.sheet_targets = list()
+        self.shared_strings = list()
+        self.read_workbook()
+        self.read_shared_strings()
+
+    def open(self, name):
+        """
+        This function will open file inside xlsx archive
+        :param name: lowercase name of file
+        :return: file object
+        """
+        return self.zip_file.open(self.component_names[name])
+
+    def read_workbook(self):
+        """
+        This function will read names and paths of sheets and date mode
+        """
+        relationships = dict()
+        with self.open('xl/_rels/workbook.xml.rels') as f:
+            for elem in etree.parse(f).iter(U_PKGREL + 'Relationship'):
+                target = elem.get('Target').replace('\\', '/').lower()
+                if target.startswith('/'):
+                    target = target[1:]
+                else:
+                    target = f"xl/{target}"
+                relationships[elem.get('Id')] = (
+                    elem.get('Type').split('/')[-1], target)
+        with self.open('xl/workbook.xml') as f:
+            root = etree.parse(f).getroot()
+        for elem in root.iter(U_SSML12 + 'workbookPr'):
+            self.datemode = cnv_xsd_boolean(elem.get('date1904'))
+        for elem in root.iter(U_SSML12 + 'sheet'):
+            relationship_type, target = relationships[elem.get(U_ODREL + 'id')]
+            if relationship_type == 'worksheet':
+                self.sheet_targets.append((unescape(elem.get('name')),
+                                           target))
+
+    def read_shared_strings(self):
+        """
+        This function will read table of shared strings
+        """
+        if 'xl/sharedstrings.xml' not in self.component_names:
+            return
+        with self.open('xl/sharedstrings.xml') as f:
+            for _, elem in etree.iterparse(f, tag=SI_TAG):
+                self.shared_strings.append(get_text_from_si_or_is(None, elem))
+                elem.clear()
+
+    def sheets(self):
+        """
+        This function will return all worksheets of workbook
+        :return: list of XlsxStreamSheet objects
+        """
+        return [XlsxStreamSheet(self, name, target)
+                for name, target in self.sheet_targets]
+
+    def release_resources(self):
+        """
+        This function will close xlsx archive
+        """
+        self.zip_file.close()
+
+
+class XlsxStreamSheet:
+    def __init__(self, reader, name, target):
+        self.reader = reader
+        self.name = name
+        self.target = target
+        self.dimensions = None
+        self.column_indexes = dict()
+
+    @property
+    def nrows(self):
+        return self.get_dimensions()[0]
+
+    @property
+    def ncols(self):
+        return self.get_dimensions()[1]
+
+    def get_dimensions(self):
+        """
+        This function will scan sheet once to find number of rows and columns
+        as xlrd counts them, rows are padded to this number of columns
+        :return: number of rows and number of columns
+        """
+        if self.dimensions is None:
+            nrows = 0
+            ncols = 0
+            for rowx, row_elem in self.iter_row_elements():
+                # cells are sorted by column, so last stored cell of row is
+                # enough to know its width
+                for cell_elem in reversed(row_elem):
+                    if cell_elem.tag == CELL_TAG and self.is_stored(cell_elem):
+                        nrows = rowx + 1
+                        ncols = max(ncols, self.get_cell_column_index(
+                            row_elem, cell_elem) + 1)
+                        break
+            self.dimensions = (nrows, ncols)
+        return self.dimensions
+
+    def iter_row_values(self):
+        """
+        This function will iterate over rows without loading whole sheet,
+        empty rows between filled ones are returned as well
+        :return: generator of lists of cell values padded to ncols
+        """
+        ncols = self.ncols
+        next_rowx = 0
+        for rowx, cells in self.iter_cells():
+            while next_rowx < rowx:
+                yield [''] * ncols
+                next_rowx += 1
+            row = [''] * ncols
+            for colx, value in cells:
+                row[colx] = value
+            yield row
+            next_rowx = rowx + 1
+
+    def iter_cells(self):
+        """
+        This function will parse sheet row by row
+        :return: generator of row index and list of (column index, value)
+        tuples for rows that have at least one cell stored by xlrd
+        """
+        for rowx, row_elem in self.iter_row_elements():
+            cells = list()
+            colx = -1
+            for cell_elem in row_elem.iterchildren(CELL_TAG):
+                cell_name = cell_elem.get('r')
+                colx = colx + 1 if cell_name is None \
+                    else self.get_column_index(cell_name)
+                value = self.get_cell_value(cell_elem)
+                if value is not NO_CELL:
+                    cells.append((colx, value))
+            if len(cells) > 0:
+                yield rowx, cells
+
+    def iter_row_elements(self):
+        """
+        This function will parse sheet row by row, every row element is
+        removed from memory when the next one is parsed
+        :return: generator of row index and row element
+        """
+        rowx = -1
+        with self.reader.open(self.target) as f:
+            for _, row_elem in etree.iterparse(f, tag=ROW_TAG):
+                if row_elem.get('r') is None:
+                    rowx += 1
+                else:
+                    rowx = int(row_elem.get('r')) - 1
+                yield rowx, row_elem
+                # free memory taken by parsed rows
+                row_elem.clear()
+                while row_elem.getprevious() is not None:
+                    del row_elem.getparent()[0]
+
+    def get_cell_column_index(self, row_elem, cell_elem):
+        """
+        This function will return column index of cell
+        :param row_elem: row element
+        :param cell_elem: cell element
+        :return: column index, 0 for 'A'
+        """
+        cell_name = cell_elem.get('r')
+        if cell_name is not None:
+            return self.get_column_index(cell_name)
+        colx = -1
+        for elem in row_elem.iterchildren(CELL_TAG):
+            cell_name = elem.get('r')
+            colx = colx + 1 if cell_name is None \
+                else self.get_column_index(cell_name)
+            if elem is cell_elem:
+                break
+        return colx
+
+    def get_column_index(self, cell_name):
+        """
+        This function will convert cell name to column index
+        :param cell_name: name of cell like 'AB12'
+        :return: column index, 0 for 'A'
+        """
+        column_name = cell_name.rstrip('0123456789')
+        if column_name not in self.column_indexes:
+            colx = 0
+            for char in column_name:
+                if char == '$':
+                    continue
+                if not char.isalpha():
+                    break
+                colx = colx * 26 + ord(char.upper()) - ord('A') + 1
+            self.column_indexes[column_name] = colx - 1
+        return self.column_indexes[column_name]
+
+    @staticmethod
+    def get_cell_type_and_value(cell_elem):
+        """
+        This function will return type of cell and text of its value
+        :param cell_elem: cell element
+        :return: type of cell and value element (None if there is no value)
+        """
+        if len(cell_elem) == 1 and cell_elem[0].tag == V_TAG:
+            # the most common case, cell with just a value
+            return cell_elem.get('t', 'n'), cell_elem[0]
+        value_elem = None
+        for child in cell_elem:
+            if child.tag == V_TAG or child.tag == IS_TAG:
+                value_elem = child
+            elif child.tag != F_TAG:
+                raise ValueError(f"Unexpected tag {child.tag} in cell "
+                                 f"{cell_elem.get('r')}")
+        return cell_elem.get('t', 'n'), value_elem
+
+    def is_stored(self, cell_elem):
+        """
+        This function will check whether xlrd would store this cell
+        :param cell_elem: cell element
+        :return: True if cell is stored
+        """
+        cell_type = cell_elem.get('t', 'n')
+        if cell_type in ['str', 'b', 'e']:
+            return True
+        elif cell_type in ['n', 's']:
+            _, value_elem = self.get_cell_type_and_value(cell_elem)
+            return value_elem is not None and bool(value_elem.text)
+        return self.get_cell_value(cell_elem) is not NO_CELL
+
+    def get_cell_value(self, cell_elem):
+        """
+        This function will convert cell to the same value xlrd returns
+        :param cell_elem: cell element
+        :return: value of cell or NO_CELL for cells xlrd skips
+        """
+        cell_type, value_elem = self.get_cell_type_and_value(cell_elem)
+        if cell_type == 'n':
+            if value_elem is None or not value_elem.text:
+                return NO_CELL
+            return float(value_elem.text)
+        elif cell_type == 's':
+            if value_elem is None or not value_elem.text:
+                return NO_CELL
+            return self.reader.shared_strings[int(value_elem.text)]
+        elif cell_type == 'str':
+            if value_elem is None:
+                return None
+            return cooked_text(None, value_elem)
+        elif cell_type == 'b':
+            return cnv_xsd_boolean(
+                value_elem.text if value_elem is not None else None)
+        elif cell_type == 'e':
+            return error_code_from_text[
+                value_elem.text if value_elem is not None else '#N/A']
+        elif cell_type == 'inlineStr':
+            if value_elem is None:
+                return NO_CELL
+            if value_elem.tag == IS_TAG:
+                value = get_text_from_si_or_is(None, value_elem)
+            else:
+                value = value_elem.text
+            return value if value else NO_CELL
+        raise ValueError(f"Unknown cell type {cell_type} in cell "
+                         f"{cell_elem.get('r')}")
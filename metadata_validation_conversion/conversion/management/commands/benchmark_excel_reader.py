@@ -0,0 +1,188 @@
+import hashlib
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.core.management.base import BaseCommand, CommandError
+
+from conversion.ReadExcelFile import ReadExcelFile
+
+HEADERS = ['Sample Name', 'Sample Description', 'Material',
+           'Term Source ID', 'Project', 'Secondary Project',
+           'Availability', 'Same as', 'Organism', 'Term Source ID',
+           'Sex', 'Term Source ID', 'Birth Date', 'Unit', 'Breed',
+           'Term Source ID', 'Health Status', 'Term Source ID',
+           'Diet', 'Birth Location', 'Birth Location Latitude', 'Unit',
+           'Birth Location Longitude', 'Unit', 'Birth Weight', 'Unit',
+           'Pregnancy Length', 'Unit', 'Child Of', 'Child Of']
+
+CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+</Types>'''
+ROOT_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>'''
+WORKBOOK = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="animal" sheetId="1" r:id="rId1"/></sheets>
+</workbook>'''
+WORKBOOK_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>
+</Relationships>'''
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+
+
+def get_column_name(colx):
+    """
+    This function will convert column index to column name
+    :param colx: column index, 0 for 'A'
+    :return: column name
+    """
+    name = ''
+    colx += 1
+    while colx > 0:
+        colx, remainder = divmod(colx - 1, 26)
+        name = chr(ord('A') + remainder) + name
+    return name
+
+
+def get_row(row_number):
+    """
+    This function will return values of synthetic animal record
+    :param row_number: number of record
+    :return: list of cell values
+    """
+    return [f"animal_{row_number}", f"Synthetic animal {row_number}",
+            'organism', 'OBI_0100026', 'FAANG', '', 'public', '',
+            'Bos taurus', 'NCBITaxon_9913',
+            'female' if row_number % 2 else 'male',
+            'PATO_0000383' if row_number % 2 else 'PATO_0000384',
+            '2019-05', 'YYYY-MM', 'Holstein', 'LBO_0000156', 'normal',
+            'PATO_0000461', 'pasture', 'Edinburgh', 55.95, 'decimal degrees',
+            -3.19, 'decimal degrees', 40.0 + row_number % 10, 'kilograms',
+            280.0, 'days', f"animal_{row_number // 2}", '']
+
+
+def write_template(file_path, rows):
+    """
+    This function will write synthetic template with animal sheet
+    :param file_path: path to write template to
+    :param rows: number of records in template
+    """
+    shared_strings = dict()
+    with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', CONTENT_TYPES)
+        zf.writestr('_rels/.rels', ROOT_RELS)
+        zf.writestr('xl/workbook.xml', WORKBOOK)
+        zf.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        with zf.open('xl/worksheets/sheet1.xml', 'w') as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    f'<worksheet xmlns="{MAIN_NS}"><sheetData>'.encode())
+            for rowx in range(rows + 1):
+                values = HEADERS if rowx == 0 else get_row(rowx)
+                cells = list()
+                for colx, value in enumerate(values):
+                    cell_name = f"{get_column_name(colx)}{rowx + 1}"
+                    if value == '':
+                        continue
+                    elif isinstance(value, float):
+                        cells.append(f'<c r="{cell_name}"><v>{value}</v></c>')
+                    else:
+                        index = shared_strings.setdefault(
+                            value, len(shared_strings))
+                        cells.append(f'<c r="{cell_name}" t="s">'
+                                     f'<v>{index}</v></c>')
+                f.write(f'<row r="{rowx + 1}">{"".join(cells)}</row>'.encode())
+            f.write(b'</sheetData></worksheet>')
+        with zf.open('xl/sharedStrings.xml', 'w') as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    f'<sst xmlns="{MAIN_NS}" count="{len(shared_strings)}" '
+                    f'uniqueCount="{len(shared_strings)}">'.encode())
+            for value in shared_strings:
+                f.write(f'<si><t>{escape(value)}</t></si>'.encode())
+            f.write(b'</sst>')
+
+
+def read_template(file_path, streaming, full, queue):
+    """
+    This function will read template in separate process, so peak memory
+    of every reader is measured separately
+    :param file_path: path to template
+    :param streaming: whether streaming reader should be used
+    :param full: whether template should be converted to json
+    :param queue: queue to put time, peak memory and digest of rows into
+    """
+    start = time.perf_counter()
+    digest = hashlib.sha1()
+    if full:
+        # conversion removes file after reading it
+        tmp_dir = tempfile.mkdtemp()
+        tmp_path = os.path.join(tmp_dir, os.path.basename(file_path))
+        shutil.copy(file_path, tmp_path)
+        start = time.perf_counter()
+        data, _, _ = ReadExcelFile(tmp_path, 'samples',
+                                   streaming=streaming).start_conversion()
+        shutil.rmtree(tmp_dir)
+        digest.update(repr(data).encode())
+    else:
+        excel_file = ReadExcelFile(file_path, 'samples', streaming=streaming)
+        wb = excel_file.open_workbook()
+        for sh in wb.sheets():
+            for row_values in excel_file.iter_row_values(sh):
+                digest.update(repr(row_values).encode())
+        wb.release_resources()
+    queue.put((time.perf_counter() - start,
+               resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               digest.hexdigest()))
+
+
+class Command(BaseCommand):
+    help = 'Compare memory and time taken by xlrd and streaming reader on ' \
+           'synthetic templates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+',
+                            default=[10000, 50000])
+        parser.add_argument('--full', action='store_true',
+                            help='run whole conversion, needs access to '
+                                 'rules or warmed schema cache')
+
+    def handle(self, *args, **options):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            for rows in options['rows']:
+                file_path = os.path.join(tmp_dir, f"template_{rows}.xlsx")
+                write_template(file_path, rows)
+                self.stdout.write(
+                    f"{rows} records, "
+                    f"{os.path.getsize(file_path) / 1024 / 1024:.1f}MB:")
+                digests = list()
+                for streaming in [False, True]:
+                    queue = multiprocessing.Queue()
+                    process = multiprocessing.Process(
+                        target=read_template,
+                        args=(file_path, streaming, options['full'], queue))
+                    process.start()
+                    wall_time, max_rss, digest = queue.get()
+                    process.join()
+                    digests.append(digest)
+                    name = 'streaming' if streaming else 'xlrd'
+                    self.stdout.write(f"  {name:<10} {wall_time:6.2f}s "
+                                      f"{max_rss / 1024:8.1f}MB peak RSS")
+                if digests[0] != digests[1]:
+                    raise CommandError("Readers returned different data")
+        finally:
+            shutil.rmtree(tmp_dir)
@@ -4,6 +4,7 @@ from .ReadExcelFile import ReadExcelFile
 from metadata_validation_conversion.celery import app
 from metadata_validation_conversion.helpers import send_message
 from metadata_validation_conversion.constants import ALLOWED_TEMPLATES
+from metadata_validation_conversion.payload_store import save
 from celery import Task
 
 
@@ -23,7 +24,7 @@ def read_excel_file(room_id, conversion_type, file):
     :param room_id: room id to create ws url
     :param conversion_type: could be 'samples' or 'experiments'
     :param file: file to read
-    :return: converted data
+    :return: references to converted data and structure
     """
     if conversion_type not in ALLOWED_TEMPLATES:
         send_message(
@@ -37,10 +38,11 @@ def read_excel_file(room_id, conversion_type, file):
     if 'Error' in results[0]:
         send_message(
             room_id=room_id, conversion_status='Error', errors=results[0])
+        return results[0], results[1]
     else:
         if results[2]:
             send_message(room_id=room_id, conversion_status='Success',
                          bovreg_submission=True)
         else:
             send_message(room_id=room_id, conversion_status='Success')
-    return results[0], results[1]
+    return save(results[0]), save(results[1])
@@ -20,6 +20,7 @@ def convert_template(request, task_id):
         res = read_excel_file.apply_async((fileid, task_id,
                                            f'/data/{fileid}.xlsx'),
                                           queue='conversion')
-        res.get()
+        # progress is reported through websocket, validation waits for
+        # this task by itself
         return HttpResponse(res.id)
     return HttpResponse("Please use POST method for conversion!")
@@ -0,0 +1,64 @@
+import asyncio
+import random
+
+import aiohttp
+
+# responses with these statuses are worth retrying
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+def run_async(coroutine):
+    """
+    This function will run coroutine inside new event loop
+    :param coroutine: coroutine to run
+    :return: result of coroutine
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def get_json(session, semaphore, url, retries, headers=None):
+    """
+    This function will get json from url, retrying with exponential backoff
+    when server throttles or fails
+    :param session: session to work with
+    :param semaphore: semaphore limiting number of simultaneous calls
+    :param url: url to get
+    :param retries: number of retries
+    :param headers: headers to send
+    :return: status of response and json (None if status isn't successful)
+    """
+    for attempt in range(retries + 1):
+        delay = None
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers) as response:
+                    if response.status not in RETRY_STATUSES:
+                        if response.status >= 400:
+                            return response.status, None
+                        return response.status, await response.json(
+                            content_type=None)
+                    delay = get_retry_after(response)
+                    if attempt == retries:
+                        response.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+        if delay is None:
+            delay = min(0.5 * 2 ** attempt, 30) * random.uniform(0.5, 1.5)
+        await asyncio.sleep(delay)
+
+
+def get_retry_after(response):
+    """
+    This function will return delay server asked to wait for
+    :param response: response object
+    :return: delay in seconds or None if it wasn't provided
+    """
+    try:
+        return min(float(response.headers['Retry-After']), 60)
+    except (KeyError, ValueError):
+        return None
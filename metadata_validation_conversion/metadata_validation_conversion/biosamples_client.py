@@ -0,0 +1,97 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from submission.helpers import get_header
+from .async_helpers import run_async, get_json
+from .constants import BIOSAMPLES_URL, BIOSAMPLES_CACHE_TTL, \
+    BIOSAMPLES_NEGATIVE_CACHE_TTL, BIOSAMPLES_CONCURRENCY, BIOSAMPLES_RETRIES
+from .persistent_cache import PersistentCache
+
+logger = logging.getLogger(__name__)
+
+biosamples_cache = PersistentCache('biosamples', BIOSAMPLES_CACHE_TTL,
+                                   BIOSAMPLES_NEGATIVE_CACHE_TTL)
+
+
+def fetch_samples(ids):
+    """
+    This function will return BioSamples records for accessions, records
+    are taken from cache and only missing ones are fetched from BioSamples
+    :param ids: accessions to fetch
+    :return: dict with accessions as keys and records as values, accessions
+    that weren't found are missing
+    """
+    ids = {my_id for my_id in ids if my_id}
+    samples = biosamples_cache.get_many(ids)
+    ids_to_fetch = ids - set(samples)
+    if len(ids_to_fetch) > 0:
+        fetched_samples = dict()
+        run_async(fetch_all_samples(ids_to_fetch, fetched_samples))
+        biosamples_cache.set_many(
+            {my_id: sample for my_id, sample in fetched_samples.items()
+             if sample is not None})
+        biosamples_cache.set_many(
+            {my_id: sample for my_id, sample in fetched_samples.items()
+             if sample is None}, negative=True)
+        samples.update(fetched_samples)
+    return {my_id: sample for my_id, sample in samples.items()
+            if sample is not None}
+
+
+def fetch_sample(my_id):
+    """
+    This function will return BioSamples record for accession
+    :param my_id: accession to fetch
+    :return: record or None if it wasn't found
+    """
+    return fetch_samples([my_id]).get(my_id)
+
+
+async def fetch_all_samples(ids, results_to_return):
+    """
+    This function will create tasks for biosample calls, sharing one session
+    and limiting number of simultaneous calls
+    :param ids: ids to fetch from biosamples
+    :param results_to_return: holder for results, None for missing samples
+    """
+    semaphore = asyncio.Semaphore(BIOSAMPLES_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=60)
+    auth = dict()
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        tasks = []
+        for my_id in ids:
+            task = asyncio.ensure_future(fetch_sample_async(
+                session, semaphore, my_id, results_to_return, auth))
+            tasks.append(task)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    for my_id, result in zip(ids, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Couldn't get {my_id} from BioSamples: "
+                           f"{result!r}")
+
+
+async def fetch_sample_async(session, semaphore, my_id, results_to_return,
+                             auth):
+    """
+    This function will create task to call my_id from biosamples, private
+    samples are requested again with token
+    :param session: session to work with
+    :param semaphore: semaphore limiting number of simultaneous calls
+    :param my_id: accession to fetch
+    :param results_to_return: holder for results
+    :param auth: holder for headers with token, shared by all tasks
+    """
+    url = f"{BIOSAMPLES_URL}/{my_id}"
+    _, sample = await get_json(session, semaphore, url, BIOSAMPLES_RETRIES)
+    if sample is None or 'error' in sample:
+        if 'headers' not in auth:
+            # token is cached, so it is requested once per run
+            auth['headers'] = get_header()
+        _, sample = await get_json(session, semaphore, url,
+                                   BIOSAMPLES_RETRIES, auth['headers'])
+    if sample is None or 'error' in sample:
+        results_to_return[my_id] = None
+    else:
+        results_to_return[my_id] = sample
@@ -1,7 +1,100 @@
 from decouple import config
 
-BASE_URL = "https://raw.githubusercontent.com/FAANG/dcc-metadata/master/" \
-           "json_schema/"
+# Branch, tag or commit of FAANG/dcc-metadata to take rules from
+RULES_VERSION = config('RULES_VERSION', default='master')
+BASE_URL = f"https://raw.githubusercontent.com/FAANG/dcc-metadata/" \
+           f"{RULES_VERSION}/json_schema/"
+# Rules are cached in memory and in this directory shared by all workers,
+# cached copies are revalidated with ETag after SCHEMA_CACHE_TTL seconds
+SCHEMA_CACHE_DIR = config('SCHEMA_CACHE_DIR', default='/data/schema_cache')
+SCHEMA_CACHE_TTL = config('SCHEMA_CACHE_TTL', default=3600, cast=int)
+# Cache for responses of external services (OLS, BioSamples, ENA) kept
+# between submissions, redis if CACHE_REDIS_URL is set, sqlite file otherwise
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+CACHE_DIR = config('CACHE_DIR', default='/data/cache')
+OLS_SEARCH_URL = "http://www.ebi.ac.uk/ols/api/search"
+OLS_CACHE_TTL = config('OLS_CACHE_TTL', default=7 * 24 * 3600, cast=int)
+# terms OLS doesn't know are asked again sooner
+OLS_NEGATIVE_CACHE_TTL = config('OLS_NEGATIVE_CACHE_TTL', default=24 * 3600,
+                                cast=int)
+OLS_CONCURRENCY = config('OLS_CONCURRENCY', default=10, cast=int)
+OLS_RETRIES = config('OLS_RETRIES', default=4, cast=int)
+OLS_LBO_TERMS_URL = "https://www.ebi.ac.uk/ols/api/ontologies/lbo/terms"
+# Breeds of every species from LBO, breeds are checked against this file
+# instead of asking elixir-validator, file is rebuilt when it is older than
+# BREED_INDEX_TTL
+BREED_INDEX_PATH = config('BREED_INDEX_PATH',
+                          default='/data/lbo_breeds.msgpack.z')
+BREED_INDEX_TTL = config('BREED_INDEX_TTL', default=7 * 24 * 3600, cast=int)
+BIOSAMPLES_URL = "https://www.ebi.ac.uk/biosamples/samples"
+BIOSAMPLES_CACHE_TTL = config('BIOSAMPLES_CACHE_TTL', default=6 * 3600,
+                              cast=int)
+# samples could be created any moment, so don't remember missing ones long
+BIOSAMPLES_NEGATIVE_CACHE_TTL = config('BIOSAMPLES_NEGATIVE_CACHE_TTL',
+                                       default=600, cast=int)
+BIOSAMPLES_CONCURRENCY = config('BIOSAMPLES_CONCURRENCY', default=10,
+                                cast=int)
+BIOSAMPLES_RETRIES = config('BIOSAMPLES_RETRIES', default=4, cast=int)
+ENA_SUMMARY_URL = "https://www.ebi.ac.uk/ena/browser/api/summary"
+ENA_CACHE_TTL = config('ENA_CACHE_TTL', default=24 * 3600, cast=int)
+# accessions could become public any moment, so don't remember missing ones
+# long
+ENA_NEGATIVE_CACHE_TTL = config('ENA_NEGATIVE_CACHE_TTL', default=600,
+                                cast=int)
+ENA_CONCURRENCY = config('ENA_CONCURRENCY', default=5, cast=int)
+ENA_RETRIES = config('ENA_RETRIES', default=4, cast=int)
+# Number of accessions asked about in one request
+ENA_SUMMARY_BATCH_SIZE = config('ENA_SUMMARY_BATCH_SIZE', default=100,
+                                cast=int)
+# Requests of BioSamples and Webin submissions are retried this number of
+# times when server is busy or unavailable
+SUBMISSION_RETRIES = config('SUBMISSION_RETRIES', default=5, cast=int)
+SUBMISSION_TIMEOUT = config('SUBMISSION_TIMEOUT', default=120, cast=int)
+# Number of kept-alive connections to every submission server
+SUBMISSION_POOL_SIZE = config('SUBMISSION_POOL_SIZE', default=10, cast=int)
+# ENA validates whole submission before it answers, so it gets more time
+ENA_SUBMISSION_TIMEOUT = config('ENA_SUBMISSION_TIMEOUT', default=600,
+                                cast=int)
+# Number of records sent to BioSamples at the same time and maximum number
+# of requests per second, 0 means no limit
+SUBMISSION_WORKERS = config('SUBMISSION_WORKERS', default=10, cast=int)
+SUBMISSION_RATE_LIMIT = config('SUBMISSION_RATE_LIMIT', default=50.0,
+                               cast=float)
+# Record is sent again this number of times when connection to server fails
+SUBMISSION_RECORD_RETRIES = config('SUBMISSION_RECORD_RETRIES', default=2,
+                                   cast=int)
+# Tasks pass big data (converted templates, validation results) through
+# this store, redis if PAYLOAD_REDIS_URL is set, directory otherwise
+PAYLOAD_REDIS_URL = config('PAYLOAD_REDIS_URL', default='')
+PAYLOAD_DIR = config('PAYLOAD_DIR', default='/data/payloads')
+PAYLOAD_TTL = config('PAYLOAD_TTL', default=24 * 3600, cast=int)
+# Progress of BioSamples submissions, so they could be resumed after failure
+SUBMISSION_JOURNAL_DIR = config('SUBMISSION_JOURNAL_DIR',
+                                default='/data/submission_journals')
+# Read xlsx templates row by row instead of loading them with xlrd
+XLSX_STREAMING_READER = config('XLSX_STREAMING_READER', default=False,
+                               cast=bool)
+# Number of compiled template layouts every worker keeps
+COLUMN_PLAN_CACHE_SIZE = config('COLUMN_PLAN_CACHE_SIZE', default=256,
+                                cast=int)
+# Validation results of unchanged records are reused when template is
+# uploaded again, 0 switches this off
+VALIDATION_CACHE_TTL = config('VALIDATION_CACHE_TTL', default=24 * 3600,
+                              cast=int)
+# Submissions with more records are checked in chunks of this size by
+# several workers, 0 checks all records in one task
+VALIDATION_CHUNK_SIZE = config('VALIDATION_CHUNK_SIZE', default=2000,
+                               cast=int)
+# Results of submissions with more records are sent to front-end in pages
+# of this size that it asks for, 0 sends all results in one message
+VALIDATION_RESULTS_PAGE_SIZE = config('VALIDATION_RESULTS_PAGE_SIZE',
+                                      default=1000, cast=int)
+# Tasks waiting for result of previous step check it with this interval in
+# seconds, at most this number of times
+UPSTREAM_POLL_INTERVAL = config('UPSTREAM_POLL_INTERVAL', default=2,
+                                cast=int)
+UPSTREAM_MAX_RETRIES = config('UPSTREAM_MAX_RETRIES', default=1800,
+                              cast=int)
 SAMPLE_CORE_URL = f"{BASE_URL}core/samples/" \
                   f"faang_samples_core.metadata_rules.json"
 EXPERIMENT_CORE_URL = f"{BASE_URL}/core/experiments/" \
@@ -63,6 +156,15 @@ ENA_ANALYSES_URL = f"{BASE_URL}/type/analyses/" \
 EVA_ANALYSES_URL = f"{BASE_URL}/module/analyses/" \
                    f"faang_analyses_eva.metadata_rules.json"
 ELIXIR_VALIDATOR_URL = config('ELIXIR_VALIDATOR_URL')
+# Optional endpoint accepting many (schema, object) pairs in one request
+ELIXIR_VALIDATOR_BATCH_URL = config('ELIXIR_VALIDATOR_BATCH_URL', default='')
+ELIXIR_VALIDATOR_BATCH_SIZE = config('ELIXIR_VALIDATOR_BATCH_SIZE', default=500,
+                                     cast=int)
+ELIXIR_VALIDATOR_CONCURRENCY = config('ELIXIR_VALIDATOR_CONCURRENCY',
+                                      default=20, cast=int)
+# 'local' validates in-process and uses elixir-validator only for
+# graph_restriction keyword, 'remote' sends everything to elixir-validator
+VALIDATOR_BACKEND = config('VALIDATOR_BACKEND', default='local')
 WS_URL = "ws://127.0.0.1:8000/ws/submission/test_task/"
 
 ALLOWED_TEMPLATES = ['samples', 'experiments', 'analyses']
@@ -392,6 +494,8 @@ SUBMISSION_PROD_SERVER = 'https://www.ebi.ac.uk'
 
 ENA_TEST_SERVER = 'https://wwwdev.ebi.ac.uk/ena/submit/drop-box/submit/'
 ENA_PROD_SERVER = 'https://www.ebi.ac.uk/ena/submit/drop-box/submit/'
+ENA_DATA_HUB_PROJECT_URL = \
+    'https://www.ebi.ac.uk/ena/portal/ams/webin/project/add'
 
 BE_SVC = 'http://backend-svc:8000'
 ZOOMA_SERVICE = 'http://www.ebi.ac.uk/spot/zooma/v2/api/services'
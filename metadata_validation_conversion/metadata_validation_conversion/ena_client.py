@@ -0,0 +1,102 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from .async_helpers import run_async, get_json
+from .constants import ENA_SUMMARY_URL, ENA_CACHE_TTL, \
+    ENA_NEGATIVE_CACHE_TTL, ENA_CONCURRENCY, ENA_RETRIES, \
+    ENA_SUMMARY_BATCH_SIZE
+from .persistent_cache import PersistentCache
+
+logger = logging.getLogger(__name__)
+
+ena_cache = PersistentCache('ena', ENA_CACHE_TTL, ENA_NEGATIVE_CACHE_TTL)
+
+
+def find_accessions(accessions):
+    """
+    This function will check which accessions exist in ENA, answers are
+    taken from cache and only missing ones are asked in batches
+    :param accessions: accessions to check
+    :return: set of accessions that exist in ENA, accessions ENA couldn't be
+    asked about are treated as missing
+    """
+    accessions = {accession for accession in accessions if accession}
+    results = ena_cache.get_many(accessions)
+    accessions_to_fetch = sorted(accessions - set(results))
+    if len(accessions_to_fetch) > 0:
+        fetched_results = dict()
+        run_async(fetch_all_summaries(accessions_to_fetch, fetched_results))
+        ena_cache.set_many(
+            {accession: True for accession, found in fetched_results.items()
+             if found})
+        ena_cache.set_many(
+            {accession: False for accession, found in fetched_results.items()
+             if not found}, negative=True)
+        results.update(fetched_results)
+    return {accession for accession, found in results.items() if found}
+
+
+async def fetch_all_summaries(accessions, results_to_return):
+    """
+    This function will create tasks for ENA calls, sharing one session and
+    limiting number of simultaneous calls
+    :param accessions: accessions to check
+    :param results_to_return: holder for results, True for existing
+    accessions, False for missing ones
+    """
+    semaphore = asyncio.Semaphore(ENA_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=60)
+    batches = [accessions[i:i + ENA_SUMMARY_BATCH_SIZE]
+               for i in range(0, len(accessions), ENA_SUMMARY_BATCH_SIZE)]
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        tasks = [asyncio.ensure_future(fetch_summaries(
+            session, semaphore, batch, results_to_return))
+            for batch in batches]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Couldn't get {len(batch)} accessions from ENA: "
+                           f"{result!r}")
+
+
+async def fetch_summaries(session, semaphore, accessions, results_to_return):
+    """
+    This function will ask ENA about batch of accessions, if ENA rejects
+    the whole batch, accessions are asked one by one
+    :param session: session to work with
+    :param semaphore: semaphore limiting number of simultaneous calls
+    :param accessions: accessions to check
+    :param results_to_return: holder for results
+    """
+    _, summary = await get_json(session, semaphore,
+                                f"{ENA_SUMMARY_URL}/{','.join(accessions)}",
+                                ENA_RETRIES)
+    if summary is None and len(accessions) > 1:
+        await asyncio.gather(*[
+            fetch_summaries(session, semaphore, [accession],
+                            results_to_return)
+            for accession in accessions])
+        return
+    found = parse_summary(summary, accessions)
+    for accession in accessions:
+        results_to_return[accession] = accession in found
+
+
+def parse_summary(summary, accessions):
+    """
+    This function will return accessions found by ENA
+    :param summary: response of summary endpoint
+    :param accessions: accessions that were asked about
+    :return: set of found accessions
+    """
+    if summary is None or int(summary.get('total', 0)) == 0:
+        return set()
+    if len(accessions) == 1:
+        return set(accessions)
+    found = set()
+    for record in summary.get('summaries', list()):
+        if 'accession' in record:
+            found.add(record['accession'])
+    return found
@@ -1,12 +1,36 @@
-import requests
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from .constants import SAMPLE_CORE_URL, EXPERIMENT_CORE_URL
+from .celery import app
+from .constants import SAMPLE_CORE_URL, EXPERIMENT_CORE_URL, \
+    UPSTREAM_POLL_INTERVAL, UPSTREAM_MAX_RETRIES
+from .schema_cache import get_schema
+
+
+def get_rules_urls(url, json_type, module_url=None):
+    """
+    This function will return urls of all rules get_rules_json uses
+    :param url: url for type json field
+    :param json_type: type of json to fetch: samples, experiments, analyses
+    :param module_url: module url if appropriate
+    :return: list of urls
+    """
+    if json_type == 'samples':
+        urls = [url, SAMPLE_CORE_URL]
+    elif json_type == 'experiments':
+        urls = [url, EXPERIMENT_CORE_URL]
+    elif json_type == 'analyses':
+        return [url]
+    else:
+        raise ValueError(f"Error: {json_type} is not allowed type!")
+    if module_url:
+        urls.append(module_url)
+    return urls
 
 
 def get_rules_json(url, json_type, module_url=None):
     """
-    This function will fetch json from url and then fetch core json from $ref
+    This function will fetch json from url and then fetch core json from $ref,
+    all jsons are taken from schema cache
     :param url: url for type json field
     :param json_type: type of json to fetch: samples, experiments, analyses
     :param module_url: module url if appropriate
@@ -17,18 +41,34 @@ def get_rules_json(url, json_type, module_url=None):
     elif json_type == 'experiments':
         core_json = EXPERIMENT_CORE_URL
     elif json_type == 'analyses':
-        return requests.get(url).json()
+        return get_schema(url)
     else:
         raise ValueError(f"Error: {json_type} is not allowed type!")
-    type_json = requests.get(url).json()
-    core_json = requests.get(core_json).json()
+    type_json = get_schema(url)
+    core_json = get_schema(core_json)
     if module_url:
-        module_json = requests.get(module_url).json()
+        module_json = get_schema(module_url)
         return type_json, core_json, module_json
     else:
         return type_json, core_json
 
 
+def get_upstream_result(task, task_id):
+    """
+    This function will return result of previous step of pipeline, task is
+    retried until this result is ready, so no worker waits for it
+    :param task: bound task that needs result
+    :param task_id: id of task to get result of
+    :return: result of task, exception of failed task is raised
+    """
+    upstream_result = app.AsyncResult(task_id)
+    if not upstream_result.ready():
+        raise task.retry(countdown=UPSTREAM_POLL_INTERVAL,
+                         max_retries=UPSTREAM_MAX_RETRIES)
+    # result is ready, so it doesn't block
+    return upstream_result.get(disable_sync_subtasks=False)
+
+
 def convert_to_snake_case(my_string):
     """
     This function will convert any string to snake_case string
@@ -44,7 +84,8 @@ def send_message(room_id, conversion_status=None, validation_status=None,
                  annotation_status=None, domains=None,
                  submission_message=None, subscription_status=None, submission_results=None,
                  bovreg_submission=None,
-                 ontology_update_status=None):
+                 ontology_update_status=None, validation_summary=None,
+                 results_pages=None):
     """
     This function will send message to channel layer
     :param room_id: room id to construct ws url
@@ -62,6 +103,10 @@ def send_message(room_id, conversion_status=None, validation_status=None,
     :param submission_results: list of submission results
     :param bovreg_submission: true if secondary_project == BovReg
     :param ontology_update_status: ontology update status to send
+    :param validation_summary: numbers of errors and warnings of submission,
+    its sheets, records and fields
+    :param results_pages: id and pages of results that are sent on request
+    instead of table_data
     """
     response = {
         'conversion_status': conversion_status,
@@ -77,7 +122,9 @@ def send_message(room_id, conversion_status=None, validation_status=None,
         'domains': domains,
         'submission_results': submission_results,
         'bovreg_submission': bovreg_submission,
-        'ontology_update_status': ontology_update_status
+        'ontology_update_status': ontology_update_status,
+        'validation_summary': validation_summary,
+        'results_pages': results_pages
     }
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(f"submission_{room_id}", {
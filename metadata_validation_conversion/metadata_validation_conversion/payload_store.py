@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import zlib
+
+import msgpack
+import redis
+
+from .constants import PAYLOAD_REDIS_URL, PAYLOAD_DIR, PAYLOAD_TTL
+
+logger = logging.getLogger(__name__)
+
+REF_KEY = 'payload_ref'
+# how often every worker removes expired payloads from PAYLOAD_DIR
+CLEANUP_INTERVAL = 600
+
+last_cleanup = dict()
+redis_clients = dict()
+
+
+class PayloadNotFound(Exception):
+    pass
+
+
+def save(payload):
+    """
+    This function will put payload into store shared by all workers, tasks
+    pass returned reference to each other instead of payload itself
+    :param payload: JSON-like data to store
+    :return: reference to payload
+    """
+    packed = msgpack.packb(payload, use_bin_type=True)
+    key = hashlib.sha256(packed).hexdigest()
+    if PAYLOAD_REDIS_URL:
+        # same content has the same key, so just prolong it if it exists
+        client = get_redis_client()
+        if not client.expire(f"payload:{key}", PAYLOAD_TTL):
+            client.setex(f"payload:{key}", PAYLOAD_TTL,
+                         zlib.compress(packed, 1))
+    else:
+        path = get_path(key)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                            suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(zlib.compress(packed, 1))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        remove_expired()
+    return {REF_KEY: key}
+
+
+def load(value):
+    """
+    This function will return payload for reference, any other value is
+    returned as it is, so tasks work with both
+    :param value: reference or payload
+    :return: payload
+    """
+    if not is_ref(value):
+        return value
+    key = value[REF_KEY]
+    if PAYLOAD_REDIS_URL:
+        data = get_redis_client().get(f"payload:{key}")
+    else:
+        path = get_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > PAYLOAD_TTL:
+                data = None
+            else:
+                with open(path, 'rb') as f:
+                    data = f.read()
+        except FileNotFoundError:
+            data = None
+    if data is None:
+        raise PayloadNotFound("Data of this submission has expired, please "
+                              "upload template again")
+    return msgpack.unpackb(zlib.decompress(data), raw=False,
+                           strict_map_key=False)
+
+
+def is_ref(value):
+    """
+    This function will check whether value is reference to payload
+    :param value: value to check
+    :return: True if value is reference
+    """
+    return isinstance(value, dict) and len(value) == 1 and REF_KEY in value
+
+
+def get_path(key):
+    """
+    This function will return path of payload file
+    :param key: key of payload
+    :return: path inside PAYLOAD_DIR
+    """
+    return os.path.join(PAYLOAD_DIR, key[:2], f"{key}.msgpack.z")
+
+
+def get_redis_client():
+    """
+    This function will return redis client of this process
+    :return: redis client
+    """
+    if os.getpid() not in redis_clients:
+        redis_clients[os.getpid()] = redis.Redis.from_url(PAYLOAD_REDIS_URL)
+    return redis_clients[os.getpid()]
+
+
+def remove_expired():
+    """
+    This function will remove expired payloads from PAYLOAD_DIR, it does
+    actual work once per CLEANUP_INTERVAL
+    """
+    now = time.time()
+    if now - last_cleanup.get(os.getpid(), 0) < CLEANUP_INTERVAL:
+        return
+    last_cleanup[os.getpid()] = now
+    for root, _, files in os.walk(PAYLOAD_DIR):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            try:
+                if now - os.path.getmtime(path) > PAYLOAD_TTL:
+                    os.remove(path)
+            except OSError:
+                # removed by another worker
+                pass
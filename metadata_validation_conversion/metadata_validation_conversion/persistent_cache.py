@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import redis
+
+from .constants import CACHE_REDIS_URL, CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# sqlite limits number of parameters in one query
+SQLITE_CHUNK_SIZE = 500
+
+
+class RedisBackend:
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def get_many(self, keys):
+        values = self.client.mget(keys)
+        return {key: value for key, value in zip(keys, values)
+                if value is not None}
+
+    def set_many(self, mapping, ttl):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipeline.setex(key, ttl, value)
+        pipeline.execute()
+
+    def delete_many(self, keys):
+        if keys:
+            self.client.delete(*keys)
+
+
+class SqliteBackend:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self.connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT '
+                               'PRIMARY KEY, value TEXT, expires_at REAL)')
+
+    def connect(self):
+        # connection per call, workers are forked and share the file
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, keys):
+        results = dict()
+        now = time.time()
+        with closing(self.connect()) as connection:
+            for start in range(0, len(keys), SQLITE_CHUNK_SIZE):
+                chunk = keys[start:start + SQLITE_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = connection.execute(
+                    f"SELECT key, value FROM cache WHERE key IN "
+                    f"({placeholders}) AND expires_at > ?", chunk + [now])
+                results.update(rows)
+        return results
+
+    def set_many(self, mapping, ttl):
+        expires_at = time.time() + ttl
+        with closing(self.connect()) as connection, connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                [(key, value, expires_at) for key, value in mapping.items()])
+            connection.execute('DELETE FROM cache WHERE expires_at <= ?',
+                               (time.time(),))
+
+    def delete_many(self, keys):
+        with closing(self.connect()) as connection, connection:
+            connection.executemany('DELETE FROM cache WHERE key = ?',
+                                   [(key,) for key in keys])
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.values = dict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        with self.lock:
+            return {key: self.values[key][0] for key in keys
+                    if key in self.values and self.values[key][1] > now}
+
+    def set_many(self, mapping, ttl):
+        expires_at = time.time() + ttl
+        with self.lock:
+            for key, value in mapping.items():
+                self.values[key] = (value, expires_at)
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.values.pop(key, None)
+
+
+def get_backend():
+    """
+    This function will return storage shared by all workers: redis if
+    CACHE_REDIS_URL is set, sqlite file inside CACHE_DIR otherwise
+    :return: backend object
+    """
+    if CACHE_REDIS_URL:
+        return RedisBackend(CACHE_REDIS_URL)
+    if CACHE_DIR:
+        try:
+            return SqliteBackend(os.path.join(CACHE_DIR, 'cache.sqlite3'))
+        except (OSError, sqlite3.Error) as err:
+            logger.warning(f"Couldn't open cache in {CACHE_DIR}, using memory "
+                           f"of this worker: {err}")
+    return MemoryBackend()
+
+
+class PersistentCache:
+    """
+    Cache of JSON values shared by all workers and kept between submissions
+    """
+    backend = None
+    backend_lock = threading.Lock()
+
+    def __init__(self, namespace, ttl, negative_ttl=None):
+        """
+        :param namespace: prefix to separate keys of different caches
+        :param ttl: seconds to keep values for
+        :param negative_ttl: seconds to keep 'not found' values for
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl if negative_ttl is not None else ttl
+
+    @classmethod
+    def get_storage(cls):
+        """
+        This function will lazily create backend, so importing this module
+        doesn't connect anywhere
+        :return: backend object
+        """
+        with cls.backend_lock:
+            if cls.backend is None:
+                cls.backend = get_backend()
+            return cls.backend
+
+    def get_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get_many(self, keys):
+        """
+        This function will return cached values for keys
+        :param keys: keys to look for
+        :return: dict with keys found in cache and their values
+        """
+        keys = list(keys)
+        if not keys:
+            return dict()
+        try:
+            values = self.get_storage().get_many(
+                [self.get_key(key) for key in keys])
+        except Exception as err:
+            logger.warning(f"Couldn't read {self.namespace} cache: {err}")
+            return dict()
+        results = dict()
+        for key in keys:
+            value = values.get(self.get_key(key))
+            if value is not None:
+                results[key] = json.loads(value)
+        return results
+
+    def set_many(self, mapping, negative=False):
+        """
+        This function will store values in cache
+        :param mapping: dict with keys and values to store
+        :param negative: values mean that key wasn't found, they are kept
+        for negative_ttl
+        """
+        if not mapping:
+            return
+        ttl = self.negative_ttl if negative else self.ttl
+        try:
+            self.get_storage().set_many(
+                {self.get_key(key): json.dumps(value)
+                 for key, value in mapping.items()}, ttl)
+        except Exception as err:
+            logger.warning(f"Couldn't write {self.namespace} cache: {err}")
+
+    def delete_many(self, keys):
+        """
+        This function will remove keys from cache
+        :param keys: keys to remove
+        """
+        try:
+            self.get_storage().delete_many(
+                [self.get_key(key) for key in keys])
+        except Exception as err:
+            logger.warning(f"Couldn't delete from {self.namespace} cache: "
+                           f"{err}")
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+
+from .constants import RULES_VERSION, SCHEMA_CACHE_DIR, SCHEMA_CACHE_TTL, \
+    ALLOWED_SHEET_NAMES, MODULE_RULES, SAMPLE_CORE_URL, EXPERIMENT_CORE_URL
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaCache:
+    """
+    Cache for rules json files, keeps them in memory of every worker and in
+    directory shared by all workers, so GitHub is only asked to revalidate
+    cached copy once per ttl
+    """
+    def __init__(self, cache_dir, ttl, version):
+        """
+        :param cache_dir: directory to store schemas in, memory only if None
+        :param ttl: seconds before cached schema should be revalidated
+        :param version: branch, tag or commit schemas are taken from
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.version = version
+        # files of particular commit never change
+        self.immutable = re.fullmatch('[0-9a-f]{40}', version) is not None
+        self.entries = dict()
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+
+    def get(self, url):
+        """
+        This function will return schema for url
+        :param url: url of schema
+        :return: schema in JSON format, every call returns new copy so it
+        could be modified by caller
+        """
+        return json.loads(self.get_entry(url)['text'])
+
+    def get_digest(self, url):
+        """
+        This function will return digest of schema content
+        :param url: url of schema
+        :return: sha1 of schema
+        """
+        return self.get_entry(url)['digest']
+
+    def warm(self, urls, force=False):
+        """
+        This function will load all urls into cache
+        :param urls: list of urls to load
+        :param force: revalidate schemas even if they are still fresh
+        :return: dict with urls as keys and digests as values
+        """
+        digests = dict()
+        for url in urls:
+            digests[url] = self.get_entry(url, force=force)['digest']
+        return digests
+
+    def get_entry(self, url, force=False):
+        """
+        This function will return cache entry for url, fetching or
+        revalidating it when it is missing or expired
+        :param url: url of schema
+        :param force: revalidate entry even if it is still fresh
+        :return: dict with text, etag, digest and fetched_at keys
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+        if entry is None or not self.is_fresh(entry):
+            # another worker might have already revalidated it
+            disk_entry = self.read_entry(url)
+            if disk_entry is not None and (
+                    entry is None
+                    or disk_entry['fetched_at'] > entry['fetched_at']):
+                entry = disk_entry
+        if entry is not None and self.is_fresh(entry) and not force:
+            with self.lock:
+                self.entries[url] = entry
+            return entry
+        entry = self.fetch_entry(url, entry)
+        with self.lock:
+            self.entries[url] = entry
+        return entry
+
+    def is_fresh(self, entry):
+        """
+        This function will check whether entry could be used without
+        revalidation
+        :param entry: cache entry
+        :return: True if entry is fresh
+        """
+        return self.immutable or time.time() - entry['fetched_at'] < self.ttl
+
+    def fetch_entry(self, url, entry=None):
+        """
+        This function will fetch schema from url, using etag of cached entry
+        :param url: url of schema
+        :param entry: cached entry to revalidate
+        :return: new cache entry
+        """
+        headers = dict()
+        if entry is not None and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        try:
+            response = self.session.get(url, headers=headers, timeout=30)
+            if response.status_code == 304 and entry is not None:
+                entry = dict(entry, fetched_at=time.time())
+            else:
+                response.raise_for_status()
+                text = response.text
+                # fail before caching something that isn't json
+                json.loads(text)
+                entry = {
+                    'url': url,
+                    'text': text,
+                    'etag': response.headers.get('ETag'),
+                    'digest': hashlib.sha1(text.encode('utf-8')).hexdigest(),
+                    'fetched_at': time.time()
+                }
+        except (requests.RequestException, ValueError) as err:
+            if entry is None:
+                raise
+            logger.warning(f"Using cached copy of {url}, couldn't "
+                           f"revalidate it: {err}")
+            return entry
+        self.write_entry(url, entry)
+        return entry
+
+    def get_path(self, url):
+        """
+        This function will return path of file for url
+        :param url: url of schema
+        :return: path to file inside cache directory
+        """
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, self.version, f"{name}.json")
+
+    def read_entry(self, url):
+        """
+        This function will read entry from cache directory
+        :param url: url of schema
+        :return: cache entry or None if there is no entry for url
+        """
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.get_path(url)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        return entry
+
+    def write_entry(self, url, entry):
+        """
+        This function will atomically write entry to cache directory, so
+        other workers never read partially written file
+        :param url: url of schema
+        :param entry: cache entry to write
+        """
+        if self.cache_dir is None:
+            return
+        path = self.get_path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                            suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as err:
+            logger.warning(f"Couldn't write {url} to schema cache: {err}")
+
+
+schema_cache = SchemaCache(SCHEMA_CACHE_DIR or None, SCHEMA_CACHE_TTL,
+                           RULES_VERSION)
+
+
+def get_schema(url):
+    """
+    This function will return schema for url from shared cache
+    :param url: url of schema
+    :return: schema in JSON format
+    """
+    return schema_cache.get(url)
+
+
+def get_all_rules_urls():
+    """
+    This function will return urls of all rules used by conversion and
+    validation
+    :return: list of urls
+    """
+    urls = [SAMPLE_CORE_URL, EXPERIMENT_CORE_URL]
+    for url in list(ALLOWED_SHEET_NAMES.values()) + \
+            list(MODULE_RULES.values()):
+        if url not in urls:
+            urls.append(url)
+    return urls
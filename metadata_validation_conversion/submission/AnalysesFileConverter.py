@@ -1,11 +1,8 @@
-import requests
-
 from lxml import etree
 
 from .helpers import check_field_existence, get_header
 from .FileConverter import FileConverter
-
-import json
+from .submission_client import request
 
 
 class AnalysesFileConverter(FileConverter):
@@ -19,12 +16,18 @@ class AnalysesFileConverter(FileConverter):
         return analysis_xml, submission_xml, sample_xml
 
     def generate_sample_xml(self):
-        sample_set = etree.Element('SAMPLE_SET')
-        sample_xml = etree.ElementTree(sample_set)
-        print(json.dumps(self.json_to_convert))
+        return self.write_xml('sample', 'SAMPLE_SET',
+                              self.get_sample_elements())
+
+    def get_sample_elements(self):
+        """
+        This function will generate proxy samples for analyses
+        :return: generator of SAMPLE elements
+        """
         for record in self.json_to_convert['ena']:
             sample_descriptor = record['samples'][0]['value']
-            samples_response = requests.get(
+            samples_response = request(
+                'GET',
                 f"https://www.ebi.ac.uk/biosamples/samples/{sample_descriptor}",
                 headers=get_header()).json()
             alias = f"{samples_response['name']} analysis " \
@@ -32,7 +35,7 @@ class AnalysesFileConverter(FileConverter):
             self.proxy_samples_mappings[sample_descriptor] = alias
             title = f"{alias} submission"
             tax_id = str(samples_response['taxId'])
-            sample_elt = etree.SubElement(sample_set, 'SAMPLE', alias=alias)
+            sample_elt = etree.Element('SAMPLE', alias=alias)
             etree.SubElement(sample_elt, 'TITLE').text = title
             sample_name_elt = etree.SubElement(sample_elt, 'SAMPLE_NAME')
             etree.SubElement(sample_name_elt, 'TAXON_ID').text = tax_id
@@ -43,18 +46,22 @@ class AnalysesFileConverter(FileConverter):
             etree.SubElement(sample_attribute_elt, 'TAG').text = 'same as'
             etree.SubElement(sample_attribute_elt, 'VALUE').text = \
                 samples_response['accession']
-        sample_xml.write(f"{self.room_id}_sample.xml",
-                         pretty_print=True, xml_declaration=True,
-                         encoding='UTF-8')
-        return 'Success'
+            yield sample_elt
 
     def generate_analysis_xml(self):
         """
         This function will generate xml file with analyses
         :return: xml file for analyses
         """
-        analysis_set = etree.Element('ANALYSIS_SET')
-        analysis_xml = etree.ElementTree(analysis_set)
+        return self.write_xml('analysis', 'ANALYSIS_SET',
+                              self.get_analysis_elements())
+
+    def get_analysis_elements(self):
+        """
+        This function will generate analyses and remember data of analyses
+        that goes to submissions index
+        :return: generator of ANALYSIS elements
+        """
         number_of_records = len(self.json_to_convert['ena'])
         for record_number in range(number_of_records):
             title = check_field_existence(
@@ -87,8 +94,9 @@ class AnalysesFileConverter(FileConverter):
             faang_alias = self.json_to_convert['faang'][record_number][
                 'alias']['value']
             if faang_alias != alias:
-                return 'Error: Experiment alias is not consistent between ' \
-                       'ENA and FAANG tabs'
+                yield 'Error: Experiment alias is not consistent between ' \
+                      'ENA and FAANG tabs'
+                return
             project = self.json_to_convert['faang'][record_number]['project'][
                 'value']
             secondary_project = check_field_existence(
@@ -104,8 +112,7 @@ class AnalysesFileConverter(FileConverter):
                 'reference_genome',
                 self.json_to_convert['faang'][record_number])
 
-            analysis_elt = etree.SubElement(analysis_set, 'ANALYSIS',
-                                            alias=alias)
+            analysis_elt = etree.Element('ANALYSIS', alias=alias)
 
             if title is not None:
                 etree.SubElement(analysis_elt, 'TITLE').text = title['value']
@@ -213,7 +220,10 @@ class AnalysesFileConverter(FileConverter):
                                  'VALUE').text = analysis_date['value']
                 etree.SubElement(analysis_attribute_elt,
                                  'UNITS').text = analysis_date['units']
-        analysis_xml.write(f"{self.room_id}_analysis.xml",
-                           pretty_print=True, xml_declaration=True,
-                           encoding='UTF-8')
-        return 'Success'
+            self.ena_records[alias] = {
+                'study_id': study,
+                'assay_type': assay_type,
+                'secondary_project': secondary_project[-1]['value']
+                if secondary_project else ''
+            }
+            yield analysis_elt
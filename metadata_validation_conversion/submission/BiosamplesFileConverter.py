@@ -1,10 +1,9 @@
 import datetime
-import requests
+from metadata_validation_conversion.biosamples_client import fetch_samples
 from metadata_validation_conversion.constants import SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES, ADDITIONAL_INFO_MAPPING, \
      SUBMISSION_TEST_SERVER, SUBMISSION_PROD_SERVER
 from validation.helpers import get_record_name
 from submission.helpers import remove_underscores
-from .helpers import get_header
 
 
 class BiosamplesFileConverter:
@@ -13,6 +12,7 @@ class BiosamplesFileConverter:
         self.private_submission = private
         self.action = action
         self.submission_server = SUBMISSION_TEST_SERVER if mode == 'test' else SUBMISSION_PROD_SERVER
+        self.samples = dict()
 
     def start_conversion(self):
         data_to_send = list()
@@ -77,6 +77,7 @@ class BiosamplesFileConverter:
                         missing_ids[record_name] = record['derived_from']['value']
                     elif isinstance(record['derived_from'], list):
                         missing_ids[record_name] = record['derived_from'][0]['value']
+        self.prefetch_samples(missing_ids)
         for id_to_fetch in missing_ids:
             collection_date[id_to_fetch], geographic_location[id_to_fetch] = self.fetch_ena_required_information(
                 id_to_fetch, collection_date, geographic_location, missing_ids)
@@ -89,25 +90,13 @@ class BiosamplesFileConverter:
             # TODO: return error in taxon is not in biosamples
             # check that id is Biosample id
             if 'SAM' in id_to_fetch and '_' not in id_to_fetch:
-                try:
-                    results = requests.get(f"https://www.ebi.ac.uk/biosamples/samples/{id_to_fetch}").json()
-                    if ('collection date' in results['characteristics'] and
-                            'geographic location (country and/or sea)' in results['characteristics']):
-                        return (results['characteristics']['collection date'][0]['text'],
-                                results['characteristics']['geographic location (country and/or sea)'][0]['text'])
-                    else:
-                        return 'not collected', 'not collected'
-                except ValueError:
-                    pass
-                except KeyError:
-                    results = requests.get(f"https://www.ebi.ac.uk/biosamples/samples/{id_to_fetch}",
-                                           headers=get_header()).json()
-                    if ('collection date' in results['characteristics'] and
-                            'geographic location (country and/or sea)' in results['characteristics']):
-                        return (results['characteristics']['collection date'][0]['text'],
-                                results['characteristics']['geographic location (country and/or sea)'][0]['text'])
-                    else:
-                        return 'not collected', 'not collected'
+                results = self.get_sample(id_to_fetch)
+                if ('collection date' in results['characteristics'] and
+                        'geographic location (country and/or sea)' in results['characteristics']):
+                    return (results['characteristics']['collection date'][0]['text'],
+                            results['characteristics']['geographic location (country and/or sea)'][0]['text'])
+                else:
+                    return 'not collected', 'not collected'
             else:
                 return self.fetch_ena_required_information(missing_ids[id_to_fetch], collection_date,
                                                            geographic_location, missing_ids)
@@ -133,6 +122,7 @@ class BiosamplesFileConverter:
                         missing_ids[record_name] = record['derived_from']['value']
                     elif isinstance(record['derived_from'], list):
                         missing_ids[record_name] = record['derived_from'][0]['value']
+        self.prefetch_samples(missing_ids)
         for id_to_fetch in missing_ids:
             taxon_ids[id_to_fetch], taxons[id_to_fetch] = \
                 self.fetch_taxon_information(id_to_fetch, taxon_ids,
@@ -158,26 +148,39 @@ class BiosamplesFileConverter:
             # TODO: return error in taxon is not in biosamples
             # check that id is Biosample id
             if 'SAM' in id_to_fetch and '_' not in id_to_fetch:
-                try:
-                    results = requests.get(
-                        f"{SUBMISSION_PROD_SERVER}/biosamples/samples/"
-                        f"{id_to_fetch}").json()
-                    return results['taxId'], results['characteristics'][
-                        'organism'][0]['text']
-                except ValueError:
-                    pass
-                except KeyError:
-                    results = requests.get(
-                        f"https://www.ebi.ac.uk/biosamples/samples/"
-                        f"{id_to_fetch}", headers=get_header()).json()
-                    return results['taxId'], results['characteristics'][
-                        'organism'][0]['text']
+                results = self.get_sample(id_to_fetch)
+                return results['taxId'], results['characteristics'][
+                    'organism'][0]['text']
             else:
                 return self.fetch_taxon_information(missing_ids[id_to_fetch],
                                                     taxon_ids,
                                                     taxons,
                                                     missing_ids)
 
+    def prefetch_samples(self, missing_ids):
+        """
+        This function will fetch all BioSamples records referenced by
+        submission at once
+        :param missing_ids: dict with record names as keys and names of
+        records they are derived from as values
+        """
+        ids_to_fetch = [my_id for my_id in missing_ids.values()
+                        if 'SAM' in my_id and '_' not in my_id
+                        and my_id not in self.samples]
+        self.samples.update(fetch_samples(ids_to_fetch))
+
+    def get_sample(self, id_to_fetch):
+        """
+        This function will return BioSamples record
+        :param id_to_fetch: accession of record
+        :return: record
+        """
+        if id_to_fetch not in self.samples:
+            self.samples.update(fetch_samples([id_to_fetch]))
+        if id_to_fetch not in self.samples:
+            raise ValueError(f"Couldn't find {id_to_fetch} in BioSamples")
+        return self.samples[id_to_fetch]
+
     def get_additional_data(self, key):
         additional_data = list()
         for item in self.json_to_convert[key]:
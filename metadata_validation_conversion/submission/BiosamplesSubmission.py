@@ -1,19 +1,21 @@
 import copy
 from datetime import datetime
-import requests
 import json
-from requests.auth import HTTPBasicAuth
 
 from metadata_validation_conversion.constants import AAP_TEST_SERVER, \
     AAP_PROD_SERVER, SUBMISSION_TEST_SERVER, SUBMISSION_PROD_SERVER
+from .submission_client import request, get_aap_token, \
+    get_auth_header
 
 
 class BioSamplesSubmission:
-    def __init__(self, username, password, json_to_submit, mode, domain=None):
+    def __init__(self, username, password, json_to_submit, mode, domain=None,
+                 journal=None):
         self.username = username
         self.password = password
         self.json_to_submit = json_to_submit
         self.domain_name = domain
+        self.journal = journal
         if mode == 'test':
             self.aap_server = AAP_TEST_SERVER
             self.submission_server = SUBMISSION_TEST_SERVER
@@ -23,34 +25,27 @@ class BioSamplesSubmission:
 
     def get_token(self):
         """
-        This function will return token to be used upon every request to server
+        This function will return token to be used upon every request to
+        server, token is reused until it is about to expire
         :return: token as a string object
         """
-        response = requests.get(
-            f"{self.aap_server}/auth",
-            auth=HTTPBasicAuth(self.username, self.password))
-        return response.text
+        return get_aap_token(self.aap_server, self.username,
+                             self.password)
 
     def get_header(self):
         """
         This function will return header required for every request to server
         :return: header as dict
         """
-        token = self.get_token()
-        headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'application/hal+json',
-            'Authorization': f'Bearer {token}'
-        }
-        return headers
+        return get_auth_header(self.get_token())
 
     def get_user_reference(self):
         """
         This function will get user reference from BioSamples
         :return: user reference as a string
         """
-        get_user_response = requests.get(
-            f"{self.aap_server}/users/{self.username}",
+        get_user_response = request(
+            'GET', f"{self.aap_server}/users/{self.username}",
             headers=self.get_header())
         if get_user_response.status_code != 200:
             return f"Error: {get_user_response.json()['message']}"
@@ -61,8 +56,9 @@ class BioSamplesSubmission:
         This function will get domain reference from BioSamples
         :return: domain reference as a string
         """
-        get_domain_response = requests.get(f"{self.aap_server}/my/management",
-                                           headers=self.get_header())
+        get_domain_response = request(
+            'GET', f"{self.aap_server}/my/management",
+            headers=self.get_header())
         if get_domain_response.status_code != 200:
             return f"Error: {get_domain_response.json()['message']}"
         return get_domain_response.json()['domainReference']
@@ -79,9 +75,9 @@ class BioSamplesSubmission:
             'domainDesc': description
         }
         domain_data = json.dumps(domain_data)
-        create_domain_response = requests.post(f"{self.aap_server}/domains",
-                                               headers=self.get_header(),
-                                               data=domain_data)
+        create_domain_response = request(
+            'POST', f"{self.aap_server}/domains", headers=self.get_header(),
+            data=domain_data)
         if create_domain_response.status_code != 201:
             return f"Error: {create_domain_response.json()['message']}"
         # Adding user to created domain
@@ -97,7 +93,8 @@ class BioSamplesSubmission:
         user_reference = self.get_user_reference()
         if 'Error' in user_reference:
             return user_reference
-        add_user_to_domain_response = requests.put(
+        add_user_to_domain_response = request(
+            'PUT',
             f"{self.aap_server}/domains/{domain_reference}/{user_reference}/"
             f"user", headers=self.get_header())
         if add_user_to_domain_response.status_code != 200:
@@ -111,8 +108,8 @@ class BioSamplesSubmission:
         :return: list of domain names
         """
         domains = list()
-        choose_domain_response = requests.get(
-            f"{self.aap_server}/my/domains", headers=self.get_header())
+        choose_domain_response = request(
+            'GET', f"{self.aap_server}/my/domains", headers=self.get_header())
         if choose_domain_response.status_code != 200:
             return f"Error: {choose_domain_response.json()['message']}"
         for domain in choose_domain_response.json():
@@ -121,8 +118,8 @@ class BioSamplesSubmission:
 
 
     def fetch_biosample_data(self, id):
-        response = requests.get(f"{self.submission_server}/biosamples"
-                                f"/samples/{id}").json()
+        response = request('GET', f"{self.submission_server}/biosamples"
+                                  f"/samples/{id}").json()
         return response
 
 
@@ -183,8 +180,8 @@ class BioSamplesSubmission:
                 updated_biosample_entry['relationships'] = tmp['relationships']
                 updated_json = json.dumps(updated_biosample_entry)
 
-                update_submission_response = requests.put(
-                    f"{self.submission_server}/biosamples/samples/{accession}",
+                update_submission_response = request(
+                    'PUT', f"{self.submission_server}/biosamples/samples/{accession}",
                     headers=self.get_header(),
                     data=updated_json)
 
@@ -203,9 +200,13 @@ class BioSamplesSubmission:
     def submit_records(self):
         if self.domain_name is None:
             return 'Error: domain name was not specified'
-        biosamples_ids = dict()
+        # samples created before submission stopped already have accessions
+        biosamples_ids = dict() if self.journal is None else \
+            dict(self.journal.accessions)
         # create a copy as we need to delete relationships part from dict
         for item in self.json_to_submit:
+            if item['name'] in biosamples_ids:
+                continue
             tmp = dict()
             for key, value in item.items():
                 if key != 'relationships':
@@ -213,8 +214,8 @@ class BioSamplesSubmission:
             tmp['domain'] = self.domain_name
             name = tmp['name']
             tmp = json.dumps(tmp)
-            create_submission_response = requests.post(
-                f"{self.submission_server}/biosamples/samples",
+            create_submission_response = request(
+                'POST', f"{self.submission_server}/biosamples/samples",
                 headers=self.get_header(),
                 data=tmp)
             if create_submission_response.status_code != 201:
@@ -222,11 +223,16 @@ class BioSamplesSubmission:
                        'please contact faang-dcc@ebi.ac.uk'
             biosamples_ids[name] = create_submission_response.json()[
                 'accession']
+            if self.journal is not None:
+                self.journal.add_sample(name, biosamples_ids[name])
 
         # update relationship part of records
         for item in self.json_to_submit:
             if ('relationships' in item and len(item['relationships']) > 0
-                    and item['relationships'][0]['target'] != 'restricted access'):
+                    and item['relationships'][0]['target'] != 'restricted access'
+                    and (self.journal is None
+                         or item['name'] not in self.journal.updated)):
+                name = item['name']
                 for relationship in item['relationships']:
                     if relationship['source'] in biosamples_ids:
                         relationship['source'] = biosamples_ids[
@@ -238,11 +244,14 @@ class BioSamplesSubmission:
                 item['accession'] = id
                 item['domain'] = self.domain_name
                 item = json.dumps(item)
-                create_submission_response = requests.put(
-                    f"{self.submission_server}/biosamples/samples/{id}",
+                create_submission_response = request(
+                    'PUT', f"{self.submission_server}/biosamples/samples/{id}",
                     headers=self.get_header(),
                     data=item)
                 if create_submission_response.status_code != 200:
                     return 'Error: relationship part was not updated, ' \
                            'please contact faang-dcc@ebi.ac.uk'
-        return biosamples_ids
+                if self.journal is not None:
+                    self.journal.add_relationships(name)
+        return {item['name']: biosamples_ids[item['name']]
+                for item in self.json_to_submit}
@@ -1,14 +1,20 @@
 import datetime
-import requests
 import xlrd
 
 from lxml import etree
 
-from .helpers import check_field_existence, remove_underscores, get_header
+from metadata_validation_conversion.biosamples_client import fetch_samples
+from .helpers import check_field_existence, remove_underscores
 from .FileConverter import FileConverter
 
 
 class ExperimentFileConverter(FileConverter):
+    def __init__(self, json_to_convert, room_id, private=False,
+                 action="submission"):
+        super().__init__(json_to_convert, room_id, private, action)
+        # experiment alias -> FAANG experiment record
+        self.faang_experiments = None
+
     def start_conversion(self):
         if self.private_submission:
             sample_xml = self.generate_sample_xml()
@@ -23,19 +29,30 @@ class ExperimentFileConverter(FileConverter):
     def generate_sample_xml(self):
         if 'experiment_ena' not in self.json_to_convert:
             return 'Error: table should have experiment_ena sheet'
-        sample_set = etree.Element('SAMPLE_SET')
-        sample_xml = etree.ElementTree(sample_set)
+        return self.write_xml('sample', 'SAMPLE_SET',
+                              self.get_sample_elements())
+
+    def get_sample_elements(self):
+        """
+        This function will generate proxy samples for experiments
+        :return: generator of SAMPLE elements
+        """
+        samples = fetch_samples(
+            [record['sample_descriptor']
+             for record in self.json_to_convert['experiment_ena']])
         for record in self.json_to_convert['experiment_ena']:
             sample_descriptor = record['sample_descriptor']
-            samples_response = requests.get(
-                f"https://www.ebi.ac.uk/biosamples/samples/{sample_descriptor}",
-                headers=get_header()).json()
+            if sample_descriptor not in samples:
+                yield f"Error: couldn't find {sample_descriptor} in " \
+                      f"BioSamples"
+                return
+            samples_response = samples[sample_descriptor]
             alias = f"{samples_response['name']} experiment " \
                     f"{record['experiment_alias']} proxy sample"
             self.proxy_samples_mappings[sample_descriptor] = alias
             title = f"{alias} submission"
             tax_id = str(samples_response['taxId'])
-            sample_elt = etree.SubElement(sample_set, 'SAMPLE', alias=alias)
+            sample_elt = etree.Element('SAMPLE', alias=alias)
             etree.SubElement(sample_elt, 'TITLE').text = title
             sample_name_elt = etree.SubElement(sample_elt, 'SAMPLE_NAME')
             etree.SubElement(sample_name_elt, 'TAXON_ID').text = tax_id
@@ -51,10 +68,7 @@ class ExperimentFileConverter(FileConverter):
             sample_attribute_elt = etree.SubElement(sample_attributes_elt, 'SAMPLE_ATTRIBUTE')
             etree.SubElement(sample_attribute_elt, 'TAG').text = 'collection date'
             etree.SubElement(sample_attribute_elt, 'VALUE').text = "not collected"
-        sample_xml.write(f"{self.room_id}_sample.xml",
-                         pretty_print=True, xml_declaration=True,
-                         encoding='UTF-8')
-        return 'Success'
+            yield sample_elt
 
     def generate_experiment_xml(self):
         """
@@ -63,8 +77,15 @@ class ExperimentFileConverter(FileConverter):
         """
         if 'experiment_ena' not in self.json_to_convert:
             return 'Error: table should have experiment_ena sheet'
-        experiment_set = etree.Element('EXPERIMENT_SET')
-        experiment_xml = etree.ElementTree(experiment_set)
+        return self.write_xml('experiment', 'EXPERIMENT_SET',
+                              self.get_experiment_elements())
+
+    def get_experiment_elements(self):
+        """
+        This function will generate experiments and remember data of
+        experiments that goes to submissions index
+        :return: generator of EXPERIMENT elements
+        """
         for record in self.json_to_convert['experiment_ena']:
             alias = record['experiment_alias']
             title = check_field_existence('title', record)
@@ -85,8 +106,7 @@ class ExperimentFileConverter(FileConverter):
                 'library_construction_protocol', record)
             platform = record['platform']
             instrument_model = check_field_existence('instrument_model', record)
-            experiment_elt = etree.SubElement(experiment_set, 'EXPERIMENT',
-                                              alias=alias)
+            experiment_elt = etree.Element('EXPERIMENT', alias=alias)
             if title is not None:
                 etree.SubElement(experiment_elt, 'TITLE').text = title
             etree.SubElement(experiment_elt, 'STUDY_REF', refname=study_ref)
@@ -126,7 +146,8 @@ class ExperimentFileConverter(FileConverter):
                 experiment_elt, 'EXPERIMENT_ATTRIBUTES')
             faang_experiment = self.find_faang_experiment(alias)
             if not faang_experiment:
-                return f"Error: {alias} experiment doesn't have FAANG data"
+                yield f"Error: {alias} experiment doesn't have FAANG data"
+                return
             self.parse_faang_experiment(faang_experiment['experiments_core'],
                                         experiment_attributes_elt)
             if 'dna-binding_proteins' in faang_experiment:
@@ -138,10 +159,31 @@ class ExperimentFileConverter(FileConverter):
                                             experiment_attributes_elt)
             self.parse_faang_experiment(faang_experiment,
                                         experiment_attributes_elt)
-        experiment_xml.write(f"{self.room_id}_experiment.xml",
-                             pretty_print=True, xml_declaration=True,
-                             encoding='UTF-8')
-        return 'Success'
+            self.ena_records[alias] = self.get_ena_record(
+                study_ref, experiment_attributes_elt)
+            yield experiment_elt
+
+    @staticmethod
+    def get_ena_record(study_ref, experiment_attributes_elt):
+        """
+        This function will return data of experiment that goes to
+        submissions index
+        :param study_ref: alias of study of experiment
+        :param experiment_attributes_elt: EXPERIMENT_ATTRIBUTES element
+        :return: dict with study alias, assay types and secondary projects
+        """
+        ena_record = {'study_ref': study_ref, 'assay_type': list(),
+                      'secondary_project': list()}
+        for attribute in experiment_attributes_elt.findall(
+                'EXPERIMENT_ATTRIBUTE'):
+            tag = attribute.findall('TAG')[0].text
+            if tag == 'assay type':
+                ena_record['assay_type'].append(
+                    attribute.findall('VALUE')[0].text)
+            elif tag == 'secondary project':
+                ena_record['secondary_project'].append(
+                    attribute.findall('VALUE')[0].text)
+        return ena_record
 
     def find_faang_experiment(self, sample_descriptor):
         """
@@ -149,13 +191,18 @@ class ExperimentFileConverter(FileConverter):
         :param sample_descriptor: id to search for
         :return: faang experiment record
         """
-        for exp_type, exp_value in self.json_to_convert.items():
-            if exp_type not in ['submission', 'study', 'run',
-                                'experiment_ena']:
-                for record in exp_value:
-                    record_id = record['custom']['experiment_alias']['value']
-                    if sample_descriptor == record_id:
-                        return record
+        # records are indexed once, so big submissions aren't searched for
+        # every experiment
+        if self.faang_experiments is None:
+            self.faang_experiments = dict()
+            for exp_type, exp_value in self.json_to_convert.items():
+                if exp_type not in ['submission', 'study', 'run',
+                                    'experiment_ena']:
+                    for record in exp_value:
+                        record_id = record['custom']['experiment_alias'][
+                            'value']
+                        self.faang_experiments.setdefault(record_id, record)
+        return self.faang_experiments.get(sample_descriptor)
 
     @staticmethod
     def parse_faang_experiment(faang_experiment, experiment_attributes_elt):
@@ -199,8 +246,13 @@ class ExperimentFileConverter(FileConverter):
         """
         if 'run' not in self.json_to_convert:
             return 'Error: table should have run sheet'
-        run_set = etree.Element('RUN_SET')
-        run_xml = etree.ElementTree(run_set)
+        return self.write_xml('run', 'RUN_SET', self.get_run_elements())
+
+    def get_run_elements(self):
+        """
+        This function will generate runs
+        :return: generator of RUN elements
+        """
         for record in self.json_to_convert['run']:
             run_alias = record['alias']
             run_center = record['run_center']
@@ -236,12 +288,12 @@ class ExperimentFileConverter(FileConverter):
                 checksum_method_pair = record['checksum_method_pair']
                 checksum_pair = record['checksum_pair']
             if run_date:
-                run_elt = etree.SubElement(
-                    run_set, 'RUN', alias=run_alias, run_center=run_center,
+                run_elt = etree.Element(
+                    'RUN', alias=run_alias, run_center=run_center,
                     run_date=run_date)
             else:
-                run_elt = etree.SubElement(
-                    run_set, 'RUN', alias=run_alias, run_center=run_center)
+                run_elt = etree.Element(
+                    'RUN', alias=run_alias, run_center=run_center)
             etree.SubElement(run_elt, 'EXPERIMENT_REF', refname=experiment_ref)
             data_block_elt = etree.SubElement(run_elt, 'DATA_BLOCK')
             files_elt = etree.SubElement(data_block_elt, 'FILES')
@@ -253,9 +305,7 @@ class ExperimentFileConverter(FileConverter):
                                  filetype=filetype_pair,
                                  checksum_method=checksum_method_pair,
                                  checksum=checksum_pair)
-        run_xml.write(f"{self.room_id}_run.xml", pretty_print=True,
-                      xml_declaration=True, encoding='UTF-8')
-        return 'Success'
+            yield run_elt
 
     def generate_study_xml(self):
         """
@@ -264,15 +314,20 @@ class ExperimentFileConverter(FileConverter):
         """
         if 'study' not in self.json_to_convert:
             return 'Error: table should have study sheet'
-        study_set = etree.Element('STUDY_SET')
-        study_xml = etree.ElementTree(study_set)
+        return self.write_xml('study', 'STUDY_SET', self.get_study_elements())
+
+    def get_study_elements(self):
+        """
+        This function will generate studies
+        :return: generator of STUDY elements
+        """
         for record in self.json_to_convert['study']:
             study_alias = record['study_alias']
             study_title = record['study_title']
             study_type = record['study_type']
             study_abstract = record['study_abstract'] \
                 if 'study_abstract' in record else None
-            study_elt = etree.SubElement(study_set, 'STUDY', alias=study_alias)
+            study_elt = etree.Element('STUDY', alias=study_alias)
             descriptor_elt = etree.SubElement(study_elt, 'DESCRIPTOR')
             etree.SubElement(descriptor_elt, 'STUDY_TITLE').text = study_title
             etree.SubElement(descriptor_elt, 'STUDY_TYPE',
@@ -280,6 +335,4 @@ class ExperimentFileConverter(FileConverter):
             if study_abstract is not None:
                 etree.SubElement(descriptor_elt,
                                  'STUDY_ABSTRACT').text = study_abstract
-        study_xml.write(f"{self.room_id}_study.xml", pretty_print=True,
-                        xml_declaration=True, encoding='UTF-8')
-        return 'Success'
+            yield study_elt
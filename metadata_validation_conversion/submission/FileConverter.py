@@ -1,4 +1,5 @@
 import datetime
+import os
 
 from lxml import etree
 
@@ -10,6 +11,9 @@ class FileConverter:
         self.private_submission = private
         self.proxy_samples_mappings = dict()
         self.action = action
+        # aliases of experiments or analyses -> study, assay type and
+        # secondary projects, they go to submissions index after submission
+        self.ena_records = dict()
 
     def generate_submission_xml(self):
         """
@@ -18,13 +22,17 @@ class FileConverter:
         """
         if 'submission' not in self.json_to_convert:
             return 'Error: table should have submission sheet'
-        submission_set = etree.Element('SUBMISSION_SET')
-        submission_xml = etree.ElementTree(submission_set)
-        filename = f"{self.room_id}_submission.xml"
+        return self.write_xml('submission', 'SUBMISSION_SET',
+                              self.get_submission_elements())
+
+    def get_submission_elements(self):
+        """
+        This function will generate submission elements
+        :return: generator of SUBMISSION elements
+        """
         for record in self.json_to_convert['submission']:
-            submission_elt = etree.SubElement(submission_set,
-                                              'SUBMISSION',
-                                              alias=record['alias'])
+            submission_elt = etree.Element('SUBMISSION',
+                                           alias=record['alias'])
             actions_elt = etree.SubElement(submission_elt, 'ACTIONS')
             action_elt = etree.SubElement(actions_elt, 'ACTION')
 
@@ -43,7 +51,37 @@ class FileConverter:
                     # Release immediately in case of public submission
                     action_elt = etree.SubElement(actions_elt, 'ACTION')
                     etree.SubElement(action_elt, 'RELEASE')
+            yield submission_elt
 
-        submission_xml.write(filename, pretty_print=True,
-                             xml_declaration=True, encoding='UTF-8')
+    def write_xml(self, xml_type, set_name, elements):
+        """
+        This function will write elements to xml file as soon as they are
+        generated, so only one record is kept in memory, file is only
+        created if all records were converted
+        :param xml_type: type of xml file, e.g. 'run'
+        :param set_name: name of root element, e.g. 'RUN_SET'
+        :param elements: generator of elements, it yields error message if
+        record couldn't be converted
+        :return: 'Success' or error message
+        """
+        filename = f"{self.room_id}_{xml_type}.xml"
+        tmp_filename = f"{filename}.tmp"
+        error = None
+        try:
+            with etree.xmlfile(tmp_filename, encoding='UTF-8') as xml_file:
+                xml_file.write_declaration()
+                with xml_file.element(set_name):
+                    xml_file.write('\n')
+                    for element in elements:
+                        if isinstance(element, str):
+                            error = element
+                            break
+                        xml_file.write(element, pretty_print=True)
+        except BaseException:
+            os.remove(tmp_filename)
+            raise
+        if error is not None:
+            os.remove(tmp_filename)
+            return error
+        os.replace(tmp_filename, filename)
         return 'Success'
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from metadata_validation_conversion.constants import SUBMISSION_JOURNAL_DIR
+
+# fields of records that are set again every time records are prepared
+PER_RUN_FIELDS = ['release']
+
+
+class SubmissionJournal:
+    """
+    Progress of BioSamples submission written to SUBMISSION_JOURNAL_DIR
+    record by record, failed or interrupted submission of the same records
+    by the same user continues from the place it stopped and doesn't create
+    samples that already have accessions
+    """
+    def __init__(self, key):
+        """
+        :param key: key of submission returned by get_key
+        """
+        self.key = key
+        self.path = os.path.join(SUBMISSION_JOURNAL_DIR, f"{key}.jsonl")
+        self.lock = threading.Lock()
+        self.room_id = None
+        self.records = 0
+        self.status = None
+        self.error = None
+        self.last_event_time = None
+        # names of records -> accessions of created samples
+        self.accessions = dict()
+        # names of records with updated relationships
+        self.updated = set()
+        self.replay()
+
+    @classmethod
+    def start(cls, room_id, records, username, mode):
+        """
+        This function will open journal of submission and write that it was
+        started in this room, journal of finished submission is moved aside,
+        so submission of the same records again starts from the beginning
+        :param room_id: room id to send messages to
+        :param records: records to submit
+        :param username: name of the user
+        :param mode: 'test' or 'prod'
+        :return: SubmissionJournal object
+        """
+        os.makedirs(os.path.join(SUBMISSION_JOURNAL_DIR, 'rooms'),
+                    exist_ok=True)
+        key = cls.get_key(records, username, mode)
+        journal = cls(key)
+        if journal.status == 'finished':
+            os.replace(journal.path, os.path.join(
+                SUBMISSION_JOURNAL_DIR,
+                f"{key}.{int(journal.last_event_time)}.jsonl"))
+            journal = cls(key)
+        journal.write({'event': 'start', 'room_id': room_id,
+                       'records': len(records)})
+        write_file(get_room_path(room_id), journal.key)
+        return journal
+
+    @classmethod
+    def get_room_journal(cls, room_id):
+        """
+        This function will return journal of the last submission started in
+        room
+        :param room_id: room id
+        :return: SubmissionJournal object or None if there is no submission
+        """
+        try:
+            with open(get_room_path(room_id)) as f:
+                key = f.read()
+        except FileNotFoundError:
+            return None
+        return cls(key)
+
+    @staticmethod
+    def get_key(records, username, mode):
+        """
+        This function will return key of submission, fields set at
+        preparation of records aren't part of it, so records prepared again
+        for the same template have the same key
+        :param records: records to submit
+        :param username: name of the user
+        :param mode: 'test' or 'prod'
+        :return: hex digest of user, mode and records
+        """
+        records = [{field: value for field, value in record.items()
+                    if field not in PER_RUN_FIELDS} for record in records]
+        data = json.dumps([username, mode, records], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def replay(self):
+        """
+        This function will read state of submission from journal
+        """
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # last line could be cut if worker was killed
+                        continue
+                    self.apply(event)
+        except FileNotFoundError:
+            pass
+
+    def apply(self, event):
+        """
+        This function will update state of submission with event
+        :param event: event from journal
+        """
+        self.last_event_time = event['time']
+        if event['event'] == 'start':
+            self.room_id = event['room_id']
+            self.records = event['records']
+            self.status = 'in progress'
+            self.error = None
+        elif event['event'] == 'created':
+            self.accessions[event['name']] = event['accession']
+        elif event['event'] == 'updated':
+            self.updated.add(event['name'])
+        elif event['event'] == 'failed':
+            self.status = 'failed'
+            self.error = event['error']
+        elif event['event'] == 'finished':
+            self.status = 'finished'
+
+    def write(self, event):
+        """
+        This function will append event to journal, it is on disk before
+        function returns
+        :param event: dict with name of event and its data
+        """
+        event['time'] = time.time()
+        line = json.dumps(event) + '\n'
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.apply(event)
+
+    def add_sample(self, name, accession):
+        """
+        This function will write that sample was created
+        :param name: name of the record
+        :param accession: accession of created sample
+        """
+        self.write({'event': 'created', 'name': name, 'accession': accession})
+
+    def add_relationships(self, name):
+        """
+        This function will write that relationships of record were updated
+        :param name: name of the record
+        """
+        self.write({'event': 'updated', 'name': name})
+
+    def fail(self, error):
+        """
+        This function will write that submission stopped because of error
+        :param error: error message
+        """
+        self.write({'event': 'failed', 'error': error})
+
+    def finish(self):
+        """
+        This function will write that all records were submitted
+        """
+        self.write({'event': 'finished'})
+
+    def get_state(self):
+        """
+        This function will return state of submission that goes to front-end
+        :return: dict with status, numbers of records and accessions of
+        created samples
+        """
+        return {
+            'room_id': self.room_id,
+            'status': self.status,
+            'error': self.error,
+            'records': self.records,
+            'created': len(self.accessions),
+            'updated': len(self.updated),
+            'last_event_time': self.last_event_time,
+            'biosamples_ids': self.accessions
+        }
+
+
+def get_room_path(room_id):
+    """
+    This function will return path of file with key of the last submission
+    of room, room ids come from urls, so they aren't used as file names
+    :param room_id: room id
+    :return: path as a string
+    """
+    name = hashlib.sha256(room_id.encode('utf-8')).hexdigest()
+    return os.path.join(SUBMISSION_JOURNAL_DIR, 'rooms', name)
+
+
+def write_file(path, content):
+    """
+    This function will replace content of file, readers never see half
+    written file
+    :param path: path of the file
+    :param content: new content as a string
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
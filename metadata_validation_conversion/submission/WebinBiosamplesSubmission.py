@@ -1,114 +1,150 @@
 import copy
 from datetime import datetime
-import requests
 import json
 
 from metadata_validation_conversion.constants import WEBIN_TEST_SERVER, WEBIN_PROD_SERVER, SUBMISSION_TEST_SERVER, SUBMISSION_PROD_SERVER
+from .submission_client import request, get_webin_token, \
+    get_auth_header
+from .submission_pool import SubmissionPool, DEPENDENCY_TYPES, is_error, \
+    get_dependency_levels
 
 
 class WebinBioSamplesSubmission:
-    def __init__(self, username, password, json_to_submit, mode):
+    def __init__(self, username, password, json_to_submit, mode,
+                 journal=None):
         self.username = username
         self.password = password
         self.json_to_submit = json_to_submit
+        self.journal = journal
         if mode == 'test':
             self.webin_server = WEBIN_TEST_SERVER
             self.submission_server = SUBMISSION_TEST_SERVER
         elif mode == 'prod':
             self.webin_server = WEBIN_PROD_SERVER
             self.submission_server = SUBMISSION_PROD_SERVER
+        self.pool = SubmissionPool()
 
     def get_token(self):
         """
-        This function will return token to be used upon every request to server
+        This function will return token to be used upon every request to
+        server, token is reused until it is about to expire
         :return: token as a string object
         """
-        url = f"{self.webin_server}/token?ttl=5"
-
-        headers = {
-            'accept': '*/*',
-            'Content-Type': 'application/json'
-        }
-
-        data = {
-            "authRealms": [
-                "ENA"
-            ],
-            "password": self.password,
-            "username": self.username
-        }
-
-        response = requests.post(url, headers=headers, json=data)
-
-        return response.text
+        return get_webin_token(self.webin_server, self.username,
+                               self.password)
 
     def get_header(self):
         """
         This function will return header required for every request to server
         :return: header as dict
         """
-        token = self.get_token()
-        headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'application/hal+json',
-            'Authorization': f'Bearer {token}'
-        }
-        return headers
+        return get_auth_header(self.get_token())
 
     def submit_records(self):
-        biosamples_ids = dict()
+        """
+        This function will create samples concurrently and then update their
+        relationships, samples are updated after samples they are child of or
+        derived from
+        :return: dict with names of records as keys and accessions as values
+        or error message
+        """
+        # samples created before submission stopped already have accessions
+        created = dict() if self.journal is None else \
+            dict(self.journal.accessions)
         # create a copy as we need to delete relationships part from dict
+        samples = list()
         for item in self.json_to_submit:
             tmp = dict()
             for key, value in item.items():
                 if key != 'relationships':
                     tmp[key] = value
-            name = tmp['name']
-            tmp = json.dumps(tmp)
-            create_submission_response = requests.post(
-                f"{self.submission_server}/biosamples/samples",
-                headers=self.get_header(),
-                data=tmp)
-            if create_submission_response.status_code != 201:
-                return 'Error: record was not submitted to BioSamples, ' \
-                       'please contact faang-dcc@ebi.ac.uk'
-            biosamples_ids[name] = create_submission_response.json()[
-                'accession']
+            if tmp['name'] not in created:
+                samples.append(tmp)
+        accessions = self.pool.run(self.create_sample, samples)
+        if is_error(accessions):
+            return accessions
+        for sample, accession in zip(samples, accessions):
+            created[sample['name']] = accession
+        biosamples_ids = dict()
+        for item in self.json_to_submit:
+            biosamples_ids[item['name']] = created[item['name']]
 
         # update relationship part of records
+        items = list()
         for item in self.json_to_submit:
             if ('relationships' in item and len(item['relationships']) > 0
-                    and item['relationships'][0]['target'] != 'restricted access'):
-                for relationship in item['relationships']:
-                    if relationship['source'] in biosamples_ids:
-                        relationship['source'] = biosamples_ids[
-                            relationship['source']]
-                    if relationship['target'] in biosamples_ids:
-                        relationship['target'] = biosamples_ids[
-                            relationship['target']]
-                id = biosamples_ids[item['name']]
-                item['accession'] = id
-                item = json.dumps(item)
-                create_submission_response = requests.put(
-                    f"{self.submission_server}/biosamples/samples/{id}",
-                    headers=self.get_header(),
-                    data=item)
-                if create_submission_response.status_code != 200:
-                    return 'Error: relationship part was not updated, ' \
-                           'please contact faang-dcc@ebi.ac.uk'
+                    and item['relationships'][0]['target'] != 'restricted access'
+                    and (self.journal is None
+                         or item['name'] not in self.journal.updated)):
+                items.append(item)
+        dependencies = [[relationship['target']
+                         for relationship in item['relationships']
+                         if relationship['type'] in DEPENDENCY_TYPES]
+                        for item in items]
+        for level in get_dependency_levels([item['name'] for item in items],
+                                           dependencies):
+            results = self.pool.run(
+                lambda item: self.update_relationships(item, biosamples_ids),
+                [items[index] for index in level])
+            if is_error(results):
+                return results
         return biosamples_ids
 
+    def create_sample(self, sample):
+        """
+        This function will create sample without relationships
+        :param sample: sample to create
+        :return: accession of created sample or error message
+        """
+        response = self.pool.send(
+            'POST', f"{self.submission_server}/biosamples/samples",
+            self.get_header, json.dumps(sample))
+        if response is None or response.status_code != 201:
+            return 'Error: record was not submitted to BioSamples, ' \
+                   'please contact faang-dcc@ebi.ac.uk'
+        accession = response.json()['accession']
+        if self.journal is not None:
+            self.journal.add_sample(sample['name'], accession)
+        return accession
+
+    def update_relationships(self, item, biosamples_ids):
+        """
+        This function will replace names in relationships of record with
+        accessions and update record
+        :param item: record to update
+        :param biosamples_ids: dict with names of records as keys and
+        accessions as values
+        :return: accession of record or error message
+        """
+        for relationship in item['relationships']:
+            if relationship['source'] in biosamples_ids:
+                relationship['source'] = biosamples_ids[
+                    relationship['source']]
+            if relationship['target'] in biosamples_ids:
+                relationship['target'] = biosamples_ids[
+                    relationship['target']]
+        id = biosamples_ids[item['name']]
+        item['accession'] = id
+        response = self.pool.send(
+            'PUT', f"{self.submission_server}/biosamples/samples/{id}",
+            self.get_header, json.dumps(item))
+        if response is None or response.status_code != 200:
+            return 'Error: relationship part was not updated, ' \
+                   'please contact faang-dcc@ebi.ac.uk'
+        if self.journal is not None:
+            self.journal.add_relationships(item['name'])
+        return id
+
     def fetch_biosample_data(self, id):
-        response = requests.get(f"{self.submission_server}/biosamples"
-                                f"/samples/{id}").json()
+        response = request('GET', f"{self.submission_server}/biosamples"
+                                  f"/samples/{id}").json()
         return response
 
     def update_records(self):
         if self.domain_name is None:
             return 'Error: domain name was not specified'
 
-        updated_biosamples_ids = dict()
-
+        records = list()
         for item in self.json_to_submit:
             tmp = dict()
             for key, value in item.items():
@@ -120,56 +156,90 @@ class WebinBioSamplesSubmission:
 
             tmp['domain'] = self.domain_name
             tmp['update'] = str(datetime.now().isoformat())
-            accession = tmp['accession']
-
-            # fetch the existing entry from the database
-            existing_biosample_entry = self.fetch_biosample_data(accession)
-
-            if existing_biosample_entry:
-                """
-                In BioSamples, updating a sample overwrites its existing content with the new one. 
-                To preserve existing attributes, first download the sample, 
-                build a new version including existing and new attributes, and resubmit the new content.
-                """
-                updated_biosample_entry = copy.deepcopy(existing_biosample_entry)
-                tmp['characteristics']['sample name'] = existing_biosample_entry['characteristics']['sample name']
-
-                if 'derived from' in tmp['characteristics']:
-                    # replace with sample name it is derived from
-                    derived_from_biosampleid = tmp['characteristics']['derived from']
-                    derived_from_name = list()
-
-                    for id in derived_from_biosampleid:
-                        if id['text'] in updated_biosamples_ids:
-                            derived_from_name.append({'text': updated_biosamples_ids[id['text']]})
-                        else:
-                            derivedfrom_biosample_entry = self.fetch_biosample_data(id['text'])
-                            if derivedfrom_biosample_entry:
-                                derived_from_name.append({'text': derivedfrom_biosample_entry['name']})
-                            else:
-                                return f"Error: derived_from BioSample Id ({id['text']}) is incorrect , " \
-                                       "please contact faang-dcc@ebi.ac.uk"
-
-                    tmp['characteristics']['derived from'] = derived_from_name
-
-                updated_biosample_entry['characteristics'] = tmp['characteristics']
-                updated_biosample_entry['organization'] = tmp['organization']
-                updated_biosample_entry['contact'] = tmp['contact']
-                updated_biosample_entry['update'] = tmp['update']
-                updated_biosample_entry['relationships'] = tmp['relationships']
-                updated_json = json.dumps(updated_biosample_entry)
-
-                update_submission_response = requests.put(
-                    f"{self.submission_server}/biosamples/samples/{accession}",
-                    headers=self.get_header(),
-                    data=updated_json)
-
-                if update_submission_response.status_code != 200:
-                    return 'Error: relationship part was not updated, ' \
-                           'please contact faang-dcc@ebi.ac.uk'
-
-                updated_biosamples_ids[accession] = update_submission_response.json()[
-                    'name']
-
-        reverted_updated_biosamples_ids = dict((v, k) for k, v in updated_biosamples_ids.items())
+            records.append(tmp)
+
+        # records are updated after records they are derived from, so names
+        # of these records are already known
+        dependencies = [[id['text'] for id in
+                         tmp['characteristics'].get('derived from', list())]
+                        for tmp in records]
+        names = [None] * len(records)
+        updated_biosamples_ids = dict()
+        for level in get_dependency_levels(
+                [tmp['accession'] for tmp in records], dependencies):
+            results = self.pool.run(
+                lambda tmp: self.update_record(tmp, updated_biosamples_ids),
+                [records[index] for index in level])
+            if is_error(results):
+                return results
+            for index, name in zip(level, results):
+                names[index] = name
+                if name is not None:
+                    updated_biosamples_ids[records[index]['accession']] = name
+
+        reverted_updated_biosamples_ids = dict()
+        for tmp, name in zip(records, names):
+            if name is not None:
+                reverted_updated_biosamples_ids[name] = tmp['accession']
         return reverted_updated_biosamples_ids
+
+    def update_record(self, tmp, updated_biosamples_ids):
+        """
+        This function will update existing BioSamples record with new
+        attributes
+        :param tmp: new version of record with accession
+        :param updated_biosamples_ids: dict with accessions of already
+        updated records as keys and their names as values
+        :return: name of updated record, None if record doesn't exist or error
+        message
+        """
+        accession = tmp['accession']
+
+        # fetch the existing entry from the database
+        existing_biosample_entry = self.fetch_biosample_data(accession)
+
+        if existing_biosample_entry:
+            """
+            In BioSamples, updating a sample overwrites its existing content with the new one. 
+            To preserve existing attributes, first download the sample, 
+            build a new version including existing and new attributes, and resubmit the new content.
+            """
+            updated_biosample_entry = copy.deepcopy(existing_biosample_entry)
+            tmp['characteristics']['sample name'] = existing_biosample_entry['characteristics']['sample name']
+
+            if 'derived from' in tmp['characteristics']:
+                # replace with sample name it is derived from
+                derived_from_biosampleid = tmp['characteristics']['derived from']
+                derived_from_name = list()
+
+                for id in derived_from_biosampleid:
+                    if id['text'] in updated_biosamples_ids:
+                        derived_from_name.append({'text': updated_biosamples_ids[id['text']]})
+                    else:
+                        derivedfrom_biosample_entry = self.fetch_biosample_data(id['text'])
+                        if derivedfrom_biosample_entry:
+                            derived_from_name.append({'text': derivedfrom_biosample_entry['name']})
+                        else:
+                            return f"Error: derived_from BioSample Id ({id['text']}) is incorrect , " \
+                                   "please contact faang-dcc@ebi.ac.uk"
+
+                tmp['characteristics']['derived from'] = derived_from_name
+
+            updated_biosample_entry['characteristics'] = tmp['characteristics']
+            updated_biosample_entry['organization'] = tmp['organization']
+            updated_biosample_entry['contact'] = tmp['contact']
+            updated_biosample_entry['update'] = tmp['update']
+            updated_biosample_entry['relationships'] = tmp['relationships']
+            updated_json = json.dumps(updated_biosample_entry)
+
+            update_submission_response = self.pool.send(
+                'PUT', f"{self.submission_server}/biosamples/samples/{accession}",
+                self.get_header, updated_json)
+
+            if update_submission_response is None or \
+                    update_submission_response.status_code != 200:
+                return 'Error: relationship part was not updated, ' \
+                       'please contact faang-dcc@ebi.ac.uk'
+
+            return update_submission_response.json()['name']
+        return None
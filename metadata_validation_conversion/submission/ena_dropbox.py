@@ -0,0 +1,181 @@
+import io
+import os
+import uuid
+
+from lxml import etree
+from requests.auth import HTTPBasicAuth
+
+from metadata_validation_conversion.constants import ENA_SUBMISSION_TIMEOUT, \
+    ENA_DATA_HUB_PROJECT_URL
+from .submission_client import request
+
+
+class MultipartBody(io.RawIOBase):
+    """
+    multipart/form-data body with XML files, files are read piece by piece
+    while request is sent, so they aren't loaded into memory, body could be
+    rewound, so request could be retried
+    """
+    def __init__(self, files):
+        """
+        :param files: list of tuples with name of form field and path of file
+        """
+        super().__init__()
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        # bytes are sent as they are, strings are paths of files
+        self.parts = list()
+        for field_name, path in files:
+            self.parts.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field_name}"; '
+                f'filename="{os.path.basename(path)}"\r\n'
+                f'Content-Type: application/xml\r\n\r\n'.encode('utf-8'))
+            self.parts.append(path)
+            self.parts.append(b'\r\n')
+        self.parts.append(f'--{self.boundary}--\r\n'.encode('utf-8'))
+        self.sizes = [len(part) if isinstance(part, bytes)
+                      else os.path.getsize(part) for part in self.parts]
+        self.length = sum(self.sizes)
+        self.position = 0
+        self.opened_index = None
+        self.opened_file = None
+
+    def __len__(self):
+        return self.length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        self.position = min(max(offset, 0), self.length)
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length - self.position
+        chunks = list()
+        while size > 0 and self.position < self.length:
+            index, offset = self.locate(self.position)
+            number = min(size, self.sizes[index] - offset)
+            if isinstance(self.parts[index], bytes):
+                chunk = self.parts[index][offset:offset + number]
+            else:
+                chunk = self.read_file(index, offset, number)
+            chunks.append(chunk)
+            self.position += number
+            size -= number
+        return b''.join(chunks)
+
+    def readinto(self, buffer):
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def locate(self, position):
+        """
+        This function will find part of body with this position
+        :param position: position in body
+        :return: tuple with index of part and position in this part
+        """
+        for index, size in enumerate(self.sizes):
+            if position < size:
+                return index, position
+            position -= size
+        raise ValueError(f"Position {position} is outside of body")
+
+    def read_file(self, index, offset, number):
+        """
+        This function will read piece of file, file stays open until next
+        file is read
+        :param index: index of part with path of file
+        :param offset: position in file
+        :param number: number of bytes to read
+        :return: bytes
+        """
+        if self.opened_index != index:
+            self.close_file()
+            self.opened_file = open(self.parts[index], 'rb')
+            self.opened_index = index
+        self.opened_file.seek(offset)
+        chunk = self.opened_file.read(number)
+        if len(chunk) != number:
+            raise IOError(f"{self.parts[index]} was changed during "
+                          f"submission")
+        return chunk
+
+    def close_file(self):
+        """
+        This function will close file that is read now
+        """
+        if self.opened_file is not None:
+            self.opened_file.close()
+            self.opened_file = None
+            self.opened_index = None
+
+    def close(self):
+        self.close_file()
+        super().close()
+
+
+def submit_files(submission_path, username, password, files):
+    """
+    This function will send XML files to ENA drop-box
+    :param submission_path: url of ENA drop-box
+    :param username: name of Webin account
+    :param password: password of Webin account
+    :param files: list of tuples with name of ENA object type and path of file
+    :return: response with receipt
+    """
+    body = MultipartBody(files)
+    try:
+        return request('POST', submission_path, data=body,
+                       headers={'Content-Type': body.content_type},
+                       auth=HTTPBasicAuth(username, password),
+                       timeout=ENA_SUBMISSION_TIMEOUT)
+    finally:
+        body.close()
+
+
+def parse_receipt(response):
+    """
+    This function will parse receipt of submission
+    :param response: response of ENA drop-box
+    :return: root element of receipt or None if access was denied
+    """
+    if response.status_code in [401, 403] or \
+            b'Access Denied' in response.content:
+        return None
+    try:
+        return etree.fromstring(response.content)
+    except etree.XMLSyntaxError:
+        raise ValueError(f"ENA responded with status "
+                         f"{response.status_code} without receipt")
+
+
+def add_project_to_data_hub(project_id, dcc, username, password):
+    """
+    This function will add project to private data hub
+    :param project_id: project id in format 'PRJEB20767'
+    :param dcc: name of data hub
+    :param username: name of data hub account
+    :param password: password of data hub account
+    :return: error message or None if project was added
+    """
+    response = request('POST', ENA_DATA_HUB_PROJECT_URL,
+                       json={"projectId": project_id, "dcc": dcc},
+                       headers={'Accept': 'application/json'},
+                       auth=HTTPBasicAuth(username, password))
+    if 'errorMessage' in response.text:
+        return response.json()['errorMessage']
+    return None
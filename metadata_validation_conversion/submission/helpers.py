@@ -1,10 +1,8 @@
-import requests
-
-from requests.auth import HTTPBasicAuth
-
+from metadata_validation_conversion.constants import AAP_PROD_SERVER
 from metadata_validation_conversion.settings import \
     BOVREG_BIOSAMPLES_USERNAME_TEST, BOVREG_BIOSAMPLES_PASSWORD_TEST, \
     BOVREG_BIOSAMPLES_USERNAME_PROD, BOVREG_BIOSAMPLES_PASSWORD_PROD
+from .submission_client import get_aap_token, get_auth_header
 
 
 def check_field_existence(field_to_check, record_to_check):
@@ -60,11 +58,13 @@ def get_credentials(credentials):
 
 
 def get_token():
-    response = requests.get(
-        f"https://api.aai.ebi.ac.uk/auth",
-        auth=HTTPBasicAuth(
-            "BovRegProd", BOVREG_BIOSAMPLES_PASSWORD_PROD))
-    return response.text
+    """
+    This function will return token of BovReg account, new token is only
+    requested when cached one is about to expire
+    :return: token
+    """
+    return get_aap_token(AAP_PROD_SERVER, "BovRegProd",
+                         BOVREG_BIOSAMPLES_PASSWORD_PROD)
 
 
 def get_header():
@@ -72,10 +72,4 @@ def get_header():
     This function will return header required for every request to server
     :return: header as dict
     """
-    token = get_token()
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept': 'application/hal+json',
-        'Authorization': f'Bearer {token}'
-    }
-    return headers
+    return get_auth_header(get_token())
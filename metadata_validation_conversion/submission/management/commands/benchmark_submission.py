@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from submission.submission_pool import SubmissionPool
+from submission.WebinBiosamplesSubmission import WebinBioSamplesSubmission
+
+
+class Command(BaseCommand):
+    help = 'Submit generated samples with relationships to stand-in ' \
+           'BioSamples (see run_stub_biosamples) with one worker and with ' \
+           'worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', default='http://127.0.0.1:3030')
+        parser.add_argument('--records', type=int, default=500)
+        parser.add_argument('--workers', type=int, nargs='+',
+                            default=[1, 10])
+        parser.add_argument('--rate', type=float, default=0.0,
+                            help='maximum number of requests per second, '
+                                 '0 means no limit')
+
+    def handle(self, *args, **options):
+        for workers in options['workers']:
+            submission = WebinBioSamplesSubmission(
+                'Webin-0', 'password', self.get_records(options['records']),
+                'test')
+            submission.webin_server = \
+                f"{options['server']}/ena/submit/webin/auth"
+            submission.submission_server = options['server']
+            submission.pool = SubmissionPool(workers=workers,
+                                             rate=options['rate'])
+            start = time.perf_counter()
+            results = submission.submit_records()
+            submission_time = time.perf_counter() - start
+            if 'Error' in results:
+                self.stderr.write(f"{workers} workers: {results}")
+                continue
+            self.stdout.write(f"{workers} workers: {len(results)} records "
+                              f"in {submission_time:.2f}s "
+                              f"({len(results) / submission_time:.1f} "
+                              f"records/s)")
+
+    @staticmethod
+    def get_records(number):
+        """
+        This function will generate organisms and specimens derived from them
+        :param number: number of records to generate
+        :return: list of records in BioSamples format
+        """
+        records = list()
+        for index in range(number):
+            name = f"sample_{index}"
+            relationships = list()
+            # every third record is organism, others are derived from it
+            if index % 3 != 0:
+                relationships.append({'source': name, 'type': 'derived from',
+                                      'target': f"sample_{index - index % 3}"})
+            records.append({
+                'name': name,
+                'release': '2020-01-01T00:00:00Z',
+                'characteristics': {'material': [{'text': 'specimen'}]},
+                'relationships': relationships
+            })
+        return records
@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import json
+import random
+import time
+
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Run local stand-in for BioSamples, it issues Webin and AAP ' \
+           'tokens, creates samples with fake accessions, updates them and ' \
+           'answers after configurable latency, some requests could be ' \
+           'answered with 503 to test retries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=3030)
+        parser.add_argument('--latency', type=float, default=50.0,
+                            help='latency of every request in milliseconds')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='part of requests answered with 503')
+
+    def handle(self, *args, **options):
+        latency = options['latency'] / 1000
+        error_rate = options['error_rate']
+        samples = dict()
+
+        def get_token():
+            payload = json.dumps({'exp': int(time.time()) + 3600})
+            payload = base64.urlsafe_b64encode(payload.encode()).decode()
+            return f"stub.{payload.rstrip('=')}.stub"
+
+        @web.middleware
+        async def slow_down(request, handler):
+            await asyncio.sleep(latency)
+            if random.random() < error_rate:
+                return web.Response(status=503)
+            return await handler(request)
+
+        async def token(request):
+            return web.Response(text=get_token())
+
+        async def create_sample(request):
+            sample = await request.json()
+            if 'name' not in sample:
+                return web.json_response({'message': 'name is missing'},
+                                         status=400)
+            accession = f"SAMEA{len(samples) + 1:08d}"
+            sample['accession'] = accession
+            samples[accession] = sample
+            return web.json_response(sample, status=201)
+
+        async def update_sample(request):
+            accession = request.match_info['accession']
+            if accession not in samples:
+                return web.json_response({'message': 'sample not found'},
+                                         status=404)
+            sample = await request.json()
+            for relationship in sample.get('relationships', list()):
+                if relationship['target'] not in samples:
+                    return web.json_response(
+                        {'message': f"{relationship['target']} not found"},
+                        status=400)
+            samples[accession] = sample
+            return web.json_response(sample)
+
+        async def get_sample(request):
+            accession = request.match_info['accession']
+            if accession not in samples:
+                return web.json_response({'message': 'sample not found'},
+                                         status=404)
+            return web.json_response(samples[accession])
+
+        app = web.Application(middlewares=[slow_down],
+                              client_max_size=1024 ** 3)
+        app.add_routes([
+            web.get('/auth', token),
+            web.post('/ena/submit/webin/auth/token', token),
+            web.post('/biosamples/samples', create_sample),
+            web.put('/biosamples/samples/{accession}', update_sample),
+            web.get('/biosamples/samples/{accession}', get_sample)])
+        self.stdout.write(f"Stand-in BioSamples is listening on "
+                          f"http://{options['host']}:{options['port']}")
+        web.run_app(app, host=options['host'], port=options['port'],
+                    print=None)
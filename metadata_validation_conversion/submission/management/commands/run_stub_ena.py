@@ -0,0 +1,110 @@
+import asyncio
+
+from aiohttp import BasicAuth, web
+from django.core.management.base import BaseCommand
+from lxml import etree
+
+# ENA objects that get accessions, with prefixes of accessions
+ACCESSION_PREFIXES = {
+    'EXPERIMENT': 'ERX',
+    'RUN': 'ERR',
+    'ANALYSIS': 'ERZ',
+    'SAMPLE': 'ERS'
+}
+
+
+class Command(BaseCommand):
+    help = 'Run local stand-in for ENA drop-box, it accepts multipart ' \
+           'submissions, answers with receipt that has accessions for ' \
+           'every submitted object and implements data hub project ' \
+           'endpoint, requests with "wrong" password are denied'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=3040)
+        parser.add_argument('--latency', type=float, default=200.0,
+                            help='latency of every request in milliseconds')
+
+    def handle(self, *args, **options):
+        latency = options['latency'] / 1000
+        counters = {'submissions': 0, 'objects': 0}
+
+        def is_denied(request):
+            auth = request.headers.get('Authorization', '')
+            try:
+                return auth == '' or BasicAuth.decode(
+                    auth).password == 'wrong'
+            except ValueError:
+                return True
+
+        def get_receipt(files):
+            counters['submissions'] += 1
+            receipt = etree.Element(
+                'RECEIPT', success='true',
+                receiptDate='2020-01-01T00:00:00.000Z')
+            for object_type, content in files.items():
+                if object_type == 'SUBMISSION':
+                    continue
+                for element in etree.fromstring(content).iter(object_type):
+                    counters['objects'] += 1
+                    alias = element.get('alias', '')
+                    if object_type == 'STUDY':
+                        study = etree.SubElement(
+                            receipt, 'STUDY', alias=alias, status='PRIVATE',
+                            accession=f"ERP{counters['objects']:06d}")
+                        etree.SubElement(
+                            study, 'EXT_ID', type='BioProject',
+                            accession=f"PRJEB{counters['objects']}")
+                    else:
+                        etree.SubElement(
+                            receipt, object_type, alias=alias,
+                            status='PRIVATE',
+                            accession=f"{ACCESSION_PREFIXES[object_type]}"
+                                      f"{counters['objects']:06d}")
+            etree.SubElement(
+                receipt, 'SUBMISSION', alias='submission',
+                accession=f"ERA{counters['submissions']:06d}")
+            messages = etree.SubElement(receipt, 'MESSAGES')
+            etree.SubElement(messages, 'INFO').text = \
+                'Submission has been committed.'
+            etree.SubElement(receipt, 'ACTIONS').text = 'ADD'
+            return etree.tostring(receipt, xml_declaration=True,
+                                  encoding='UTF-8')
+
+        async def submit(request):
+            await asyncio.sleep(latency)
+            if is_denied(request):
+                return web.Response(status=401, text='Access Denied')
+            files = dict()
+            reader = await request.multipart()
+            async for part in reader:
+                files[part.name] = bytes(await part.read())
+            if 'SUBMISSION' not in files:
+                return web.Response(status=400,
+                                    text='SUBMISSION file is missing')
+            try:
+                receipt = get_receipt(files)
+            except (etree.XMLSyntaxError, KeyError) as err:
+                receipt = etree.Element('RECEIPT', success='false')
+                messages = etree.SubElement(receipt, 'MESSAGES')
+                etree.SubElement(messages, 'ERROR').text = str(err)
+                receipt = etree.tostring(receipt)
+            return web.Response(body=receipt, content_type='application/xml')
+
+        async def add_project(request):
+            await asyncio.sleep(latency)
+            if is_denied(request):
+                return web.json_response({'errorMessage': 'Access Denied'},
+                                         status=401)
+            project = await request.json()
+            return web.json_response({'projectId': project['projectId'],
+                                      'dcc': project['dcc']})
+
+        app = web.Application(client_max_size=1024 ** 3)
+        app.add_routes([
+            web.post('/ena/submit/drop-box/submit/', submit),
+            web.post('/ena/portal/ams/webin/project/add', add_project)])
+        self.stdout.write(f"Stand-in ENA is listening on "
+                          f"http://{options['host']}:{options['port']}")
+        web.run_app(app, host=options['host'], port=options['port'],
+                    print=None)
@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+from metadata_validation_conversion.constants import SUBMISSION_RETRIES, \
+    SUBMISSION_TIMEOUT, SUBMISSION_POOL_SIZE
+
+# refresh token this number of seconds before it expires
+TOKEN_EXPIRY_MARGIN = 300
+
+# tokens are shared by all requests of this worker
+token_cache = dict()
+token_lock = threading.Lock()
+sessions = dict()
+sessions_lock = threading.Lock()
+
+
+class SubmissionRetry(Retry):
+    """
+    Retries of submission requests, POST request that failed might have
+    created record anyway, so it is only retried when server says it didn't
+    handle it
+    """
+    POST_STATUS_FORCELIST = frozenset([429, 503])
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == 'POST':
+            return status_code in self.POST_STATUS_FORCELIST
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def get_session():
+    """
+    This function will return session of this worker process, connections
+    to submission servers are kept alive and shared by all requests
+    :return: requests.Session object
+    """
+    pid = os.getpid()
+    with sessions_lock:
+        if pid not in sessions:
+            retry = SubmissionRetry(
+                total=SUBMISSION_RETRIES, backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False)
+            adapter = HTTPAdapter(pool_maxsize=SUBMISSION_POOL_SIZE,
+                                  max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            sessions[pid] = session
+        return sessions[pid]
+
+
+def request(method, url, **kwargs):
+    """
+    This function will send request to submission server
+    :param method: HTTP method
+    :param url: url to send request to
+    :param kwargs: other arguments of requests.request
+    :return: response
+    """
+    kwargs.setdefault('timeout', SUBMISSION_TIMEOUT)
+    return get_session().request(method, url, **kwargs)
+
+
+def get_aap_token(aap_server, username, password):
+    """
+    This function will return AAP token of user
+    :param aap_server: url of AAP server
+    :param username: name of the user
+    :param password: password of the user
+    :return: token as a string object
+    """
+    return get_cached_token(
+        ('aap', aap_server, username, password),
+        lambda: request('GET', f"{aap_server}/auth",
+                        auth=HTTPBasicAuth(username, password)))
+
+
+def get_webin_token(webin_server, username, password):
+    """
+    This function will return Webin token of user
+    :param webin_server: url of Webin authentication server
+    :param username: name of the user
+    :param password: password of the user
+    :return: token as a string object
+    """
+    headers = {
+        'accept': '*/*',
+        'Content-Type': 'application/json'
+    }
+    data = {
+        "authRealms": [
+            "ENA"
+        ],
+        "password": password,
+        "username": username
+    }
+    return get_cached_token(
+        ('webin', webin_server, username, password),
+        lambda: request('POST', f"{webin_server}/token?ttl=5",
+                        headers=headers, json=data))
+
+
+def get_cached_token(credentials, fetch_token):
+    """
+    This function will return cached token, new token is only requested
+    when cached one is about to expire
+    :param credentials: tuple with type of token, server, username and
+    password
+    :param fetch_token: function requesting new token
+    :return: token as a string object
+    """
+    # passwords aren't kept as they are
+    key = hashlib.sha256(json.dumps(credentials).encode('utf-8')).hexdigest()
+    with token_lock:
+        token = token_cache.get(key)
+        if token is None or \
+                get_token_expiry(token) - time.time() < TOKEN_EXPIRY_MARGIN:
+            token = fetch_token().text
+            token_cache[key] = token
+        return token
+
+
+def get_token_expiry(token):
+    """
+    This function will return expiry time of JWT token
+    :param token: token to parse
+    :return: expiry time as unix timestamp, 0 if token couldn't be parsed
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))['exp']
+    except (IndexError, KeyError, TypeError, ValueError):
+        return 0
+
+
+def get_auth_header(token):
+    """
+    This function will return header required for every request to server
+    :param token: token to authorize request with
+    :return: header as dict
+    """
+    return {
+        'Content-Type': 'application/json',
+        'Accept': 'application/hal+json',
+        'Authorization': f'Bearer {token}'
+    }
@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from metadata_validation_conversion.constants import SUBMISSION_WORKERS, \
+    SUBMISSION_RATE_LIMIT, SUBMISSION_RECORD_RETRIES
+from .submission_client import request
+
+# records with these relationships are updated after their targets
+DEPENDENCY_TYPES = ['child of', 'derived from']
+
+
+class RateLimiter:
+    """
+    Spreads requests of all workers evenly, so server doesn't get more than
+    rate requests per second
+    """
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """
+        This function will block until next request could be sent
+        """
+        if self.interval == 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class SubmissionPool:
+    """
+    Sends records to submission server from bounded number of workers,
+    every record is retried on its own, so one failed connection doesn't
+    fail whole submission
+    """
+    def __init__(self, workers=SUBMISSION_WORKERS,
+                 rate=SUBMISSION_RATE_LIMIT,
+                 retries=SUBMISSION_RECORD_RETRIES):
+        self.workers = workers
+        self.rate_limiter = RateLimiter(rate)
+        self.retries = retries
+
+    def send(self, method, url, get_header, data=None):
+        """
+        This function will send one record, PUT is idempotent, so it is sent
+        again after any connection error, POST is only sent again if
+        connection wasn't established, otherwise record could be created twice
+        :param method: HTTP method
+        :param url: url to send record to
+        :param get_header: function returning header of request
+        :param data: record as json string
+        :return: response or None if record couldn't be sent
+        """
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                time.sleep(2 ** (attempt - 1))
+            self.rate_limiter.wait()
+            try:
+                return request(method, url, headers=get_header(), data=data)
+            except requests.exceptions.ConnectTimeout:
+                continue
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout):
+                if method == 'POST':
+                    return None
+        return None
+
+    def run(self, function, items):
+        """
+        This function will call function for every item on worker pool, new
+        items aren't started after first error
+        :param function: function to call, it returns result or error message
+        :param items: list of items
+        :return: list of results in order of items or first error message
+        """
+        failed = threading.Event()
+
+        def run_item(item):
+            if failed.is_set():
+                return None
+            result = function(item)
+            if is_error(result):
+                failed.set()
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(run_item, items))
+        for result in results:
+            if is_error(result):
+                return result
+        return results
+
+
+def is_error(result):
+    """
+    This function will check that submission of record failed
+    :param result: result of submission of record
+    :return: True if result is error message and False otherwise
+    """
+    return isinstance(result, str) and result.startswith('Error')
+
+
+def get_dependency_levels(names, dependencies):
+    """
+    This function will split records into levels, records only depend on
+    records of previous levels, so every level could be sent concurrently
+    :param names: list of names of records
+    :param dependencies: list with names of records every record depends on,
+    names of records that aren't in this submission are ignored
+    :return: list of levels with indexes of records in original order
+    """
+    indexes = dict()
+    for index, name in enumerate(names):
+        indexes.setdefault(name, list()).append(index)
+    waiting_for = [0] * len(names)
+    dependants = [list() for _ in names]
+    for index, record_dependencies in enumerate(dependencies):
+        for name in set(record_dependencies):
+            for dependency_index in indexes.get(name, list()):
+                if dependency_index != index:
+                    waiting_for[index] += 1
+                    dependants[dependency_index].append(index)
+    levels = list()
+    level = [index for index, number in enumerate(waiting_for) if number == 0]
+    done = 0
+    while level:
+        levels.append(level)
+        done += len(level)
+        next_level = list()
+        for index in level:
+            for dependant in dependants[index]:
+                waiting_for[dependant] -= 1
+                if waiting_for[dependant] == 0:
+                    next_level.append(dependant)
+        level = sorted(next_level)
+    # records in cycles don't have right order, they go last
+    if done < len(names):
+        levels.append([index for index, number in enumerate(waiting_for)
+                       if number > 0])
+    return levels
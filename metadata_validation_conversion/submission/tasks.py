@@ -1,14 +1,12 @@
-import subprocess
 import json
-import re
-import os
 from abc import ABC
 from datetime import datetime
-from lxml import etree
 from elasticsearch import Elasticsearch, RequestsHttpConnection
 from django.http import HttpResponse
 from metadata_validation_conversion.celery import app
-from metadata_validation_conversion.helpers import send_message
+from metadata_validation_conversion.helpers import send_message, \
+    get_upstream_result
+from metadata_validation_conversion.payload_store import save, load
 from metadata_validation_conversion.constants import ENA_TEST_SERVER, \
     ENA_PROD_SERVER
 from metadata_validation_conversion.settings import BOVREG_USERNAME, \
@@ -16,11 +14,14 @@ from metadata_validation_conversion.settings import BOVREG_USERNAME, \
 from .BiosamplesFileConverter import BiosamplesFileConverter
 from .WebinBiosamplesSubmission import WebinBioSamplesSubmission
 from .BiosamplesSubmission import BioSamplesSubmission
+from .SubmissionJournal import SubmissionJournal
 from .AnalysesFileConverter import AnalysesFileConverter
 from .ExperimentsFileConverter import ExperimentFileConverter
 from .AnnotateTemplate import AnnotateTemplate
 from .helpers import get_credentials
-from celery import Task
+from .ena_dropbox import submit_files, parse_receipt, \
+    add_project_to_data_hub
+from celery import Task, chord
 from django.conf import settings
 # from deepdiff import DeepDiff
 from django.core import mail
@@ -78,10 +79,10 @@ def submit_new_domain(credentials, room_id):
 
 @app.task(base=LogErrorsTask)
 def prepare_samples_data(json_to_convert, room_id, private=False, action='submission', mode='prod'):
-    conversion_results = BiosamplesFileConverter(json_to_convert[0], private, mode, action)
+    conversion_results = BiosamplesFileConverter(load(json_to_convert[0]), private, mode, action)
     results = conversion_results.start_conversion()
     send_message(submission_status='Data is ready', room_id=room_id)
-    return results
+    return save(results)
 
 
 @app.task(base=LogErrorsTask)
@@ -90,25 +91,54 @@ def submit_to_biosamples(results, credentials, room_id, action="submission"):
         submission_message="Waiting: submitting records to BioSamples",
         room_id=room_id)
     username, password = get_credentials(credentials)
+    records = load(results[0])
+
+    # new samples are written to journal, so failed submission could be
+    # started again without creating them twice
+    journal = None
+    if action != 'update':
+        journal = SubmissionJournal.start(room_id, records, username,
+                                          credentials['mode'])
+        if len(journal.accessions) > 0:
+            send_message(
+                submission_message=f"Waiting: resuming submission, "
+                                   f"{len(journal.accessions)} records "
+                                   f"already have accessions",
+                room_id=room_id)
 
     if username.startswith("Webin"):
         submission = WebinBioSamplesSubmission(
-            username, password, results[0], credentials['mode']
+            username, password, records, credentials['mode'], journal=journal
         )
     else:
         submission = BioSamplesSubmission(
-            username, password, results[0], credentials['mode'], credentials['domain_name']
+            username, password, records, credentials['mode'], credentials['domain_name'],
+            journal=journal
         )
 
-    if action == 'update':
-        submission_results = submission.update_records()
-    else:
-        submission_results = submission.submit_records()
+    try:
+        if action == 'update':
+            submission_results = submission.update_records()
+        else:
+            submission_results = submission.submit_records()
+    except Exception as err:
+        if journal is not None:
+            journal.fail(f"Error: {err}")
+        raise
 
     if 'Error' in submission_results:
+        if journal is not None:
+            journal.fail(submission_results)
+            submission_results = f"{submission_results} " \
+                                 f"({len(journal.accessions)} of " \
+                                 f"{journal.records} records were " \
+                                 f"submitted, they will be skipped when " \
+                                 f"submission is started again)"
         send_message(submission_message=submission_results, room_id=room_id)
         return 'Error'
     else:
+        if journal is not None:
+            journal.finish()
         send_message(
             submission_results=submission_results,
             submission_message=f"Success: {action} was completed",
@@ -121,7 +151,7 @@ def submit_to_biosamples(results, credentials, room_id, action="submission"):
 
 @app.task(base=LogErrorsTask)
 def prepare_analyses_data(json_to_convert, room_id, private=False, action='submission'):
-    conversion_results = AnalysesFileConverter(json_to_convert[0], room_id,
+    conversion_results = AnalysesFileConverter(load(json_to_convert[0]), room_id,
                                                private, action)
     xml_files = list()
     analysis_xml, submission_xml, sample_xml = \
@@ -133,12 +163,12 @@ def prepare_analyses_data(json_to_convert, room_id, private=False, action='submi
                          errors=xml_file, room_id=room_id)
             return 'Error'
     send_message(submission_status='Data is ready', room_id=room_id)
-    return 'Success'
+    return save(conversion_results.ena_records)
 
 
 @app.task(base=LogErrorsTask)
 def prepare_experiments_data(json_to_convert, room_id, private=False, action='submission'):
-    conversion_results = ExperimentFileConverter(json_to_convert[0], room_id,
+    conversion_results = ExperimentFileConverter(load(json_to_convert[0]), room_id,
                                                  private, action)
     xml_files = list()
     experiment_xml, run_xml, study_xml, submission_xml, sample_xml = \
@@ -152,13 +182,14 @@ def prepare_experiments_data(json_to_convert, room_id, private=False, action='su
                          errors=xml_file, room_id=room_id)
             return 'Error'
     send_message(submission_status='Data is ready', room_id=room_id)
-    return 'Success'
+    return save(conversion_results.ena_records)
 
 
 @app.task(base=LogErrorsTask)
 def submit_data_to_ena(results, credentials, room_id, submission_type, action="submission"):
-    if results[0] != 'Success':
+    if results[0] == 'Error':
         return 'Error'
+    ena_records = load(results[0])
     send_message(submission_message='Waiting: submitting records to ENA',
                  room_id=room_id)
     submission_path = ENA_TEST_SERVER if credentials['mode'] == 'test' else \
@@ -172,116 +203,64 @@ def submit_data_to_ena(results, credentials, room_id, submission_type, action="s
     else:
         username = credentials["username"]
         password = credentials["password"]
-    # public experiments submission
-    if submission_type == 'experiments' and \
-            not credentials['private_submission']:
-        experiment_xml = f"{room_id}_experiment.xml"
-        run_xml = f"{room_id}_run.xml"
-        study_xml = f"{room_id}_study.xml"
-        password = re.escape(password)
-        submit_to_ena_process = subprocess.run(
-            f'curl -u {username}:{password} '
-            f'-F "SUBMISSION=@{submission_xml}" '
-            f'-F "EXPERIMENT=@{experiment_xml}" '
-            f'-F "RUN=@{run_xml}" '
-            f'-F "STUDY=@{study_xml}" '
-            f'"{submission_path}"',
-            shell=True, capture_output=True)
-    # private experiments submission
-    elif submission_type == 'experiments' and credentials['private_submission']:
-        experiment_xml = f"{room_id}_experiment.xml"
-        run_xml = f"{room_id}_run.xml"
-        study_xml = f"{room_id}_study.xml"
-        sample_xml = f"{room_id}_sample.xml"
-        password = re.escape(password)
-        submit_to_ena_process = subprocess.run(
-            f'curl -u {username}:{password} '
-            f'-F "SUBMISSION=@{submission_xml}" '
-            f'-F "EXPERIMENT=@{experiment_xml}" '
-            f'-F "RUN=@{run_xml}" '
-            f'-F "STUDY=@{study_xml}" '
-            f'-F "SAMPLE=@{sample_xml}" '
-            f'"{submission_path}"',
-            shell=True, capture_output=True)
-    elif submission_type == 'analyses' \
-            and not credentials['private_submission']:
-        analysis_xml = f"{room_id}_analysis.xml"
-        submit_to_ena_process = subprocess.run(
-            f'curl -u {username}:{password} '
-            f'-F "SUBMISSION=@{submission_xml}" '
-            f'-F "ANALYSIS=@{analysis_xml}" '
-            f'"{submission_path}"',
-            shell=True, capture_output=True)
-    elif submission_type == 'analyses' and credentials['private_submission']:
-        # Submit analysis
-        analysis_xml = f"{room_id}_analysis.xml"
-        sample_xml = f"{room_id}_sample.xml"
-        submit_to_ena_process = subprocess.run(
-            f'curl -u {username}:{password} '
-            f'-F "SUBMISSION=@{submission_xml}" '
-            f'-F "ANALYSIS=@{analysis_xml}" '
-            f'-F "SAMPLE=@{sample_xml}" '
-            f'"{submission_path}"',
-            shell=True, capture_output=True)
-
-    submission_results = submit_to_ena_process.stdout
-    parsed_results = parse_submission_results(submission_results, submission_type, room_id, action)
+    files = [('SUBMISSION', submission_xml)]
+    if submission_type == 'experiments':
+        files.append(('EXPERIMENT', f"{room_id}_experiment.xml"))
+        files.append(('RUN', f"{room_id}_run.xml"))
+        files.append(('STUDY', f"{room_id}_study.xml"))
+    elif submission_type == 'analyses':
+        files.append(('ANALYSIS', f"{room_id}_analysis.xml"))
+    # private submissions also have proxy samples
+    if credentials['private_submission']:
+        files.append(('SAMPLE', f"{room_id}_sample.xml"))
+
+    submission_response = submit_files(submission_path, username, password,
+                                       files)
+    receipt = parse_receipt(submission_response)
+    parsed_results = parse_submission_results(receipt, submission_type,
+                                              room_id, ena_records, action)
 
     # Adding project to the private data hub
     if parsed_results == 'Success' and credentials['private_submission'] \
             and submission_type == 'experiments':
-        project_id = fetch_project_id(submit_to_ena_process.stdout)
-        project_json = {
-            "projectId": project_id,
-            "dcc": "dcc_korman"
-        }
-        with open(f"{room_id}_project.json", 'w') as w:
-            json.dump(project_json, w)
-        link_study_process = subprocess.run(
-            f'curl -X POST --header "Content-Type: application/json" '
-            f'--header "Accept: application/json" '
-            f'-u "{BOVREG_USERNAME}:{BOVREG_PASSWORD}" '
-            f'-d @{room_id}_project.json '
-            f'"https://www.ebi.ac.uk/ena/portal/ams/webin/project/add"',
-            shell=True, capture_output=True)
-        if 'errorMessage' in link_study_process.stdout.decode('utf-8'):
-            error_message = json.loads(
-                link_study_process.stdout.decode('utf-8'))['errorMessage']
+        project_id = fetch_project_id(receipt)
+        error_message = add_project_to_data_hub(
+            project_id, 'dcc_korman', BOVREG_USERNAME, BOVREG_PASSWORD)
+        if error_message is not None:
             send_message(
                 submission_message="Error: submission failed",
                 submission_results=[[],
                                     [error_message]],
                 room_id=room_id)
             return 'Error'
-    # TODO: uncomment after testing
-    # subprocess.run(f"rm {room_id}*.xml", shell=True)
-    return submission_results.decode('utf-8')
+    return submission_response.text
 
 
-def fetch_project_id(submission_results):
+def fetch_project_id(receipt):
     """
     This function returns project id from receipt xml
-    :param submission_results: stdout string from subprocess
+    :param receipt: root element of receipt
     :return: project id in format 'PRJEB20767'
     """
-    root = etree.fromstring(submission_results)
-    return root.find('STUDY').find('EXT_ID').attrib['accession']
+    return receipt.find('STUDY').find('EXT_ID').attrib['accession']
 
 
-def parse_submission_results(submission_results, submission_type, room_id, action="submission"):
+def parse_submission_results(receipt, submission_type, room_id, ena_records, action="submission"):
     """
     This function parses submission response
-    :param submission_results: submission response
+    :param receipt: root element of receipt, None if access was denied
     :param submission_type: submission type
     :param room_id: room id to send messages through django channels
+    :param ena_records: data of submitted experiments or analyses from
+    converter
     :param action: indicates whether submission to ENA was an update or a new submission
     :return: error and info messages
     """
-    if 'Access Denied' in submission_results.decode('utf-8'):
+    if receipt is None:
         send_message(submission_message="Error: Access Denied", room_id=room_id)
         return 'Error'
     else:
-        root = etree.fromstring(submission_results)
+        root = receipt
         submission_error_messages = list()
         submission_info_messages = list()
         for messages in root.findall('MESSAGES'):
@@ -297,7 +276,7 @@ def parse_submission_results(submission_results, submission_type, room_id, actio
             return 'Error'
         else:
             # Save submission data to ES
-            save_submission_data(root, submission_type, room_id, action)
+            save_submission_data(root, submission_type, ena_records, action)
             send_message(
                 submission_message=f"Success: {action} was successful",
                 submission_results=[submission_info_messages],
@@ -305,7 +284,7 @@ def parse_submission_results(submission_results, submission_type, room_id, actio
             return 'Success'
 
 
-def parse_experiments_data(root, submission_id, action):
+def parse_experiments_data(root, ena_records, action):
     object_types = {
         'EXPERIMENT': 'experiments',
         'STUDY': 'studies',
@@ -334,6 +313,11 @@ def parse_experiments_data(root, submission_id, action):
                         obj_data['accession'] = object.get('accession')
                     submission_data[prop].append(obj_data)
 
+        # experiment alias -> accession
+        experiment_accessions = dict()
+        for experiment in submission_data.get('experiments', []):
+            experiment_accessions[experiment['alias']] = experiment['accession']
+
         # iterate through each study
         for study in submission_data['studies']:
             study_obj = {
@@ -350,44 +334,26 @@ def parse_experiments_data(root, submission_id, action):
                 study_obj.update({"update_date": current_date})
 
             # get experiments associated with each study
-            experiment_xml = f'{submission_id}_experiment.xml'
-            if os.path.exists(experiment_xml):
-                experiment_root = etree.parse(experiment_xml).getroot()
-                experiments = experiment_root.findall('EXPERIMENT')
-                exp_alias_list = []
-                assay_types = []
-                secondary_projects = []
-                for exp in experiments:
-                    exp_study_alias = exp.findall('STUDY_REF')[0].get('refname')
-                    # check that the study reference for the experiment matches the study
-                    if exp_study_alias == study['alias']:
-                        for experiment in submission_data['experiments']:
-                            # get experiment accession from submission data using experiment alias
-                            if experiment['alias'] == exp.get('alias'):
-                                study_obj['experiments'].append({
-                                    'alias': experiment['alias'],
-                                    'accession': experiment['accession'],
-                                    'available_in_portal': 'false'
-                                })
-                                exp_alias_list.append(experiment['alias'])
-
-                        # get assay type and secondary project
-                        attributes = exp.findall('EXPERIMENT_ATTRIBUTES')
-                        if len(attributes):
-                            attributes = attributes[0].findall('EXPERIMENT_ATTRIBUTE')
-                            for attribute in attributes:
-                                tag = attribute.findall('TAG')[0].text
-                                if tag == 'assay type':
-                                    assay_types.append(attribute.findall('VALUE')[0].text)
-                                elif tag == 'secondary project':
-                                    secondary_projects.append(attribute.findall('VALUE')[0].text)
-                study_obj['assay_type'] = ', '.join(set(assay_types))
-                study_obj['secondary_project'] = ', '.join(set(secondary_projects))
+            assay_types = []
+            secondary_projects = []
+            for exp_alias, ena_record in ena_records.items():
+                # check that the study reference for the experiment matches the study
+                if ena_record['study_ref'] == study['alias']:
+                    if exp_alias in experiment_accessions:
+                        study_obj['experiments'].append({
+                            'alias': exp_alias,
+                            'accession': experiment_accessions[exp_alias],
+                            'available_in_portal': 'false'
+                        })
+                    assay_types.extend(ena_record['assay_type'])
+                    secondary_projects.extend(ena_record['secondary_project'])
+            study_obj['assay_type'] = ', '.join(set(assay_types))
+            study_obj['secondary_project'] = ', '.join(set(secondary_projects))
             study_objs.append(study_obj)
     return study_objs
         
         
-def parse_analysis_data(root, submission_id, action):
+def parse_analysis_data(root, ena_records, action):
     study_objs = []
     if root.get('success') == 'true':
         objects = root.findall('ANALYSIS')
@@ -404,24 +370,9 @@ def parse_analysis_data(root, submission_id, action):
                     'assay_type': '',
                     'secondary_project': ''
                 }
-            analysis_xml = f'{submission_id}_analysis.xml'
-            if os.path.exists(analysis_xml):
-                analysis_root = etree.parse(analysis_xml).getroot()
-                analyses = analysis_root.findall('ANALYSIS')
-                for a in analyses:
-                    a_alias = a.get('alias')
-                    # get study_id
-                    analyses_objs[a_alias]['study_id'] = a.findall('STUDY_REF')[0].get('accession')
-                    # get assay_type and secondary_project
-                    attributes = a.findall('ANALYSIS_ATTRIBUTES')
-                    if len(attributes):
-                        attributes = attributes[0].findall('ANALYSIS_ATTRIBUTE')
-                        for attribute in attributes:
-                            tag = attribute.findall('TAG')[0].text
-                            if tag == 'Assay Type':
-                                analyses_objs[a_alias]['assay_type'] = attribute.findall('VALUE')[0].text
-                            elif tag == 'Secondary Project':
-                                analyses_objs[a_alias]['secondary_project'] = attribute.findall('VALUE')[0].text
+            for a_alias, ena_record in ena_records.items():
+                if a_alias in analyses_objs:
+                    analyses_objs[a_alias].update(ena_record)
             study_objs_dict = {}
             for analysis in analyses_objs.values():
                 if analysis['study_id'] not in study_objs_dict:
@@ -455,12 +406,12 @@ def parse_analysis_data(root, submission_id, action):
     return study_objs
 
 
-def save_submission_data(root, submission_type, room_id, action):
+def save_submission_data(root, submission_type, ena_records, action):
     if root.get('success') == 'true':
         if submission_type == 'experiments':
-            study_objs = parse_experiments_data(root, room_id, action)
+            study_objs = parse_experiments_data(root, ena_records, action)
         else:
-            study_objs = parse_analysis_data(root, room_id, action)
+            study_objs = parse_analysis_data(root, ena_records, action)
         for study_obj in study_objs:
             existing_doc = get_doc(study_obj['study_id'])
             if existing_doc is not None:
@@ -510,7 +461,58 @@ def send_user_email(study_id, subscriber_email):
 
 @app.task(base=LogErrorsTask)
 def generate_annotated_template(json_to_convert, room_id, data_type, action):
-    annotation_results = AnnotateTemplate(json_to_convert, room_id, data_type, action)
+    annotation_results = AnnotateTemplate(load(json_to_convert), room_id, data_type, action)
     annotation_results.start_conversion()
     send_message(annotation_status='Download data', room_id=room_id)
     return 'Success'
+
+
+@app.task(base=LogErrorsTask, bind=True)
+def start_annotation(self, validation_task_id, room_id, data_type, action):
+    """
+    This task will wait for validation results and replace itself with
+    template annotation task
+    :param validation_task_id: id of validation task
+    :param room_id: room id to create ws url
+    :param data_type: type of data in template
+    :param action: could be 'submission' or 'update'
+    """
+    json_to_convert = get_upstream_result(self, validation_task_id)
+    return self.replace(generate_annotated_template.s(
+        json_to_convert, room_id=room_id, data_type=data_type,
+        action=action).set(queue='submission'))
+
+
+@app.task(base=LogErrorsTask, bind=True)
+def start_submission(self, conversion_task_id, submission_type, credentials,
+                     action, room_id):
+    """
+    This task will wait for conversion results and replace itself with
+    chord that prepares and submits data
+    :param conversion_task_id: id of conversion task
+    :param submission_type: could be 'samples', 'experiments' or 'analyses'
+    :param credentials: body of request with credentials data
+    :param action: could be 'submission' or 'update'
+    :param room_id: room id to create ws url
+    """
+    json_to_send = get_upstream_result(self, conversion_task_id)
+    if submission_type == 'samples':
+        submit_task = submit_to_biosamples.s(
+            credentials, room_id=room_id, action=action).set(
+            queue='submission')
+        # mode is required for samples data
+        prepare_task = prepare_samples_data.s(
+            json_to_send, room_id=room_id,
+            private=credentials['private_submission'], action=action,
+            mode=credentials['mode']).set(queue='submission')
+    else:
+        submit_task = submit_data_to_ena.s(
+            credentials, room_id=room_id, submission_type=submission_type,
+            action=action).set(queue='submission')
+        prepare = prepare_experiments_data \
+            if submission_type == 'experiments' else prepare_analyses_data
+        prepare_task = prepare.s(
+            json_to_send, room_id=room_id,
+            private=credentials['private_submission'],
+            action=action).set(queue='submission')
+    return self.replace(chord((prepare_task,), submit_task))
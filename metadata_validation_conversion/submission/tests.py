@@ -1,3 +1,45 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .BiosamplesFileConverter import BiosamplesFileConverter
+from .SubmissionJournal import SubmissionJournal
+
+
+class SubmissionJournalTestCase(SimpleTestCase):
+    json_to_convert = {
+        'organism': [
+            {
+                'custom': {'sample_name': {'value': 'animal_1'}},
+                'organism': {'text': 'Bos taurus', 'term': 'NCBITaxon:9913'},
+                'specimen_collection_date': {'value': '2020-01-01'},
+                'geographic_location': {'value': 'Norway'}
+            }
+        ],
+        'person': [{'person_last_name': 'Smith'}],
+        'organization': [{'organization_name': 'EBI'}],
+        'submission': []
+    }
+
+    def prepare(self, private):
+        return BiosamplesFileConverter(self.json_to_convert, private,
+                                       'test', 'submission').start_conversion()
+
+    def test_key_of_prepared_records_is_stable(self):
+        for private in [False, True]:
+            first_records = self.prepare(private)
+            second_records = self.prepare(private)
+            self.assertNotEqual(first_records[0]['release'],
+                                second_records[0]['release'])
+            self.assertEqual(
+                SubmissionJournal.get_key(first_records, 'user', 'test'),
+                SubmissionJournal.get_key(second_records, 'user', 'test'))
+
+    def test_key_depends_on_records_user_and_mode(self):
+        records = self.prepare(False)
+        key = SubmissionJournal.get_key(records, 'user', 'test')
+        self.assertNotEqual(
+            key, SubmissionJournal.get_key(records, 'other_user', 'test'))
+        self.assertNotEqual(
+            key, SubmissionJournal.get_key(records, 'user', 'prod'))
+        records[0]['name'] = 'animal_2'
+        self.assertNotEqual(
+            key, SubmissionJournal.get_key(records, 'user', 'test'))
@@ -18,5 +18,7 @@ urlpatterns = [
     path('download_template/<str:room_id>', views.download_template,
          name='download_template'),
     path('download_submission_results/<str:submission_type>/<str:task_id>',
-         views.download_submission_results, name='download_submission_results')
+         views.download_submission_results, name='download_submission_results'),
+    path('submission_journal/<str:room_id>', views.get_submission_journal,
+         name='submission_journal')
 ]
@@ -1,8 +1,6 @@
 import json
 import os
 
-from celery import chord
-
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from elasticsearch import Elasticsearch, RequestsHttpConnection
@@ -10,9 +8,9 @@ from django.conf import settings
 from django.core.mail import send_mail
 from metadata_validation_conversion.celery import app
 from metadata_validation_conversion.helpers import send_message
-from .tasks import prepare_samples_data, prepare_analyses_data, \
-    prepare_experiments_data, generate_annotated_template, get_domains, \
-    submit_new_domain, submit_to_biosamples, submit_data_to_ena, send_user_email
+from .tasks import start_annotation, start_submission, get_domains, \
+    submit_new_domain, send_user_email
+from .SubmissionJournal import SubmissionJournal
 
 XLSX_CONTENT_TYPE = 'vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
@@ -22,11 +20,10 @@ es = Elasticsearch([settings.NODE], connection_class=RequestsHttpConnection,
 
 def get_template(request, task_id, room_id, data_type, action):
     send_message(annotation_status='Annotating template', room_id=room_id)
-    validation_results = app.AsyncResult(task_id)
-    json_to_convert = validation_results.get()
-    convert_template_task = generate_annotated_template.s(
-        json_to_convert, room_id=room_id, data_type=data_type, action=action).set(queue='submission')
-    res = convert_template_task.apply_async()
+    # Annotation starts as soon as validation is finished
+    res = start_annotation.apply_async(
+        (task_id,), kwargs={'room_id': room_id, 'data_type': data_type,
+                            'action': action}, queue='submission')
     return HttpResponse(json.dumps({'id': res.id}))
 
 
@@ -54,6 +51,14 @@ def download_submission_results(request, submission_type, task_id):
     return response
 
 
+def get_submission_journal(request, room_id):
+    journal = SubmissionJournal.get_room_journal(room_id)
+    if journal is None:
+        return HttpResponse(status=404)
+    return HttpResponse(json.dumps(journal.get_state()),
+                        content_type='application/json')
+
+
 @csrf_exempt
 def domain_actions(request, room_id, domain_action):
     if request.method == 'POST':
@@ -80,36 +85,12 @@ def submit_records(request, action, submission_type, task_id, room_id):
     send_message(submission_message='Preparing data', room_id=room_id)
     if request.method == 'POST':
         request_body = json.loads(request.body.decode('utf-8'))
-        if submission_type == 'samples':
-            prepare = prepare_samples_data
-            submit_task = submit_to_biosamples.s(request_body, room_id=room_id, action=action).set(
-                queue='submission')
-        elif submission_type == 'experiments':
-            prepare = prepare_experiments_data
-            submit_task = submit_data_to_ena.s(request_body, room_id=room_id, submission_type='experiments', action=action).set(
-                queue='submission')
-        elif submission_type == 'analyses':
-            prepare = prepare_analyses_data
-            submit_task = submit_data_to_ena.s(request_body, room_id=room_id, submission_type='analyses', action=action).set(
-                queue='submission')
-        else:
+        if submission_type not in ['samples', 'experiments', 'analyses']:
             return HttpResponse("Unknown submission type!")
-
-        validation_result = app.AsyncResult(task_id)
-        json_to_send = validation_result.get()
-
-        # mode is required for samples data
-        if submission_type == 'samples':
-            prepare_task = prepare.s(
-                json_to_send, room_id=room_id, private=request_body['private_submission'], action=action,
-                mode=request_body['mode']).set(queue='submission')
-        else:
-            prepare_task = prepare.s(
-                json_to_send, room_id=room_id, private=request_body['private_submission'], action=action)\
-                .set(queue='submission')
-
-        my_chord = chord((prepare_task,), submit_task)
-        res = my_chord.apply_async()
+        # Submission starts as soon as conversion is finished
+        res = start_submission.apply_async(
+            (task_id, submission_type, request_body, action),
+            kwargs={'room_id': room_id}, queue='submission')
         return HttpResponse(json.dumps({"id": res.id}))
     return HttpResponse("Please use POST method for submission!")
 
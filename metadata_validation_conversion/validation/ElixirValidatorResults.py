@@ -1,50 +1,54 @@
-import requests
 from metadata_validation_conversion.constants import SAMPLE_CORE_URL, \
-    ALLOWED_SAMPLES_TYPES, ALLOWED_EXPERIMENTS_TYPES, EXPERIMENT_CORE_URL, \
-    ALLOWED_ANALYSES_TYPES, MODULE_RULES
-from .helpers import validate, get_record_structure
-import json
+    EXPERIMENT_CORE_URL, MODULE_RULES
+from metadata_validation_conversion.schema_cache import get_schema
+from .helpers import validate_batch, get_allowed_types, get_module_name, \
+    is_record_to_check
 
 
 class ElixirValidatorResults:
-    def __init__(self, json_to_test, rules_type, structure):
+    def __init__(self, json_to_test, rules_type, validation_document):
         self.json_to_test = json_to_test
         self.rules_type = rules_type
-        self.structure = structure
+        self.validation_document = validation_document
 
     def run_validation(self):
         """
         This function will run validation using Elixir Validator
-        :return: results of validation
+        :return: validation document with errors
+        """
+        items, destinations = self.get_validation_items()
+        self.attach_validation_results(destinations, validate_batch(items))
+        return self.validation_document
+
+    def get_validation_items(self, records_to_check=None):
+        """
+        This function will collect all objects that should be validated, so
+        they could be validated at once
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values, all records are checked if it is None
+        :return: list of (data, schema) tuples and list of (record type,
+        record index, field) tuples showing where errors of every item go
         """
         if self.rules_type == 'samples':
-            record_type = ALLOWED_SAMPLES_TYPES
             core_name = 'samples_core'
             core_url = SAMPLE_CORE_URL
         elif self.rules_type == 'analyses':
-            record_type = ALLOWED_ANALYSES_TYPES
             core_name = None
             core_url = None
         else:
-            record_type = ALLOWED_EXPERIMENTS_TYPES
             core_name = 'experiments_core'
             core_url = EXPERIMENT_CORE_URL
 
-        core_schema = requests.get(core_url).json() if core_url else None
-        validation_document = dict()
-        for name, url in record_type.items():
+        core_schema = get_schema(core_url) if core_url else None
+        items_to_validate = list()
+        items_destinations = list()
+        for name, url in get_allowed_types(self.rules_type).items():
             if name in self.json_to_test:
-                validation_document.setdefault(name, list())
-                structure_to_use = self.structure[name]
-                type_schema = requests.get(url).json()
+                type_schema = get_schema(url)
                 module_schema = None
-                module_name = None
-                if name in MODULE_RULES:
-                    module_schema = requests.get(MODULE_RULES[name]).json()
-                    if 'chip-seq' in name:
-                        module_name = name.split("chip-seq_")[-1]
-                    else:
-                        module_name = name
+                module_name = get_module_name(name)
+                if module_name is not None:
+                    module_schema = get_schema(MODULE_RULES[name])
 
                 # Elixir validator complains about links
                 if core_name:
@@ -64,21 +68,32 @@ class ElixirValidatorResults:
                     del type_schema['properties']['input_dna']
 
                 for index, record in enumerate(self.json_to_test[name]):
-                    record_to_return = get_record_structure(
-                        structure_to_use, record, module_name)
+                    if not is_record_to_check(records_to_check, name, index):
+                        continue
                     if core_schema:
-                        errors, paths = validate(record[core_name], core_schema)
-                        self.attach_errors(
-                            record_to_return, errors, paths, core_name)
-                    errors, paths = validate(record, type_schema)
-                    self.attach_errors(record_to_return, errors, paths)
+                        items_to_validate.append(
+                            (record[core_name], core_schema))
+                        items_destinations.append((name, index, core_name))
+                    items_to_validate.append((record, type_schema))
+                    items_destinations.append((name, index, None))
                     if module_schema:
-                        errors, paths = validate(
-                            record[module_name], module_schema)
-                        self.attach_errors(
-                            record_to_return, errors, paths, module_name)
-                    validation_document[name].append(record_to_return)
-        return validation_document
+                        items_to_validate.append(
+                            (record[module_name], module_schema))
+                        items_destinations.append((name, index, module_name))
+        return items_to_validate, items_destinations
+
+    def attach_validation_results(self, destinations, validation_results):
+        """
+        This function will add errors of all validated objects to validation
+        document
+        :param destinations: list of (record type, record index, field)
+        tuples returned by get_validation_items
+        :param validation_results: list of (errors, paths) tuples
+        """
+        for (name, index, additional_field), (errors, paths) in zip(
+                destinations, validation_results):
+            self.attach_errors(self.validation_document[name][index], errors,
+                               paths, additional_field)
 
     def attach_errors(self, record_to_return, errors, paths,
                       additional_field=None):
@@ -0,0 +1,117 @@
+# parts of record structure that have fields of their own
+RECORD_SECTIONS = ['samples_core', 'custom', 'experiments_core', 'input_dna',
+                   'dna-binding_proteins', 'teleostei_embryo',
+                   'teleostei_post-hatching']
+ISSUE_TYPES = ['errors', 'warnings']
+
+
+class IssueCounters:
+    """
+    Numbers of errors and warnings of submission and of every sheet, record
+    and field, they are updated when issues are attached, so status and
+    summary don't need another pass over all issues
+    """
+    def __init__(self):
+        self.totals = dict.fromkeys(ISSUE_TYPES, 0)
+        # record type -> numbers of issues and dict with record indexes as
+        # keys and numbers of issues of records and their fields as values,
+        # only records and fields with issues are kept
+        self.sheets = dict()
+
+    def add_record(self, name, index, record_to_return):
+        """
+        This function will count issues of record checked by
+        record-independent checks
+        :param name: name of the record type
+        :param index: index of the record
+        :param record_to_return: structure of record with issues
+        """
+        self.sheets.setdefault(name, self.get_empty_sheet())
+        for field_name, field_value in record_to_return.items():
+            if field_name in RECORD_SECTIONS:
+                for section_field_name, section_field_value in \
+                        field_value.items():
+                    self.add_field(name, index,
+                                   f"{field_name}.{section_field_name}",
+                                   section_field_value)
+            else:
+                self.add_field(name, index, field_name, field_value)
+
+    def add_field(self, name, index, field_name, field_value):
+        """
+        This function will count issues of field
+        :param name: name of the record type
+        :param index: index of the record
+        :param field_name: name of the field, prefixed with section name for
+        fields of sections
+        :param field_value: structure of field with issues, list for arrays
+        """
+        items = field_value if isinstance(field_value, list) else \
+            [field_value]
+        for issue_type in ISSUE_TYPES:
+            number = sum(len(item.get(issue_type, list())) for item in items)
+            if number > 0:
+                self.add_issues(name, index, field_name, issue_type, number)
+
+    def add_issues(self, name, index, field_name, issue_type, number=1):
+        """
+        This function will count issues added to field
+        :param name: name of the record type
+        :param index: index of the record
+        :param field_name: name of the field, prefixed with section name for
+        fields of sections
+        :param issue_type: 'errors' or 'warnings'
+        :param number: number of added issues
+        """
+        sheet = self.sheets.setdefault(name, self.get_empty_sheet())
+        record = sheet['records'].setdefault(str(index), {
+            'errors': 0, 'warnings': 0, 'fields': dict()})
+        field = record['fields'].setdefault(
+            field_name, dict.fromkeys(ISSUE_TYPES, 0))
+        field[issue_type] += number
+        record[issue_type] += number
+        sheet[issue_type] += number
+        self.totals[issue_type] += number
+
+    def update(self, summary):
+        """
+        This function will add numbers of issues counted by other worker
+        :param summary: result of get_summary of IssueCounters of other
+        records
+        """
+        for name, other_sheet in summary['sheets'].items():
+            sheet = self.sheets.setdefault(name, self.get_empty_sheet())
+            for index, record in other_sheet['records'].items():
+                sheet['records'][index] = record
+            for issue_type in ISSUE_TYPES:
+                sheet[issue_type] += other_sheet[issue_type]
+                self.totals[issue_type] += other_sheet[issue_type]
+
+    @staticmethod
+    def get_empty_sheet():
+        """
+        This function will return counters of sheet without issues
+        :return: dict with numbers of issues and records with issues
+        """
+        return {'errors': 0, 'warnings': 0, 'records': dict()}
+
+    def get_status(self):
+        """
+        This function will return submission status
+        :return: 'Fix issues' if there are errors, 'Ready for submission'
+        otherwise
+        """
+        if self.totals['errors'] > 0:
+            return 'Fix issues'
+        return 'Ready for submission'
+
+    def get_summary(self):
+        """
+        This function will return numbers of issues that go to front-end,
+        record indexes are strings, so it could be sent as it is
+        :return: dict with total numbers of issues and numbers of issues of
+        every sheet
+        """
+        return {'errors': self.totals['errors'],
+                'warnings': self.totals['warnings'],
+                'sheets': self.sheets}
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import threading
+
+from jsonschema import Draft7Validator, ValidationError, validators
+
+
+# ajv (used by elixir-validator) messages, front-end shows them as they are
+AJV_MESSAGES = {
+    'type': lambda error: f"should be {error.validator_value}"
+    if isinstance(error.validator_value, str)
+    else f"should be {','.join(error.validator_value)}",
+    'enum': lambda error: "should be equal to one of the allowed values",
+    'const': lambda error: "should be equal to constant",
+    'pattern': lambda error: f'should match pattern "{error.validator_value}"',
+    'format': lambda error: f'should match format "{error.validator_value}"',
+    'minimum': lambda error: f"should be >= {error.validator_value}",
+    'maximum': lambda error: f"should be <= {error.validator_value}",
+    'exclusiveMinimum': lambda error: f"should be > {error.validator_value}",
+    'exclusiveMaximum': lambda error: f"should be < {error.validator_value}",
+    'minLength': lambda error: f"should NOT be shorter than "
+                               f"{error.validator_value} characters",
+    'maxLength': lambda error: f"should NOT be longer than "
+                               f"{error.validator_value} characters",
+    'minItems': lambda error: f"should NOT have fewer than "
+                              f"{error.validator_value} items",
+    'maxItems': lambda error: f"should NOT have more than "
+                              f"{error.validator_value} items",
+    'uniqueItems': lambda error: "should NOT have duplicate items",
+    'oneOf': lambda error: "should match exactly one schema in oneOf",
+    'anyOf': lambda error: "should match some schema in anyOf",
+    'additionalProperties': lambda error: "should NOT have additional "
+                                          "properties"
+}
+
+MAX_CACHED_VALIDATORS = 256
+MAX_CACHED_ONTOLOGY_CHECKS = 100000
+
+
+class JsonSchemaValidator:
+    """
+    In-process replacement for elixir-validator, schemas are compiled once per
+    worker and only graph_restriction keyword (ontology lookups) is delegated
+    to remote validator, one object is shared by threads of worker, so state
+    of validate_batch call is kept per thread
+    """
+    def __init__(self, remote_validate=None, remote_validate_batch=None):
+        """
+        :param remote_validate: function to check graph_restriction
+        remotely, graph_restriction is ignored when it is None
+        :param remote_validate_batch: function to check many
+        graph_restrictions remotely at once
+        """
+        self.remote_validate = remote_validate
+        self.remote_validate_batch = remote_validate_batch
+        self.validator_class = validators.extend(
+            Draft7Validator, {'graph_restriction': self.graph_restriction})
+        self.compiled_validators = dict()
+        self.validators_by_id = dict()
+        self.ontology_checks = dict()
+        # pending_ontology_checks and waiting_for_checks of current
+        # validate_batch call
+        self.batch_state = threading.local()
+
+    def validate(self, data, schema):
+        """
+        This function will validate data against schema
+        :param data: data to validate in JSON format
+        :param schema: schema to validate against
+        :return: list of error messages and list of their paths
+        """
+        return self.validate_batch([(data, schema)])[0]
+
+    def validate_batch(self, items):
+        """
+        This function will validate list of objects, ontology lookups of all
+        objects are resolved together before errors are reported
+        :param items: list of (data, schema) tuples
+        :return: list of (errors, paths) tuples in the same order as items
+        """
+        results = list()
+        waiting_items = list()
+        pending_ontology_checks = dict()
+        self.batch_state.pending_ontology_checks = pending_ontology_checks
+        try:
+            for index, (data, schema) in enumerate(items):
+                # the same term could be already pending for previous item
+                self.batch_state.waiting_for_checks = False
+                results.append(self.collect_errors(data, schema))
+                if self.batch_state.waiting_for_checks:
+                    waiting_items.append(index)
+        finally:
+            self.batch_state.pending_ontology_checks = None
+        if pending_ontology_checks:
+            self.resolve_ontology_checks(pending_ontology_checks)
+            for index in waiting_items:
+                results[index] = self.collect_errors(*items[index])
+        return results
+
+    def collect_errors(self, data, schema):
+        """
+        This function will return errors in the same format as
+        elixir-validator does
+        :param data: data to validate
+        :param schema: schema to validate against
+        :return: list of error messages and list of their paths
+        """
+        errors = dict()
+        for error in self.get_validator(schema).iter_errors(data):
+            for single_error in self.flatten_error(error):
+                path = self.get_data_path(single_error)
+                errors.setdefault(path, list())
+                errors[path].append(self.get_message(single_error))
+        validation_errors = list()
+        paths = list()
+        for path, messages in errors.items():
+            messages = [message for message in messages if message !=
+                        'should match exactly one schema in oneOf']
+            if len(messages) != 0:
+                validation_errors.append(', '.join(messages))
+                paths.append(path)
+        return validation_errors, paths
+
+    def get_validator(self, schema):
+        """
+        This function will return compiled validator for schema
+        :param schema: schema to compile
+        :return: validator object
+        """
+        schema_id = id(schema)
+        # other threads could clear caches, so every value is read once,
+        # reference to schema is kept so id couldn't be reused
+        cached_schema, validator = self.validators_by_id.get(schema_id,
+                                                             (None, None))
+        if cached_schema is schema:
+            return validator
+        key = hashlib.sha1(
+            json.dumps(schema, sort_keys=True).encode('utf-8')).hexdigest()
+        validator = self.compiled_validators.get(key)
+        if validator is None:
+            if len(self.compiled_validators) >= MAX_CACHED_VALIDATORS:
+                self.compiled_validators.clear()
+            validator = self.validator_class(
+                schema, format_checker=Draft7Validator.FORMAT_CHECKER)
+            self.compiled_validators[key] = validator
+        if len(self.validators_by_id) >= MAX_CACHED_VALIDATORS:
+            self.validators_by_id.clear()
+        self.validators_by_id[schema_id] = (schema, validator)
+        return validator
+
+    def graph_restriction(self, validator, restriction, instance, schema):
+        """
+        This function will check ontology term against graph restriction
+        :param validator: validator object
+        :param restriction: value of graph_restriction keyword
+        :param instance: term to check
+        :param schema: current sub-schema
+        """
+        if self.remote_validate is None or not isinstance(instance, str):
+            return
+        key = (json.dumps(restriction, sort_keys=True), instance)
+        messages = self.ontology_checks.get(key)
+        if messages is None:
+            pending_ontology_checks = getattr(
+                self.batch_state, 'pending_ontology_checks', None)
+            if pending_ontology_checks is not None:
+                pending_ontology_checks[key] = restriction
+                self.batch_state.waiting_for_checks = True
+                return
+            messages = self.resolve_ontology_checks({key: restriction})[key]
+        for message in messages:
+            yield ValidationError(message)
+
+    def resolve_ontology_checks(self, checks):
+        """
+        This function will check terms against graph restrictions remotely
+        :param checks: dict with (restriction, term) as keys and restriction
+        as values
+        :return: dict with (restriction, term) as keys and error messages as
+        values
+        """
+        if len(self.ontology_checks) + len(checks) > \
+                MAX_CACHED_ONTOLOGY_CHECKS:
+            self.ontology_checks.clear()
+        items = list()
+        for (_, term), restriction in checks.items():
+            items.append((term, {'type': 'string',
+                                 'graph_restriction': restriction}))
+        if self.remote_validate_batch is not None:
+            results = self.remote_validate_batch(items)
+        else:
+            results = [self.remote_validate(*item) for item in items]
+        checked = dict()
+        for key, (errors, _) in zip(checks, results):
+            checked[key] = errors
+            self.ontology_checks[key] = errors
+        return checked
+
+    @classmethod
+    def flatten_error(cls, error):
+        """
+        This function will return errors of every failed branch of
+        oneOf/anyOf, elixir-validator reports them as well
+        :param error: ValidationError object
+        :return: list of errors
+        """
+        errors = list()
+        if error.validator in ['oneOf', 'anyOf'] and error.context:
+            for sub_error in error.context:
+                errors.extend(cls.flatten_error(sub_error))
+        errors.append(error)
+        return errors
+
+    @staticmethod
+    def get_data_path(error):
+        """
+        This function will convert error path to JSON pointer
+        :param error: ValidationError object
+        :return: path in '/field/index/subfield' format
+        """
+        path = [str(item) for item in error.absolute_path]
+        if error.validator == 'required':
+            # report missing property as error of this property
+            path.append(JsonSchemaValidator.get_missing_property(error))
+        if len(path) == 0:
+            return ''
+        return '/' + '/'.join(path)
+
+    @staticmethod
+    def get_message(error):
+        """
+        This function will return error message in ajv format
+        :param error: ValidationError object
+        :return: error message
+        """
+        if error.validator == 'required':
+            return f"should have required property " \
+                   f"'{JsonSchemaValidator.get_missing_property(error)}'"
+        if error.validator in AJV_MESSAGES:
+            return AJV_MESSAGES[error.validator](error)
+        return error.message
+
+    @staticmethod
+    def get_missing_property(error):
+        """
+        This function will return name of missing property for required error
+        :param error: ValidationError object
+        :return: name of the property
+        """
+        for property_name in error.validator_value:
+            if f"{property_name!r} is a required property" == error.message:
+                return property_name
+        return error.message.split("'")[1]
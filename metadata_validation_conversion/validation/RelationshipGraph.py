@@ -0,0 +1,243 @@
+from metadata_validation_conversion.constants import ALLOWED_SAMPLES_TYPES, \
+    ALLOWED_RELATIONSHIPS
+from metadata_validation_conversion.helpers import convert_to_snake_case
+from .helpers import get_record_name
+
+
+class RelationshipGraph:
+    """
+    Relationships of all samples of submission, built once, so every record
+    and every referenced entity is found by index instead of scanning sheets
+    """
+    def __init__(self, json_to_test, action):
+        """
+        :param json_to_test: json to test
+        :param action: could be 'submission' or 'update'
+        """
+        self.action = action
+        # record name -> relationships, material and organism of record
+        self.nodes = dict()
+        # record name -> (record type, record index) in validation document
+        self.records = dict()
+        # BioSamples accession of submitted record -> record name
+        self.accessions = dict()
+        # record name -> names of entities it refers to
+        self.parents = dict()
+        # accession -> relationships, material and organism from BioSamples
+        self.biosample_nodes = dict()
+        self.biosample_ids = set()
+        for name in ALLOWED_SAMPLES_TYPES:
+            if name in json_to_test:
+                self.add_records(name, json_to_test[name])
+
+    def add_records(self, name, records):
+        """
+        This function will add records of one type to graph
+        :param name: name of the record type, ex. 'organism'
+        :param records: records to add
+        """
+        relationship_name = 'child_of' if name == 'organism' else \
+            'derived_from'
+        module_name = None
+        if name in ['teleostei_embryo', 'teleostei_post-hatching']:
+            module_name = name
+        for index, record in enumerate(records):
+            record_name = get_record_name(record, index, name, self.action)
+            node = self.nodes.setdefault(record_name, dict())
+            # the first record with this name gets the issues
+            self.records.setdefault(record_name, (name, index))
+            if 'biosample_id' in record['custom']:
+                self.accessions.setdefault(
+                    str(record['custom']['biosample_id']['value']),
+                    record_name)
+            if relationship_name in record and isinstance(
+                    record[relationship_name], list):
+                # records are shared with other checks, so don't change them
+                node['relationships'] = [
+                    str(child['value']) for child in record[relationship_name]]
+            elif relationship_name in record and isinstance(
+                    record[relationship_name], dict):
+                node['relationships'] = [
+                    str(record[relationship_name]['value'])]
+            for relation in node.get('relationships', list()):
+                if 'SAM' in relation:
+                    self.biosample_ids.add(relation)
+            self.parents[record_name] = node.get('relationships', list())
+            node['material'] = record['samples_core']['material']['text']
+            if module_name:
+                node['material'] = module_name
+            if relationship_name == 'child_of':
+                try:
+                    node['organism'] = record['organism']['text']
+                except KeyError:
+                    pass
+
+    def add_biosample_data(self, biosample_data):
+        """
+        This function will add entities fetched from BioSamples
+        :param biosample_data: dict with accessions as keys and
+        relationships, material and organism as values
+        """
+        self.biosample_nodes.update(biosample_data)
+
+    def get_node(self, relation):
+        """
+        This function will find entity record refers to, records of this
+        submission are looked up by name, then BioSamples entities and then
+        records of this submission by their accessions
+        :param relation: name or accession of entity
+        :return: relationships, material and organism of entity or None if
+        it wasn't found
+        """
+        if relation in self.nodes:
+            return self.nodes[relation]
+        elif relation in self.biosample_nodes:
+            return self.biosample_nodes[relation]
+        elif relation in self.accessions:
+            return self.nodes[self.accessions[relation]]
+        return None
+
+    def get_neighbours(self, record_name):
+        """
+        This function will return all entities record refers to
+        :param record_name: name of the record
+        :return: dict with relations as keys and entities (None if they
+        weren't found) as values
+        """
+        return {relation: self.get_node(relation)
+                for relation in self.parents.get(record_name, list())}
+
+    def get_record_errors(self, record_name):
+        """
+        This function will check relationships of one record against
+        entities it refers to
+        :param record_name: name of the record
+        :return: list of (relation, error) tuples
+        """
+        errors = list()
+        node = self.nodes[record_name]
+        # Don't need to check relationships if 'restricted access' missing
+        # term was used
+        if 'relationships' not in node or \
+                'restricted access' in node['relationships']:
+            return errors
+        current_material = convert_to_snake_case(node['material'])
+        for relation in node['relationships']:
+            relation_node = self.get_node(relation)
+            if relation_node is None:
+                errors.append((relation, f"Relationships part: no entity "
+                                         f"'{relation}' found"))
+                continue
+            relation_material = convert_to_snake_case(
+                relation_node['material'])
+            if current_material == 'organism' and \
+                    relation_material == 'organism':
+                self.check_parents(record_name, node, relation,
+                                   relation_node, errors)
+            allowed_relationships = ALLOWED_RELATIONSHIPS[current_material]
+            if relation_material not in allowed_relationships:
+                errors.append((
+                    relation,
+                    f"Relationships part: referenced entity '{relation}' "
+                    f"does not match condition 'should be "
+                    f"{' or '.join(allowed_relationships)}'"))
+        return errors
+
+    @staticmethod
+    def check_parents(current_organism_name, current_organism_value,
+                      relation_organism_name, relation_organism_value,
+                      results_holder):
+        """
+        This function will perform parent-child relationships checks
+        :param current_organism_name: name of current organism
+        :param current_organism_value: values of current organism
+        :param relation_organism_name: name of relation organism
+        :param relation_organism_value: values of relation organism
+        :param results_holder: list to save (relation, error) tuples to
+        """
+        if current_organism_value['organism'] != \
+                relation_organism_value['organism']:
+            results_holder.append((
+                relation_organism_name,
+                f"Relationships part: the specie of the child "
+                f"'{current_organism_value['organism']}' doesn't match the "
+                f"specie of the parent '{relation_organism_value['organism']}'"))
+        if 'relationships' in relation_organism_value and  \
+                current_organism_name in \
+                relation_organism_value['relationships']:
+            results_holder.append((
+                relation_organism_name,
+                f"Relationships part: parent '{relation_organism_name}' is "
+                f"listing the child as its parent"))
+
+    def get_errors(self, records_errors=None):
+        """
+        This function will check relationships of all records in one
+        depth-first traversal of graph, records that refer to each other in
+        a loop get an error as well
+        :param records_errors: dict with record names as keys and results of
+        get_record_errors as values, records that aren't in it are checked
+        :return: dict with record names as keys and lists of (relation,
+        error) tuples as values
+        """
+        if records_errors is None:
+            records_errors = dict()
+        errors = dict()
+        # 1 - record is on the current path, 2 - record and all its parents
+        # are checked
+        states = dict()
+        for start in self.nodes:
+            if start in states:
+                continue
+            path = [start]
+            states[start] = 1
+            iterators = [iter(self.parents[start])]
+            errors[start] = self.get_errors_of_record(start, records_errors)
+            while iterators:
+                relation = next(iterators[-1], None)
+                if relation is None:
+                    states[path.pop()] = 2
+                    iterators.pop()
+                    continue
+                if relation not in self.nodes:
+                    continue
+                if states.get(relation) == 1:
+                    self.add_loop_error(path[path.index(relation):],
+                                        errors[path[-1]])
+                elif relation not in states:
+                    path.append(relation)
+                    states[relation] = 1
+                    iterators.append(iter(self.parents[relation]))
+                    errors[relation] = self.get_errors_of_record(
+                        relation, records_errors)
+        return errors
+
+    def get_errors_of_record(self, record_name, records_errors):
+        """
+        This function will return errors of record found before or check it
+        :param record_name: name of the record
+        :param records_errors: dict with record names as keys and results of
+        get_record_errors as values
+        :return: list of (relation, error) tuples
+        """
+        if record_name in records_errors:
+            return list(records_errors[record_name])
+        return self.get_record_errors(record_name)
+
+    def add_loop_error(self, loop, results_holder):
+        """
+        This function will add error about records referring to each other
+        in a loop, organisms that are parents of each other or of themselves
+        are already reported by check_parents
+        :param loop: names of records in the loop, the last one refers to
+        the first one
+        :param results_holder: list to save (relation, error) tuples to
+        """
+        if len(loop) <= 2 and all(
+                convert_to_snake_case(self.nodes[name]['material']) ==
+                'organism' for name in loop):
+            return
+        results_holder.append((
+            loop[0],
+            f"Relationships part: relationships loop "
+            f"{' -> '.join(loop + [loop[0]])}"))
@@ -1,177 +1,139 @@
-from metadata_validation_conversion.constants import ALLOWED_SAMPLES_TYPES, \
-    ALLOWED_RELATIONSHIPS
-from metadata_validation_conversion.helpers import convert_to_snake_case
-from .helpers import get_record_name, get_record_structure
+from metadata_validation_conversion.ena_client import find_accessions
+from .RelationshipGraph import RelationshipGraph
 from .get_biosample_data_async import fetch_biosample_data_for_ids
-import requests
-import json
 
 class RelationshipsIssues:
-    def __init__(self, json_to_test, validation_type, structure, action):
+    def __init__(self, json_to_test, validation_type, validation_document,
+                 action, issue_counters=None):
         self.json_to_test = json_to_test
         self.validation_type = validation_type
-        self.structure = structure
+        self.validation_document = validation_document
         self.action = action
+        # IssueCounters object to count added errors in
+        self.issue_counters = issue_counters
 
     def collect_relationships_issues(self):
-        relationships = dict()
-        biosamples_ids_to_call = set()
-        validation_document = dict()
-
-        # In first iteration need to collect all relationships
+        """
+        This function will add relationships issues to validation document
+        :return: validation document with issues
+        """
         if self.validation_type == 'samples':
-            for name, url in ALLOWED_SAMPLES_TYPES.items():
-                if name in self.json_to_test:
-                    new_relationships, biosample_ids, validation_document[name] = \
-                        self.collect_relationships(name)
-                    relationships.update(new_relationships)
-                    biosamples_ids_to_call.update(biosample_ids)
-            biosample_data = fetch_biosample_data_for_ids(biosamples_ids_to_call)
-            return self.check_relationships(relationships, biosample_data,
-                                            validation_document)
+            relationship_graph = self.collect_all_relationships()
+            relationship_graph.add_biosample_data(
+                fetch_biosample_data_for_ids(relationship_graph.biosample_ids))
+            return self.check_relationships(relationship_graph,
+                                            self.validation_document)
         elif self.validation_type == 'experiments':
             return self.contextual_validation()
+        return self.validation_document
+
+    def collect_all_relationships(self):
+        """
+        This function will collect relationships of all records
+        :return: RelationshipGraph object, BioSamples entities it refers to
+        are in its biosample_ids
+        """
+        return RelationshipGraph(self.json_to_test, self.action)
 
-    def contextual_validation(self):
+    def contextual_validation(self, control_experiment_errors=None):
         """
         This function will perform contexual validation for experiments
+        :param control_experiment_errors: result of
+        get_control_experiment_errors, collected if it wasn't provided
         :return: record dicts with errors
         """
-        if 'chip-seq_dna-binding_proteins' in self.json_to_test:
-            records = self.json_to_test['chip-seq_dna-binding_proteins']
-            for index, record in enumerate(records):
-                if 'dna-binding_proteins' in record and \
-                    'control_experiment' in record['dna-binding_proteins']:
-                    control_exp = record['dna-binding_proteins']['control_experiment']['value']
-                    if not self.find_control_experiment(control_exp):
-                        error = f"Control experiment {control_exp} " \
-                            f"not found in this submission or in ENA"
-                        self.add_errors_to_relationships(
-                            record['dna-binding_proteins']['control_experiment'], error, 'control_experiment')
-        return self.json_to_test
+        if control_experiment_errors is None:
+            control_experiment_errors = self.get_control_experiment_errors()
+        for index, error in control_experiment_errors:
+            record_to_return = self.validation_document[
+                'chip-seq_dna-binding_proteins'][index]
+            added = self.add_errors_to_relationships(
+                record_to_return['dna-binding_proteins']['control_experiment'],
+                error, 'control_experiment')
+            self.count_errors('chip-seq_dna-binding_proteins', index,
+                              'dna-binding_proteins.control_experiment',
+                              added)
+        return self.validation_document
 
-    def find_control_experiment(self, exp):
-        """
-        This function checks whether control experiment for ChIP-seq 
-        DNA-binding proteins experiments exists within the submission 
-        (check ChIP-seq Input DNA alias) or in ENA (check accession)
-        :return: boolean indicating whether or not the experiment exists
-        """
-        records = self.json_to_test['chip-seq_input_dna']
-        # find control experiment in current submission
-        for index, record in enumerate(records):
-            if record['custom']['experiment_alias']['value'] == exp:
-                return True
-        # find control experiment in existing ENA submission
-        r = requests.get(f'https://www.ebi.ac.uk/ena/browser/api/summary/{exp}')
-        if r.status_code == 200:
-            res = json.loads(r.content)
-            if int(res['total']) > 0:
-                return True
-        return False
+    def get_control_experiment_errors(self):
+        """
+        This function will check that control experiments exist, aliases of
+        this submission are checked first and all other control experiments
+        are looked up in ENA at once
+        :return: list of (record index, error) tuples
+        """
+        errors = list()
+        if 'chip-seq_dna-binding_proteins' not in self.json_to_test:
+            return errors
+        control_experiments = list()
+        for index, record in enumerate(
+                self.json_to_test['chip-seq_dna-binding_proteins']):
+            if 'dna-binding_proteins' in record and \
+                    'control_experiment' in record['dna-binding_proteins']:
+                control_experiments.append((
+                    index, record['dna-binding_proteins'][
+                        'control_experiment']['value']))
+        aliases = self.get_experiment_aliases()
+        # find control experiments in existing ENA submissions
+        ena_accessions = find_accessions(
+            {str(control_exp) for _, control_exp in control_experiments
+             if control_exp not in aliases})
+        for index, control_exp in control_experiments:
+            if control_exp not in aliases and \
+                    str(control_exp) not in ena_accessions:
+                error = f"Control experiment {control_exp} " \
+                    f"not found in this submission or in ENA"
+                errors.append((index, error))
+        return errors
 
-    def collect_relationships(self, name):
-        """
-        This function will collect information about existing relationships and
-        material types for each record
-        :param name: name of the record, ex. 'organism'
-        :return: dict with record_named as key and relationships + material as
-        values
-        """
-        relationships = dict()
-        biosample_ids = set()
-        data_to_return = list()
-        records = self.json_to_test[name]
-        structure_to_use = self.structure[name]
-        for index, record in enumerate(records):
-            module_name = None
-            if name in ['teleostei_embryo', 'teleostei_post-hatching']:
-                module_name = name
-            record_to_return = get_record_structure(structure_to_use, record,
-                                                    module_name)
-            record_name = get_record_name(record, index, name, self.action)
-            relationships.setdefault(record_name, dict())
-            relationship_name = 'child_of' if name == 'organism' else \
-                'derived_from'
-            if relationship_name in record and isinstance(
-                    record[relationship_name], list):
-                tmp = list()
-                for child in record[relationship_name]:
-                    child['value'] = str(child['value'])
-                    if 'SAM' in child['value']:
-                        biosample_ids.add(child['value'])
-                    tmp.append(child['value'])
-                relationships[record_name]['relationships'] = tmp
-            elif relationship_name in record and isinstance(
-                    record[relationship_name], dict):
-                if 'SAM' in record[relationship_name]['value']:
-                    biosample_ids.add(record[relationship_name]['value'])
-                relationships[record_name]['relationships'] = [
-                    record[relationship_name]['value']]
-            relationships[record_name]['material'] = \
-                record['samples_core']['material']['text']
-            if module_name:
-                relationships[record_name]['material'] = module_name
-            if relationship_name == 'child_of':
-                try:
-                    relationships[record_name]['organism'] = \
-                        record['organism']['text']
-                except KeyError:
-                    pass
-            data_to_return.append(record_to_return)
-        return relationships, biosample_ids, data_to_return
+    def get_experiment_aliases(self):
+        """
+        This function will collect aliases of ChIP-seq Input DNA experiments
+        of this submission
+        :return: set of aliases
+        """
+        return {record['custom']['experiment_alias']['value']
+                for record in self.json_to_test.get('chip-seq_input_dna',
+                                                    list())}
 
-    def check_relationships(self, relationships, biosample_data,
-                            validation_document):
+    def check_relationships(self, relationship_graph, validation_document,
+                            records_errors=None):
         """
         This function will check relationships values
-        :param relationships: relationships to check
-        :param biosample_data: relationships to check from biosamples
+        :param relationship_graph: RelationshipGraph object with BioSamples
+        entities added
         :param validation_document: document to send to front-end
+        :param records_errors: dict with record names as keys and results of
+        RelationshipGraph.get_record_errors as values, records that aren't
+        in it are checked
         :return: issues in dict format
         """
-        for k, v in relationships.items():
-            name = convert_to_snake_case(v['material'])
-            record_to_return = self.find_record(validation_document, name, k, self.action)
+        errors = relationship_graph.get_errors(records_errors)
+        for record_name, (name, index) in relationship_graph.records.items():
+            if len(errors[record_name]) == 0:
+                continue
             relationship_name = 'child_of' if name == 'organism' else \
                 'derived_from'
-            relationship_to_return = record_to_return[relationship_name]
-            # Don't need to check relationships if 'restricted access' missing term was used
-            if 'relationships' in v and 'restricted access' not in v['relationships']:
-                errors = list()
-                for relation in v['relationships']:
-                    if relation not in relationships and relation not in \
-                            biosample_data:
-                        errors.append(f"Relationships part: no entity "
-                                      f"'{relation}' found")
-                        self.add_errors_to_relationships(
-                            relationship_to_return, errors[-1], relation)
-                    else:
-                        if relation in relationships:
-                            relationships_to_check = relationships
-                        elif relation in biosample_data:
-                            relationships_to_check = biosample_data
-                        current_material = convert_to_snake_case(v['material'])
-                        relation_material = convert_to_snake_case(
-                            relationships_to_check[relation]['material'])
-                        if current_material == 'organism' and \
-                                relation_material == 'organism':
-                            self.check_parents(
-                                k, v, relation,
-                                relationships_to_check[relation],
-                                errors, relationship_to_return)
-                        allowed_relationships = ALLOWED_RELATIONSHIPS[
-                            current_material]
-                        if relation_material not in allowed_relationships:
-                            errors.append(
-                                f"Relationships part: referenced entity '"
-                                f"{relation}' does not match condition '"
-                                f"should be "
-                                f"{' or '.join(allowed_relationships)}'")
-                            self.add_errors_to_relationships(
-                                relationship_to_return, errors[-1], relation)
+            relationship_to_return = \
+                validation_document[name][index][relationship_name]
+            for relation, error in errors[record_name]:
+                added = self.add_errors_to_relationships(
+                    relationship_to_return, error, relation)
+                self.count_errors(name, index, relationship_name, added)
         return validation_document
 
+    def count_errors(self, name, index, field_name, number):
+        """
+        This function will count errors added to record
+        :param name: name of the record type
+        :param index: index of the record
+        :param field_name: name of the field errors were added to
+        :param number: number of added errors
+        """
+        if self.issue_counters is not None and number > 0:
+            self.issue_counters.add_issues(name, index, field_name, 'errors',
+                                           number)
+
     @staticmethod
     def add_errors_to_relationships(relationship_to_return, error, relation):
         """
@@ -180,63 +142,16 @@ class RelationshipsIssues:
         :param relationship_to_return: data that goes to front-end
         :param error: error to add
         :param relation: sample name
-        :return:
+        :return: number of added errors
         """
         if isinstance(relationship_to_return, dict):
             relationship_to_return.setdefault('errors', list())
             relationship_to_return['errors'].append(error)
-        else:
-            for index, entity in enumerate(relationship_to_return):
-                if str(entity['value']) == relation:
-                    relationship_to_return[index].setdefault('errors', list())
-                    relationship_to_return[index]['errors'].append(error)
-
-    def check_parents(self, current_organism_name, current_organism_value,
-                      relation_organism_name, relation_organism_value,
-                      results_holder, relationship_to_return):
-        """
-        This function will perform parent-child relationships checks
-        :param current_organism_name: name of current organism
-        :param current_organism_value: values of current organism
-        :param relation_organism_name: name of relation organism
-        :param relation_organism_value: values of relation organism
-        :param results_holder: variable to save results to
-        :param relationship_to_return: relationships that goes to front-end
-        """
-        if current_organism_value['organism'] != \
-                relation_organism_value['organism']:
-            results_holder.append(
-                f"Relationships part: the specie of the child "
-                f"'{current_organism_value['organism']}' doesn't match the "
-                f"specie of the parent '{relation_organism_value['organism']}'")
-            self.add_errors_to_relationships(
-                relationship_to_return, results_holder[-1],
-                relation_organism_name)
-        if 'relationships' in relation_organism_value and  \
-                current_organism_name in \
-                relation_organism_value['relationships']:
-            results_holder.append(f"Relationships part: parent "
-                                  f"'{relation_organism_name}' is listing "
-                                  f"the child as its parent")
-            self.add_errors_to_relationships(
-                relationship_to_return, results_holder[-1],
-                relation_organism_name
-            )
-
-    @staticmethod
-    def find_record(validation_document, material, name, action):
-        """
-        This function will find particular record to update from whole document
-        :param validation_document: document to search in
-        :param material: material to use
-        :param name: name of the record
-        :param action: indicates whether it's a new submission or update
-        :return: record to update relationships
-        """
-        col_name = 'sample_name'
-        if action == 'update':
-            col_name = 'biosample_id'
-
-        for record in validation_document[material]:
-            if record['custom'][col_name]['value'] == name:
-                return record
+            return 1
+        added = 0
+        for index, entity in enumerate(relationship_to_return):
+            if str(entity['value']) == relation:
+                relationship_to_return[index].setdefault('errors', list())
+                relationship_to_return[index]['errors'].append(error)
+                added += 1
+        return added
@@ -0,0 +1,102 @@
+from functools import lru_cache
+from types import MappingProxyType
+
+from metadata_validation_conversion.constants import SKIP_PROPERTIES, \
+    MISSING_VALUES
+from metadata_validation_conversion.schema_cache import schema_cache, \
+    get_schema
+
+
+class RulePlan:
+    """
+    Everything additional checks need from one rules json, compiled once per
+    schema version, so checks of every record only look fields up in dicts
+    and sets; plans are shared between threads, so they are read-only
+    """
+    __slots__ = ('fields', 'recommended_fields', 'missing_values',
+                 'ontology_names')
+
+    def __init__(self, json_to_parse):
+        """
+        :param json_to_parse: json-schema to compile, empty plan if None
+        """
+        fields = {'mandatory': list(), 'recommended': list(),
+                  'optional': list()}
+        ontology_names = dict()
+        properties = dict() if json_to_parse is None else \
+            json_to_parse['properties']
+        for field_name, field_value in properties.items():
+            if field_name in SKIP_PROPERTIES:
+                continue
+            if field_value['type'] == 'object':
+                field_properties = field_value['properties']
+            elif field_value['type'] == 'array':
+                field_properties = field_value['items']['properties']
+            else:
+                continue
+            field_type = field_properties['mandatory']['const']
+            if field_type in fields:
+                fields[field_type].append(field_name)
+            if self.check_ontology_field(field_properties, 'const'):
+                ontology_names[field_name] = (
+                    field_properties['ontology_name']['const'].lower(),)
+            elif self.check_ontology_field(field_properties, 'enum'):
+                ontology_names[field_name] = tuple(
+                    term.lower() for term in
+                    field_properties['ontology_name']['enum'])
+        # lists keep order of schema, so issues are added in the same order
+        self.fields = MappingProxyType(
+            {field_type: tuple(field_names)
+             for field_type, field_names in fields.items()})
+        self.recommended_fields = self.fields['recommended']
+        # field name -> missing values that are errors and warnings for it
+        missing_values = dict()
+        for field_type in ['optional', 'recommended', 'mandatory']:
+            for field_name in fields[field_type]:
+                missing_values[field_name] = MISSING_VALUES[field_type]
+        self.missing_values = MappingProxyType(missing_values)
+        self.ontology_names = MappingProxyType(ontology_names)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("Rule plan can't be changed")
+        super().__setattr__(name, value)
+
+    @staticmethod
+    def check_ontology_field(dict_to_check, label_to_check):
+        """
+        This function will test that this dict has ontology terms to check
+        :param dict_to_check: dict to check
+        :param label_to_check: label to check
+        :return: True if this is ontology field and False otherwise
+        """
+        if 'text' in dict_to_check and 'term' in dict_to_check and \
+                label_to_check in dict_to_check['ontology_name']:
+            return True
+        return False
+
+
+EMPTY_RULE_PLAN = RulePlan(None)
+
+
+def get_rule_plan(url):
+    """
+    This function will return compiled rules for url, plan is compiled again
+    only when schema changes
+    :param url: url of schema, None if there are no such rules
+    :return: RulePlan object
+    """
+    if url is None:
+        return EMPTY_RULE_PLAN
+    return compile_rule_plan(url, schema_cache.get_digest(url))
+
+
+@lru_cache(maxsize=128)
+def compile_rule_plan(url, digest):
+    """
+    This function will compile rules json, it's cached per worker process
+    :param url: url of schema
+    :param digest: digest of schema content, so new version gets new plan
+    :return: RulePlan object
+    """
+    return RulePlan(get_schema(url))
@@ -0,0 +1,208 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .ElixirValidatorResults import ElixirValidatorResults
+from .IssueCounters import IssueCounters
+from .RelationshipsIssues import RelationshipsIssues
+from .WarningsAndAdditionalChecks import WarningsAndAdditionalChecks
+from .get_biosample_data_async import fetch_biosample_data_for_ids
+from .get_ontology_text_async import fetch_text_for_ids
+from .helpers import validate_batch, get_validation_document
+from .results_cache import get_records_keys, get_cached_records, \
+    cache_records, get_relationships_key, get_cached_relationships_errors, \
+    cache_relationships_errors
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationEngine:
+    """
+    Runs all checks in one pass: structure of every record is created once
+    and all checks add their issues to it, while calls to validator, OLS,
+    BioSamples and ENA are made at the same time, records that were already
+    checked in the same form are taken from validation cache
+    """
+    def __init__(self, json_to_test, rules_type, structure, action,
+                 records_to_check=None):
+        """
+        :param json_to_test: json to test
+        :param rules_type: type of rules: samples, experiments or analyses
+        :param structure: structure of original template
+        :param action: could be 'submission' or 'update'
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values to check only part of records, all records are
+        checked if it is None
+        """
+        self.json_to_test = json_to_test
+        self.rules_type = rules_type
+        self.structure = structure
+        self.action = action
+        self.records_to_check = records_to_check
+        # numbers of issues, updated by every check that adds them
+        self.issue_counters = IssueCounters()
+
+    def run_validation(self):
+        """
+        This function will run all checks
+        :return: validation document with all issues
+        """
+        validation_document = get_validation_document(
+            self.json_to_test, self.rules_type, self.structure)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            relationships_check = self.start_relationships_check(
+                validation_document, executor)
+            self.check_records(validation_document, executor)
+            self.finish_relationships_check(validation_document,
+                                            *relationships_check)
+        return validation_document
+
+    def run_records_validation(self):
+        """
+        This function will run checks of records_to_check that don't depend
+        on other records
+        :return: validation document, records that weren't checked are None
+        """
+        validation_document = get_validation_document(
+            self.json_to_test, self.rules_type, self.structure,
+            self.records_to_check)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.check_records(validation_document, executor)
+        return validation_document
+
+    def run_relationships_validation(self, validation_document):
+        """
+        This function will add relationships issues of all records to
+        validation document
+        :param validation_document: document with issues of all records
+        :return: validation document with all issues
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            relationships_check = self.start_relationships_check(
+                validation_document, executor)
+            self.finish_relationships_check(validation_document,
+                                            *relationships_check)
+        return validation_document
+
+    def check_records(self, validation_document, executor):
+        """
+        This function will add issues found by schema validation, warnings
+        and additional checks to validation document
+        :param validation_document: document to add issues to
+        :param executor: executor to make remote calls at the same time
+        """
+        # Only records that changed since the last check are checked again
+        records_keys = get_records_keys(self.json_to_test, self.rules_type,
+                                        self.structure, self.records_to_check)
+        cached_records = get_cached_records(records_keys)
+        records_to_check = dict()
+        for (name, index) in records_keys:
+            if (name, index) in cached_records:
+                validation_document[name][index] = \
+                    cached_records[(name, index)]
+            else:
+                records_to_check.setdefault(name, set()).add(index)
+        logger.info(f"Reused validation results of {len(cached_records)} "
+                    f"out of {len(records_keys)} records")
+
+        elixir_validation_results = ElixirValidatorResults(
+            self.json_to_test, self.rules_type, validation_document)
+        additional_checks_object = WarningsAndAdditionalChecks(
+            self.json_to_test, self.rules_type, validation_document)
+
+        # Schemas and breeds that aren't in breed index are validated in one
+        # batch
+        items, destinations = elixir_validation_results.get_validation_items(
+            records_to_check)
+        breeds_items, breeds_destinations = \
+            additional_checks_object.get_breeds_items(records_to_check)
+        breeds_results = additional_checks_object.get_local_breeds_results(
+            records_to_check)
+        validation_future = executor.submit(validate_batch,
+                                            items + breeds_items)
+        ontology_future = executor.submit(
+            fetch_text_for_ids,
+            additional_checks_object.get_ontology_ids(records_to_check))
+
+        # Issues are added in the same order as checks were run before
+        validation_results = validation_future.result()
+        ontology_ids = ontology_future.result()
+        elixir_validation_results.attach_validation_results(
+            destinations, validation_results[:len(items)])
+        breeds_results.update(zip(breeds_destinations,
+                                  validation_results[len(items):]))
+        additional_checks_object.collect_warnings_and_additional_checks(
+            ontology_ids, breeds_results, records_to_check)
+        for name, index in records_keys:
+            self.issue_counters.add_record(name, index,
+                                           validation_document[name][index])
+        # Relationships depend on other records, so they are cached
+        # separately
+        cache_records(records_keys,
+                      [(name, index) for name, indexes in
+                       records_to_check.items() for index in indexes],
+                      self.json_to_test, self.rules_type,
+                      validation_document, ontology_ids)
+
+    def start_relationships_check(self, validation_document, executor):
+        """
+        This function will start remote calls relationships checks need
+        :param validation_document: document to add issues to
+        :param executor: executor to make remote calls in
+        :return: RelationshipsIssues object, RelationshipGraph object and
+        future of remote calls
+        """
+        relationships_issues_object = RelationshipsIssues(
+            self.json_to_test, self.rules_type, validation_document,
+            self.action, self.issue_counters)
+        relationship_graph, relationships_future = None, None
+        if self.rules_type == 'samples':
+            relationship_graph = \
+                relationships_issues_object.collect_all_relationships()
+            relationships_future = executor.submit(
+                fetch_biosample_data_for_ids, relationship_graph.biosample_ids)
+        elif self.rules_type == 'experiments':
+            relationships_future = executor.submit(
+                relationships_issues_object.get_control_experiment_errors)
+        return relationships_issues_object, relationship_graph, \
+            relationships_future
+
+    def finish_relationships_check(self, validation_document,
+                                   relationships_issues_object,
+                                   relationship_graph, relationships_future):
+        """
+        This function will add relationships issues to validation document
+        :param validation_document: document to add issues to
+        :param relationships_issues_object: RelationshipsIssues object
+        :param relationship_graph: RelationshipGraph object
+        :param relationships_future: future of remote calls
+        """
+        if self.rules_type == 'samples':
+            relationship_graph.add_biosample_data(relationships_future.result())
+            relationships_issues_object.check_relationships(
+                relationship_graph, validation_document,
+                self.get_relationships_errors(relationship_graph))
+        elif self.rules_type == 'experiments':
+            relationships_issues_object.contextual_validation(
+                relationships_future.result())
+
+    def get_relationships_errors(self, relationship_graph):
+        """
+        This function will return relationships issues of all records,
+        records whose relationships didn't change are taken from cache
+        :param relationship_graph: RelationshipGraph object with BioSamples
+        entities added
+        :return: dict with record names as keys and lists of (relation,
+        error) tuples as values
+        """
+        relationships_keys = {
+            record_name: get_relationships_key(self.action, record_name,
+                                               relationship_graph)
+            for record_name in relationship_graph.nodes}
+        records_errors = get_cached_relationships_errors(relationships_keys)
+        new_errors = {
+            record_name: relationship_graph.get_record_errors(record_name)
+            for record_name in relationship_graph.nodes
+            if record_name not in records_errors}
+        cache_relationships_errors(relationships_keys, new_errors)
+        records_errors.update(new_errors)
+        return records_errors
@@ -1,256 +1,246 @@
 import datetime
-from metadata_validation_conversion.constants import ALLOWED_SAMPLES_TYPES, \
-    SKIP_PROPERTIES, MISSING_VALUES, SPECIES_BREED_LINKS, \
-    ALLOWED_EXPERIMENTS_TYPES, ALLOWED_ANALYSES_TYPES, \
-    CHIP_SEQ_INPUT_DNA_URL, CHIP_SEQ_DNA_BINDING_PROTEINS_URL, \
-    TELEOSTEI_EMBRYO_URL, TELEOSTEI_POST_HATCHING_URL
-from metadata_validation_conversion.helpers import get_rules_json
-from .get_ontology_text_async import collect_ids
-from .helpers import validate, get_record_structure
+from metadata_validation_conversion.constants import SKIP_PROPERTIES, \
+    SPECIES_BREED_LINKS, MODULE_RULES
+from metadata_validation_conversion.helpers import get_rules_urls
+from .breed_index import get_breed_index
+from .get_ontology_text_async import get_ids, fetch_text_for_ids
+from .RulePlan import get_rule_plan
+from .helpers import validate_batch, get_allowed_types, get_module_name, \
+    is_record_to_check
 
 
 class WarningsAndAdditionalChecks:
-    def __init__(self, json_to_test, rules_type, structure):
+    def __init__(self, json_to_test, rules_type, validation_document):
         self.json_to_test = json_to_test
         self.rules_type = rules_type
-        self.structure = structure
+        self.validation_document = validation_document
 
-    def collect_warnings_and_additional_checks(self):
-        validation_document = dict()
+    def collect_warnings_and_additional_checks(self, ontology_ids=None,
+                                               breeds_results=None,
+                                               records_to_check=None):
+        """
+        This function will add warnings and results of additional checks to
+        validation document
+        :param ontology_ids: dict with ols records as values and ols ids as
+        keys, fetched from OLS if it wasn't provided
+        :param breeds_results: validation results for items returned by
+        get_breeds_items, breeds are validated if it wasn't provided
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values, all records are checked if it is None
+        :return: validation document with issues
+        """
+        if ontology_ids is None:
+            ontology_ids = fetch_text_for_ids(
+                self.get_ontology_ids(records_to_check))
+        if breeds_results is None:
+            breeds_items, breeds_destinations = self.get_breeds_items(
+                records_to_check)
+            breeds_results = self.get_local_breeds_results(records_to_check)
+            breeds_results.update(zip(breeds_destinations,
+                                      validate_batch(breeds_items)))
+
+        # Do additional checks
+        for name, url in get_allowed_types(self.rules_type).items():
+            if name in self.json_to_test:
+                self.do_additional_checks(url, name, ontology_ids,
+                                          breeds_results, records_to_check)
+        return self.validation_document
+
+    def get_core_name(self):
+        """
+        This function will return name of core fields
+        :return: name of core fields or None for analyses
+        """
         if self.rules_type == 'samples':
-            allowed_types = ALLOWED_SAMPLES_TYPES
+            return 'samples_core'
         elif self.rules_type == 'experiments':
-            allowed_types = ALLOWED_EXPERIMENTS_TYPES
-        else:
-            allowed_types = ALLOWED_ANALYSES_TYPES
+            return 'experiments_core'
+        return None
 
-        # Do additional checks
-        for name, url in allowed_types.items():
+    def get_ontology_ids(self, records_to_check=None):
+        """
+        This function will collect term_ids of all records
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values, all records are checked if it is None
+        :return: set of term_ids
+        """
+        ids = set()
+        for name in get_allowed_types(self.rules_type):
             if name in self.json_to_test:
-                validation_document[name] = self.do_additional_checks(url, name)
-        return validation_document
+                records = [
+                    record for index, record in
+                    enumerate(self.json_to_test[name])
+                    if is_record_to_check(records_to_check, name, index)]
+                ids.update(get_ids(records, self.get_core_name(),
+                                   get_module_name(name)))
+        return ids
+
+    def get_breeds_items(self, records_to_check=None):
+        """
+        This function will collect breeds that should be checked against
+        species remotely, so they could be validated together with other
+        objects, breeds of species from breed index aren't collected
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values, all records are checked if it is None
+        :return: list of (data, schema) tuples and list of (record type,
+        record index) tuples
+        """
+        items = list()
+        destinations = list()
+        schemas = dict()
+        index_classes = get_breed_index() or dict()
+        for index, breed_term, species_class in self.get_breeds_to_check(
+                records_to_check):
+            if species_class in index_classes:
+                continue
+            if species_class not in schemas:
+                schemas[species_class] = {
+                    "type": "string",
+                    "graph_restriction": {
+                        "ontologies": ["obo:lbo"],
+                        "classes": [f"{species_class}"],
+                        "relations": ["rdfs:subClassOf"],
+                        "direct": False,
+                        "include_self": True
+                    }
+                }
+            items.append((breed_term, schemas[species_class]))
+            destinations.append(('organism', index))
+        return items, destinations
+
+    def get_local_breeds_results(self, records_to_check=None):
+        """
+        This function will check breeds of species from breed index without
+        network calls
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values, all records are checked if it is None
+        :return: dict with (record type, record index) as keys and results in
+        the same format validator returns as values
+        """
+        results = dict()
+        index_classes = get_breed_index() or dict()
+        for index, breed_term, species_class in self.get_breeds_to_check(
+                records_to_check):
+            if species_class not in index_classes:
+                continue
+            if breed_term in index_classes[species_class]:
+                results[('organism', index)] = (list(), list())
+            else:
+                results[('organism', index)] = (
+                    [f"Term {breed_term} is not a child of {species_class}"],
+                    [''])
+        return results
 
-    def do_additional_checks(self, url, name):
+    def get_breeds_to_check(self, records_to_check=None):
+        """
+        This function will collect breeds of organisms with known species
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values, all records are checked if it is None
+        :return: list of (record index, breed term, LBO class of species)
+        tuples
+        """
+        breeds = list()
+        if 'organism' not in self.json_to_test \
+                or 'organism' not in get_allowed_types(self.rules_type):
+            return breeds
+        for index, record in enumerate(self.json_to_test['organism']):
+            if not is_record_to_check(records_to_check, 'organism', index):
+                continue
+            try:
+                organism_term = record['organism']['term']
+            except KeyError:
+                continue
+            if organism_term not in SPECIES_BREED_LINKS:
+                continue
+            breeds.append((index, record['breed']['term'],
+                           SPECIES_BREED_LINKS[organism_term]))
+        return breeds
+
+    def do_additional_checks(self, url, name, ontology_ids, breeds_results,
+                             records_to_check=None):
         """
         This function will return warning if recommended fields is not present
         in record
         :param url: schema url for this record
         :param name: name of the record
-        :return: warnings
+        :param ontology_ids: dict with ols records as values and ols ids as
+        keys
+        :param breeds_results: dict with (record type, record index) as keys
+        and breed validation results as values
+        :param records_to_check: dict with record types as keys and sets of
+        indexes as values, all records are checked if it is None
         """
         records = self.json_to_test[name]
-        structure_to_use = self.structure[name]
-        data_to_return = list()
-        if name == 'chip-seq_input_dna':
-            samples_type_json, samples_core_json, samples_module_json = \
-                get_rules_json(url, self.rules_type, CHIP_SEQ_INPUT_DNA_URL)
-            module_name = name.split("chip-seq_")[-1]
-        elif name == 'chip-seq_dna-binding_proteins':
-            samples_type_json, samples_core_json, samples_module_json = \
-                get_rules_json(url, self.rules_type,
-                               CHIP_SEQ_DNA_BINDING_PROTEINS_URL)
+        # rules are compiled once per schema version, not for every sheet
+        urls = get_rules_urls(url, self.rules_type, MODULE_RULES.get(name))
+        type_plan = get_rule_plan(urls[0])
+        core_plan = get_rule_plan(urls[1] if len(urls) > 1 else None)
+        module_plan = get_rule_plan(urls[2] if len(urls) > 2 else None)
+        if name in ['chip-seq_input_dna', 'chip-seq_dna-binding_proteins']:
             module_name = name.split("chip-seq_")[-1]
-        elif name == 'teleostei_embryo':
-            samples_type_json, samples_core_json, samples_module_json = \
-                get_rules_json(url, self.rules_type, TELEOSTEI_EMBRYO_URL)
+        elif name in ['teleostei_embryo', 'teleostei_post-hatching']:
             module_name = name
-        elif name == 'teleostei_post-hatching':
-            samples_type_json, samples_core_json, samples_module_json = \
-                get_rules_json(url, self.rules_type,
-                               TELEOSTEI_POST_HATCHING_URL)
-            module_name = name
-        elif name in ['faang', 'ena', 'eva']:
-            samples_type_json = get_rules_json(url, self.rules_type)
-            samples_core_json, samples_module_json, module_name = \
-                None, None, None
-        else:
-            samples_type_json, samples_core_json = get_rules_json(
-                url, self.rules_type)
-            samples_module_json, module_name = None, None
-
-        if self.rules_type == 'samples':
-            core_name = 'samples_core'
-        elif self.rules_type == 'experiments':
-            core_name = 'experiments_core'
         else:
-            core_name = None
-
-        # Collect list of all fields
-        fields = dict()
-        json_files = {
-            'core': samples_core_json,
-            'type': samples_type_json
-        }
-        try:
-            json_files['module'] = samples_module_json
-        except NameError:
-            pass
-        for field in ['mandatory', 'recommended', 'optional']:
-            for json_type, json_file in json_files.items():
-                fields.setdefault(field, dict())
-                fields[field][json_type] = self.collect_fields(json_file, field)
-
-        ontology_names_type = self.collect_ontology_names(samples_type_json)
-        ontology_names_core = self.collect_ontology_names(samples_core_json)
-        ontology_names_module = self.collect_ontology_names(samples_module_json)
-
-        ontology_ids = collect_ids(records, core_name, module_name)
-
-        for index, record in enumerate(records):
+            module_name = None
+        core_name = self.get_core_name()
+
+        sections = [(core_name, 'core', core_plan),
+                    (None, 'type', type_plan),
+                    (module_name, 'module', module_plan)]
+        sections = [section for section in sections
+                    if section[1] == 'type' or section[0] is not None]
+        indexes = [index for index in range(len(records))
+                   if is_record_to_check(records_to_check, name, index)]
+
+        for index in indexes:
+            record = records[index]
             # Get inner issues structure
-            record_to_return = get_record_structure(structure_to_use, record,
-                                                    module_name)
-
-            if core_name is not None:
-                # Check that recommended fields are present for core fields
-                self.check_recommended_fields(
-                    record[core_name], fields['recommended']['core'],
-                    record_to_return[core_name])
-
-                # Check that ontology text is consistent with ontology term for
-                # core fields
-                self.check_ontology_text(record[core_name], ontology_ids,
-                                         record_to_return[core_name],
-                                         ontology_names_core)
-
-                # Check that date value is consistent with date units for core
-                # fields
-                self.check_date_units(record[core_name],
-                                      record_to_return[core_name])
-
-                # Check that data has special missing values for core fields
-                self.check_missing_values(record[core_name],
-                                          record_to_return[core_name],
-                                          fields['mandatory']['core'],
-                                          fields['recommended']['core'],
-                                          fields['optional']['core'])
-
-            # Check that recommended fields are present for type fields
-            self.check_recommended_fields(
-                record, fields['recommended']['type'], record_to_return)
-
-            # Check that ontology text is consistent with ontology term for
-            # type fields
-            self.check_ontology_text(record, ontology_ids, record_to_return,
-                                     ontology_names_type)
-
-            # Check that date value is consistent with date units for type
-            # fields
-            self.check_date_units(record, record_to_return)
-
-            # Check that data has special missing values for type fields
-            self.check_missing_values(record, record_to_return,
-                                      fields['mandatory']['type'],
-                                      fields['recommended']['type'],
-                                      fields['optional']['type'])
-            if module_name is not None:
-                # Check that recommended fields are present for core fields
-                self.check_recommended_fields(
-                    record[module_name], fields['recommended']['module'],
-                    record_to_return[module_name])
-
-                # Check that ontology text is consistent with ontology term for
-                # core fields
-                self.check_ontology_text(record[module_name], ontology_ids,
-                                         record_to_return[module_name],
-                                         ontology_names_module)
+            record_to_return = self.validation_document[name][index]
 
-                # Check that date value is consistent with date units for core
-                # fields
-                self.check_date_units(record[module_name],
-                                      record_to_return[module_name])
-
-                # Check that data has special missing values for core fields
-                self.check_missing_values(record[module_name],
-                                          record_to_return[module_name],
-                                          fields['mandatory']['module'],
-                                          fields['recommended']['module'],
-                                          fields['optional']['module'])
+            for section_name, _, rule_plan in sections:
+                if section_name is None:
+                    record_section = record
+                    section_to_return = record_to_return
+                else:
+                    record_section = record[section_name]
+                    section_to_return = record_to_return[section_name]
+                self.check_section(record_section, section_to_return,
+                                   rule_plan, ontology_ids)
 
             # check species breeds consistency
-            if name == 'organism':
-                self.check_breeds(record, record_to_return)
+            if (name, index) in breeds_results:
+                self.check_breeds(record, record_to_return,
+                                  breeds_results[(name, index)])
 
             # Check custom fields for ontology consistence
             self.check_ontology_text(record['custom'], ontology_ids,
                                      record_to_return['custom'])
 
-            data_to_return.append(record_to_return)
-        return data_to_return
-
-    @staticmethod
-    def collect_fields(json_to_check, type_of_fields):
+    def check_section(self, record, record_to_return, rule_plan,
+                      ontology_ids):
         """
-        This function will return list of recommended fields
-        :param json_to_check: json to check for recommended fields
-        :param type_of_fields: type of fields to collect
-        :return: list with recommended fields
+        This function will run row by row checks of one section of record
+        :param record: record section to check (record itself, its core or
+        module fields)
+        :param record_to_return: dict with data that goes to front-end
+        :param rule_plan: RulePlan object with rules of this section
+        :param ontology_ids: dict with ols records as values and ols ids as
+        keys
         """
-        if json_to_check is None:
-            return list()
-        collected_fields = list()
-        for field_name, field_value in json_to_check['properties'].items():
-            if field_name not in SKIP_PROPERTIES:
-                if field_value['type'] == 'object':
-                    if field_value['properties']['mandatory']['const'] == \
-                            type_of_fields:
-                        collected_fields.append(field_name)
-                elif field_value['type'] == 'array':
-                    if field_value['items']['properties']['mandatory'][
-                        'const'] == \
-                            type_of_fields:
-                        collected_fields.append(field_name)
-        return collected_fields
+        # Check that recommended fields are present
+        self.check_recommended_fields(
+            record, rule_plan.recommended_fields, record_to_return)
 
-    def collect_ontology_names(self, json_to_parse):
-        """
-        This function will parse json-schema to get all ontology_names
-        :param json_to_parse: json-schema to parse
-        :return: dict with field name as key and ontology_name as value
-        """
-        if json_to_parse is None:
-            return dict()
-        ontology_names_to_return = dict()
-        for field_name, field_value in json_to_parse['properties'].items():
-            if field_name not in SKIP_PROPERTIES \
-                    and field_value['type'] == 'object':
-                if self.check_ontology_field(field_value['properties'],
-                                             'const'):
-                    ontology_names_to_return[field_name] = [
-                        field_value['properties']['ontology_name'][
-                            'const'].lower()]
-                elif self.check_ontology_field(field_value['properties'],
-                                               'enum'):
-                    ontology_names_to_return[field_name] = [
-                        term.lower() for term in
-                        field_value['properties']['ontology_name']['enum']]
-            elif field_name not in SKIP_PROPERTIES \
-                    and field_value['type'] == 'array':
-                if self.check_ontology_field(
-                        field_value['items']['properties'], 'const'):
-                    ontology_names_to_return[field_name] = [
-                        field_value['items']['properties']['ontology_name'][
-                            'const'].lower()]
-                elif self.check_ontology_field(
-                        field_value['items']['properties'], 'enum'):
-                    ontology_names_to_return[field_name] = [
-                        term.lower() for term in
-                        field_value['items']['properties']['ontology_name'][
-                            'enum']]
-        return ontology_names_to_return
+        # Check that ontology text is consistent with ontology term
+        self.check_ontology_text(record, ontology_ids, record_to_return,
+                                 rule_plan.ontology_names)
 
-    @staticmethod
-    def check_ontology_field(dict_to_check, label_to_check):
-        """
-        This function will test that this dict has ontology terms to check
-        :param dict_to_check: dict to check
-        :param label_to_check: label to check
-        :return: True if this is ontology field and False otherwise
-        """
-        if 'text' in dict_to_check and 'term' in dict_to_check and \
-                label_to_check in dict_to_check['ontology_name']:
-            return True
-        return False
+        # Check that date value is consistent with date units
+        self.check_date_units(record, record_to_return)
+
+        # Check that data has special missing values
+        self.check_missing_values(record, record_to_return,
+                                  rule_plan.missing_values)
 
     @staticmethod
     def check_recommended_fields(record, recommended_fields, record_to_return):
@@ -310,23 +300,30 @@ class WarningsAndAdditionalChecks:
         :return: warnings in str format
         """
         if 'text' in field_value and 'term' in field_value:
-            term_label = list()
+            if field_value['term'] not in ontology_ids:
+                return f"Couldn't check term '{field_value['term']}' in " \
+                       f"OLS, please try again later"
+            field_ontology_names = None if ontology_names is None else \
+                ontology_names[field_name]
+            # Use str in case user provided number
+            text = str(field_value['text']).lower()
+            first_label = None
             for label in ontology_ids[field_value['term']]:
-                if ontology_names is not None \
-                        and label['ontology_name'].lower() \
-                        in ontology_names[field_name]:
-                    term_label.append(label['label'].lower())
-                elif ontology_names is None:
-                    term_label.append(label['label'].lower())
-            if len(term_label) == 0:
+                if field_ontology_names is not None and \
+                        label['ontology_name'].lower() not in \
+                        field_ontology_names:
+                    continue
+                term_label = label['label'].lower()
+                if term_label == text:
+                    return None
+                if first_label is None:
+                    first_label = term_label
+            if first_label is None:
                 return f"Couldn't find label in OLS with these ontology " \
-                       f"names: {ontology_names[field_name]}"
-
-            # Use str in case user provided number
-            if str(field_value['text']).lower() not in term_label:
-                return f"Provided value '{field_value['text']}' doesn't " \
-                       f"precisely match '{term_label[0]}' for term " \
-                       f"'{field_value['term']}'"
+                       f"names: {list(field_ontology_names)}"
+            return f"Provided value '{field_value['text']}' doesn't " \
+                   f"precisely match '{first_label}' for term " \
+                   f"'{field_value['term']}'"
         return None
 
     @staticmethod
@@ -349,57 +346,39 @@ class WarningsAndAdditionalChecks:
                     continue
                 try:
                     datetime.datetime.strptime(field_value['value'], units)
-                except ValueError:
+                except (ValueError, TypeError):
                     record_to_return[field_name].setdefault('errors', list())
                     record_to_return[field_name]['errors'].append(
                         f"Date units: {field_value['units']} should be "
                         f"consistent with date value: {field_value['value']}"
                     )
 
-    def check_missing_values(self, record, record_to_return,
-                             mandatory_fields, recommended_fields,
-                             optional_fields, index=None):
+    def check_missing_values(self, record, record_to_return, missing_values,
+                             index=None):
         """
         This function will check that data contains special missing values
         :param record: record to check
         :param record_to_return: dict with data that goes to front-end
-        :param mandatory_fields: list of mandatory fields
-        :param recommended_fields: list of recommended fields
-        :param optional_fields: list of optional fields
+        :param missing_values: dict with field names as keys and missing
+        values that are errors and warnings for this field as values
         :param index: index of data in array
         """
         for field_name, field_value in record.items():
-            if field_name in SKIP_PROPERTIES:
+            if field_name in SKIP_PROPERTIES or \
+                    field_name not in missing_values:
                 continue
             if isinstance(field_value, list):
                 for i, sub_value in enumerate(field_value):
                     self.check_missing_values({field_name: sub_value},
                                               record_to_return,
-                                              mandatory_fields,
-                                              recommended_fields,
-                                              optional_fields, i)
+                                              missing_values, i)
             else:
+                record_to_return_ref = record_to_return[field_name][index] \
+                    if index is not None else record_to_return[field_name]
                 for k, v in field_value.items():
-                    record_to_return_ref = record_to_return[field_name][index] \
-                        if index is not None else record_to_return[field_name]
-                    if field_name in mandatory_fields:
-                        self.check_single_missing_value(k, v,
-                                                        MISSING_VALUES[
-                                                            'mandatory'],
-                                                        field_name,
-                                                        record_to_return_ref)
-                    elif field_name in recommended_fields:
-                        self.check_single_missing_value(k, v,
-                                                        MISSING_VALUES[
-                                                            'recommended'],
-                                                        field_name,
-                                                        record_to_return_ref)
-                    elif field_name in optional_fields:
-                        self.check_single_missing_value(k, v,
-                                                        MISSING_VALUES[
-                                                            'optional'],
-                                                        field_name,
-                                                        record_to_return_ref)
+                    self.check_single_missing_value(
+                        k, v, missing_values[field_name], field_name,
+                        record_to_return_ref)
 
     @staticmethod
     def check_single_missing_value(key, value, missing_values, field_name,
@@ -426,30 +405,14 @@ class WarningsAndAdditionalChecks:
             )
 
     @staticmethod
-    def check_breeds(record, record_to_return):
+    def check_breeds(record, record_to_return, breed_results):
         """
         This function will check consistence between breed and species
         :param record: record to check
         :param record_to_return: dict to send to front-end
-        :return:
+        :param breed_results: results of breed validation against species
         """
-        try:
-            organism_term = record['organism']['term']
-        except KeyError:
-            return
-        if organism_term not in SPECIES_BREED_LINKS:
-            return
-        schema = {
-            "type": "string",
-            "graph_restriction": {
-                "ontologies": ["obo:lbo"],
-                "classes": [f"{SPECIES_BREED_LINKS[organism_term]}"],
-                "relations": ["rdfs:subClassOf"],
-                "direct": False,
-                "include_self": True
-            }
-        }
-        validation_results, _ = validate(record['breed']['term'], schema)
+        validation_results, _ = breed_results
         if len(validation_results) > 0:
             record_to_return['organism'].setdefault('errors', list())
             record_to_return['organism']['errors'].append(
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from urllib.parse import quote
+
+import aiohttp
+import msgpack
+
+from metadata_validation_conversion.async_helpers import run_async, get_json
+from metadata_validation_conversion.constants import OLS_LBO_TERMS_URL, \
+    OLS_CONCURRENCY, OLS_RETRIES, SPECIES_BREED_LINKS, BREED_INDEX_PATH, \
+    BREED_INDEX_TTL
+
+logger = logging.getLogger(__name__)
+
+BREED_INDEX_VERSION = 1
+# how often workers check whether index file was rebuilt by someone else
+CHECK_INTERVAL = 60
+# how long to wait before rebuilding index again after failure
+RETRY_INTERVAL = 3600
+PAGE_SIZE = 500
+
+breed_index = dict()
+breed_index_lock = threading.Lock()
+
+
+def get_breed_index():
+    """
+    This function will return breeds of every species, index is read from
+    BREED_INDEX_PATH once and read again only when file changes, stale
+    index is rebuilt in background thread and used until then
+    :return: dict with LBO classes of species as keys and sets of their
+    breeds (including class itself) as values, None if there is no index
+    """
+    now = time.time()
+    with breed_index_lock:
+        if now - breed_index.get('checked_at', 0) < CHECK_INTERVAL:
+            return breed_index.get('classes')
+        breed_index['checked_at'] = now
+        try:
+            mtime = os.path.getmtime(BREED_INDEX_PATH)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != breed_index.get('mtime'):
+            try:
+                breed_index['classes'] = read_breed_index()
+                breed_index['mtime'] = mtime
+            except Exception as err:
+                logger.warning(f"Couldn't read breed index: {err!r}")
+        if (mtime is None or now - mtime > BREED_INDEX_TTL) and \
+                not breed_index.get('refreshing') and \
+                now - breed_index.get('failed_at', 0) > RETRY_INTERVAL:
+            breed_index['refreshing'] = True
+            threading.Thread(target=refresh_breed_index, daemon=True).start()
+        return breed_index.get('classes')
+
+
+def refresh_breed_index():
+    """
+    This function will rebuild index in background, errors are only logged
+    as the old index or remote checks are used meanwhile
+    """
+    try:
+        build_breed_index()
+    except Exception as err:
+        logger.warning(f"Couldn't rebuild breed index: {err!r}")
+        with breed_index_lock:
+            breed_index['failed_at'] = time.time()
+    finally:
+        with breed_index_lock:
+            breed_index['refreshing'] = False
+            # read new file on the next call
+            breed_index['checked_at'] = 0
+
+
+def read_breed_index():
+    """
+    This function will read index file
+    :return: dict with LBO classes as keys and sets of breeds as values
+    """
+    with open(BREED_INDEX_PATH, 'rb') as f:
+        index = msgpack.unpackb(zlib.decompress(f.read()), raw=False)
+    if index['version'] != BREED_INDEX_VERSION:
+        raise ValueError(f"Unsupported version {index['version']}")
+    return {lbo_class: frozenset(breeds)
+            for lbo_class, breeds in index['classes'].items()}
+
+
+def build_breed_index():
+    """
+    This function will ask OLS about all breeds of every species from
+    SPECIES_BREED_LINKS and write them into BREED_INDEX_PATH, the file is
+    replaced only when all classes were fetched
+    :return: dict with LBO classes as keys and numbers of breeds as values
+    """
+    classes = dict()
+    run_async(fetch_all_breeds(sorted(set(SPECIES_BREED_LINKS.values())),
+                               classes))
+    packed = msgpack.packb({'version': BREED_INDEX_VERSION,
+                            'built_at': time.time(),
+                            'classes': {lbo_class: sorted(breeds)
+                                        for lbo_class, breeds in
+                                        classes.items()}},
+                           use_bin_type=True)
+    directory = os.path.dirname(BREED_INDEX_PATH) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(zlib.compress(packed, 9))
+        os.replace(tmp_path, BREED_INDEX_PATH)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return {lbo_class: len(breeds) for lbo_class, breeds in classes.items()}
+
+
+async def fetch_all_breeds(lbo_classes, results_to_return):
+    """
+    This function will fetch descendants of all classes, sharing one session
+    :param lbo_classes: LBO classes of species
+    :param results_to_return: holder for sets of breeds of every class
+    """
+    semaphore = asyncio.Semaphore(OLS_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=300)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        await asyncio.gather(*[
+            fetch_breeds(session, semaphore, lbo_class, results_to_return)
+            for lbo_class in lbo_classes])
+
+
+async def fetch_breeds(session, semaphore, lbo_class, results_to_return):
+    """
+    This function will fetch all descendants of LBO class page by page
+    :param session: session to work with
+    :param semaphore: semaphore limiting number of simultaneous calls
+    :param lbo_class: LBO class, ex. 'LBO:0000001'
+    :param results_to_return: holder for sets of breeds of every class
+    """
+    iri = f"http://purl.obolibrary.org/obo/{lbo_class.replace(':', '_')}"
+    # OLS expects double encoded iri
+    url = f"{OLS_LBO_TERMS_URL}/{quote(quote(iri, safe=''), safe='')}/" \
+          f"descendants"
+    breeds = {lbo_class}
+    page = 0
+    total_pages = 1
+    while page < total_pages:
+        status, results = await get_json(
+            session, semaphore, f"{url}?size={PAGE_SIZE}&page={page}",
+            OLS_RETRIES)
+        if results is None:
+            raise ValueError(f"OLS responded with {status} status for "
+                             f"{lbo_class}")
+        for term in results.get('_embedded', dict()).get('terms', list()):
+            if term.get('obo_id'):
+                breeds.add(term['obo_id'])
+        total_pages = results.get('page', dict()).get('totalPages', 0)
+        page += 1
+    results_to_return[lbo_class] = breeds
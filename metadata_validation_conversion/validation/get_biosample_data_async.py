@@ -1,8 +1,4 @@
-import requests
-import aiohttp
-import asyncio
-
-from submission.helpers import get_header
+from metadata_validation_conversion.biosamples_client import fetch_samples
 
 
 def parse_biosample_results(results, results_to_return, my_id):
@@ -27,56 +23,14 @@ def parse_biosample_results(results, results_to_return, my_id):
 
 
 def fetch_biosample_data_for_ids(ids):
-    results = dict()
-    asyncio.new_event_loop().run_until_complete(fetch_all_biosamples(ids,
-                                                                     results))
-    if len(results) < len(ids):
-        for my_id in ids:
-            if my_id not in results:
-                try:
-                    response = requests.get(f"https://www.ebi.ac.uk/biosamples"
-                                            f"/samples/{my_id}").json()
-                    if 'error' not in response:
-                        results.setdefault(my_id, dict())
-                        parse_biosample_results(response, results, my_id)
-                except ValueError:
-                    pass
-    if len(results) < len(ids):
-        for my_id in ids:
-            if my_id not in results:
-                response = requests.get(f"https://www.ebi.ac.uk/biosamples"
-                                        f"/samples/{my_id}",
-                                        headers=get_header()).json()
-                results.setdefault(my_id, dict())
-                parse_biosample_results(response, results, my_id)
-    return results
-
-
-async def fetch_all_biosamples(ids, results_to_return):
     """
-    This function will create tasks for biosample calls
-    :param ids: ids to fetch from biosamples
-    :param results_to_return: holder for results
+    This function will return relationships, material and organism of
+    BioSamples records
+    :param ids: accessions to fetch
+    :return: dict with accessions as keys and parsed records as values
     """
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for my_id in ids:
-            task = asyncio.ensure_future(fetch_biosample(session, my_id,
-                                                         results_to_return))
-            tasks.append(task)
-        await asyncio.gather(*tasks, return_exceptions=True)
-
-
-async def fetch_biosample(session, my_id, results_to_return):
-    """
-    This function will create task to call my_id from biosamples
-    :param session: session to work with
-    :param my_id: term_id to check
-    :param results_to_return: json structure to parse
-    """
-    url = f"https://www.ebi.ac.uk/biosamples/samples/{my_id}"
-    async with session.get(url) as response:
-        results = await response.json()
-        if 'error' not in results:
-            results_to_return.setdefault(my_id, dict())
-            parse_biosample_results(results, results_to_return, my_id)
+    results = dict()
+    for my_id, sample in fetch_samples(ids).items():
+        results.setdefault(my_id, dict())
+        parse_biosample_results(sample, results, my_id)
+    return results
@@ -1,6 +1,21 @@
-import requests
-import aiohttp
 import asyncio
+import logging
+import re
+
+import aiohttp
+
+from metadata_validation_conversion.constants import OLS_SEARCH_URL, \
+    OLS_CACHE_TTL, OLS_NEGATIVE_CACHE_TTL, OLS_CONCURRENCY, OLS_RETRIES
+from metadata_validation_conversion.async_helpers import run_async, get_json
+from metadata_validation_conversion.persistent_cache import PersistentCache
+from metadata_validation_conversion.schema_cache import get_schema, \
+    get_all_rules_urls
+
+logger = logging.getLogger(__name__)
+
+TERM_ID = re.compile('[A-Za-z]+[:_][A-Za-z0-9]+')
+
+ols_cache = PersistentCache('ols', OLS_CACHE_TTL, OLS_NEGATIVE_CACHE_TTL)
 
 
 def parse_record(record):
@@ -26,6 +41,17 @@ def collect_ids(records, core_name=None, module_name=None):
     :param module_name: name of the module fields
     :return: dict with term_ids as keys and ols results as values
     """
+    return fetch_text_for_ids(get_ids(records, core_name, module_name))
+
+
+def get_ids(records, core_name=None, module_name=None):
+    """
+    This function will collect term_ids used by records
+    :param records: records to parse
+    :param core_name: name of the core fields
+    :param module_name: name of the module fields
+    :return: set of term_ids
+    """
     ids = set()
     for record in records:
         if core_name is not None:
@@ -38,53 +64,132 @@ def collect_ids(records, core_name=None, module_name=None):
             ids.add(parse_record(value))
         for _, value in record['custom'].items():
             ids.add(parse_record(value))
-    results = fetch_text_for_ids(ids)
-    return results
+    return ids
 
 
 def fetch_text_for_ids(ids):
     """
-    This function will start async calls to OLS to get results for term_ids
+    This function will return OLS results for term_ids, taking them from
+    cache and asking OLS only for terms that aren't cached
     :param ids: ids to call
-    :return: dict with term_ids as keys and ols results as values
+    :return: dict with term_ids as keys and ols results as values, terms OLS
+    couldn't be asked about are missing
     """
+    ids = {my_id for my_id in ids if my_id}
+    # OLS is asked the same way for 'UBERON:0000178' and 'UBERON_0000178'
+    cached_results = ols_cache.get_many({get_cache_key(my_id)
+                                         for my_id in ids})
     results = dict()
-    asyncio.new_event_loop().run_until_complete(fetch_all_terms(ids, results))
-    # Not all ids can get through OLS because of bandwidth, so do sync calls
-    if len(results) < len(ids):
-        for my_id in ids:
-            if my_id and my_id not in results:
-                results[my_id] = requests.get(
-                    f"http://www.ebi.ac.uk/ols/api/search?q={my_id.replace(':', '_')}"
-                ).json()['response']['docs']
+    ids_to_fetch = set()
+    for my_id in ids:
+        if get_cache_key(my_id) in cached_results:
+            results[my_id] = cached_results[get_cache_key(my_id)]
+        else:
+            ids_to_fetch.add(my_id)
+    if len(ids_to_fetch) == 0:
+        return results
+    fetched_results = dict()
+    run_async(fetch_all_terms(ids_to_fetch, fetched_results))
+    ols_cache.set_many({get_cache_key(my_id): docs
+                        for my_id, docs in fetched_results.items()
+                        if len(docs) > 0})
+    # remember terms OLS doesn't know as well
+    ols_cache.set_many({get_cache_key(my_id): docs
+                        for my_id, docs in fetched_results.items()
+                        if len(docs) == 0}, negative=True)
+    results.update(fetched_results)
+    if len(fetched_results) < len(ids_to_fetch):
+        logger.warning(f"Couldn't get {len(ids_to_fetch) - len(fetched_results)}"
+                       f" terms from OLS")
     return results
 
 
+def get_cache_key(my_id):
+    """
+    This function will return key of term_id inside cache
+    :param my_id: term_id
+    :return: key
+    """
+    return my_id.replace(':', '_')
+
+
 async def fetch_all_terms(ids, results_to_return):
     """
-    This function will create tasks for ols calls
+    This function will create tasks for ols calls, sharing one session and
+    limiting number of simultaneous calls
     :param ids: ids to fetch from ols
     :param results_to_return: holder for results
     """
-    async with aiohttp.ClientSession() as session:
+    semaphore = asyncio.Semaphore(OLS_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
         tasks = []
         for my_id in ids:
-            task = asyncio.ensure_future(fetch_term(session, my_id,
+            task = asyncio.ensure_future(fetch_term(session, semaphore, my_id,
                                                     results_to_return))
             tasks.append(task)
-        await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    for my_id, result in zip(ids, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Couldn't get {my_id} from OLS: {result!r}")
 
 
-async def fetch_term(session, my_id, results_to_return):
+async def fetch_term(session, semaphore, my_id, results_to_return):
     """
     This function will create task to call my_id from OLS
     :param session: session to work with
+    :param semaphore: semaphore limiting number of simultaneous calls
     :param my_id: term_id to check
     :param results_to_return: json structure to parse
     """
-    if my_id:
-        url = f"http://www.ebi.ac.uk/ols/api/search?q={my_id.replace(':', '_')}&rows=100"
-        async with session.get(url) as response:
-            results = await response.json()
-            if results and 'response' in results and 'docs' in results['response']:
-                results_to_return[my_id] = results['response']['docs']
+    url = f"{OLS_SEARCH_URL}?q={my_id.replace(':', '_')}&rows=100"
+    status, results = await get_json(session, semaphore, url, OLS_RETRIES)
+    if results is None:
+        raise ValueError(f"OLS responded with {status} status")
+    docs = list()
+    if 'response' in results and 'docs' in results['response']:
+        docs = results['response']['docs']
+    results_to_return[my_id] = docs
+
+
+def collect_terms_from_rules(rules_json, terms=None):
+    """
+    This function will collect all term_ids mentioned in rules: allowed
+    values of term fields and classes of graph restrictions
+    :param rules_json: rules to parse
+    :param terms: holder for terms
+    :return: set of term_ids
+    """
+    if terms is None:
+        terms = set()
+    if isinstance(rules_json, dict):
+        for key, value in rules_json.items():
+            if key == 'term' and isinstance(value, dict):
+                for term in value.get('enum', list()) + [value.get('const')]:
+                    if isinstance(term, str) and TERM_ID.fullmatch(term):
+                        terms.add(term)
+            elif key == 'graph_restriction' and isinstance(value, dict):
+                for term in value.get('classes', list()):
+                    if isinstance(term, str) and TERM_ID.fullmatch(term):
+                        terms.add(term)
+            collect_terms_from_rules(value, terms)
+    elif isinstance(rules_json, list):
+        for value in rules_json:
+            collect_terms_from_rules(value, terms)
+    return terms
+
+
+def preload_terms(extra_terms=None, force=False):
+    """
+    This function will put into cache all terms used by rules
+    :param extra_terms: other term_ids to preload
+    :param force: ask OLS again about terms that are already cached
+    :return: number of terms to preload and number of terms in cache
+    """
+    terms = set(extra_terms or list())
+    for url in get_all_rules_urls():
+        collect_terms_from_rules(get_schema(url), terms)
+    if force:
+        ols_cache.delete_many({get_cache_key(term) for term in terms})
+    results = fetch_text_for_ids(terms)
+    return len(terms), len(results)
@@ -1,8 +1,39 @@
+import asyncio
+import aiohttp
 import requests
-from metadata_validation_conversion.constants import ELIXIR_VALIDATOR_URL
+from metadata_validation_conversion.constants import ELIXIR_VALIDATOR_URL, \
+    ELIXIR_VALIDATOR_BATCH_URL, ELIXIR_VALIDATOR_BATCH_SIZE, \
+    ELIXIR_VALIDATOR_CONCURRENCY, VALIDATOR_BACKEND, MODULE_RULES, \
+    ALLOWED_SAMPLES_TYPES, ALLOWED_EXPERIMENTS_TYPES, ALLOWED_ANALYSES_TYPES
+from metadata_validation_conversion.async_helpers import run_async
+from .JsonSchemaValidator import JsonSchemaValidator
 
 
 def validate(data, schema):
+    """
+    This function will validate data with configured validator backend
+    :param data: data to validate in JSON format
+    :param schema: schema to validate against
+    :return: list of error messages
+    """
+    if VALIDATOR_BACKEND == 'local':
+        return local_validator.validate(data, schema)
+    return validate_remote(data, schema)
+
+
+def validate_batch(items):
+    """
+    This function will validate many objects with configured validator
+    backend
+    :param items: list of (data, schema) tuples
+    :return: list of (errors, paths) tuples in the same order as items
+    """
+    if VALIDATOR_BACKEND == 'local':
+        return local_validator.validate_batch(items)
+    return validate_batch_remote(items)
+
+
+def validate_remote(data, schema):
     """
     This function will send data to elixir-validator and collect all errors
     :param data: data to validate in JSON format
@@ -14,6 +45,92 @@ def validate(data, schema):
         'object': data
     }
     response = requests.post(ELIXIR_VALIDATOR_URL, json=json_to_send).json()
+    return parse_validation_response(response)
+
+
+def validate_batch_remote(items):
+    """
+    This function will validate many objects with as few requests to
+    elixir-validator as possible
+    :param items: list of (data, schema) tuples
+    :return: list of (errors, paths) tuples in the same order as items
+    """
+    if not ELIXIR_VALIDATOR_BATCH_URL:
+        return run_async(validate_all(items))
+    results = list()
+    with requests.Session() as session:
+        for start in range(0, len(items), ELIXIR_VALIDATOR_BATCH_SIZE):
+            chunk = items[start:start + ELIXIR_VALIDATOR_BATCH_SIZE]
+            response = session.post(ELIXIR_VALIDATOR_BATCH_URL,
+                                    json=get_batch_payload(chunk)).json()
+            for item_response in response:
+                results.append(parse_validation_response(item_response))
+    return results
+
+
+def get_batch_payload(items):
+    """
+    This function will create body of batch request, every schema is sent
+    only once and referenced by its position from objects
+    :param items: list of (data, schema) tuples
+    :return: dict with schemas and objects to validate
+    """
+    schemas = list()
+    schema_indexes = dict()
+    objects = list()
+    for data, schema in items:
+        if id(schema) not in schema_indexes:
+            schema_indexes[id(schema)] = len(schemas)
+            schemas.append(schema)
+        objects.append({
+            'schema': schema_indexes[id(schema)],
+            'object': data
+        })
+    return {
+        'schemas': schemas,
+        'objects': objects
+    }
+
+
+async def validate_all(items):
+    """
+    This function will send validation requests concurrently for validators
+    without batch endpoint
+    :param items: list of (data, schema) tuples
+    :return: list of (errors, paths) tuples in the same order as items
+    """
+    semaphore = asyncio.Semaphore(ELIXIR_VALIDATOR_CONCURRENCY)
+    async with aiohttp.ClientSession() as session:
+        tasks = [validate_single(session, semaphore, data, schema)
+                 for data, schema in items]
+        return await asyncio.gather(*tasks)
+
+
+async def validate_single(session, semaphore, data, schema):
+    """
+    This function will send one validation request using shared session
+    :param session: session to work with
+    :param semaphore: semaphore limiting number of simultaneous requests
+    :param data: data to validate in JSON format
+    :param schema: schema to validate against
+    :return: list of error messages and list of their paths
+    """
+    json_to_send = {
+        'schema': schema,
+        'object': data
+    }
+    async with semaphore:
+        async with session.post(ELIXIR_VALIDATOR_URL,
+                                json=json_to_send) as response:
+            return parse_validation_response(await response.json())
+
+
+def parse_validation_response(response):
+    """
+    This function will collect errors from elixir-validator response
+    :param response: list of issues returned by elixir-validator
+    :return: list of error messages and list of their paths
+    """
     validation_errors = list()
     paths = list()
     for item in response:
@@ -27,6 +144,10 @@ def validate(data, schema):
     return validation_errors, paths
 
 
+# Compiled schemas are kept for the whole life of worker process
+local_validator = JsonSchemaValidator(validate_remote, validate_batch_remote)
+
+
 def get_record_name(record, index, name, action):
     """
     This function will return name of the current record or create it
@@ -54,39 +175,110 @@ def get_record_name(record, index, name, action):
             return record['alias']['value']
 
 
-def get_submission_status(validation_results):
+def get_allowed_types(rules_type):
     """
-    This function will check results for error and return appropriate message
-    :param validation_results: json to check
-    :return: submission status
+    This function will return record types that could be validated
+    :param rules_type: type of rules: samples, experiments or analyses
+    :return: dict with record types as keys and rules urls as values
     """
-    for _, v in validation_results.items():
-        for record in v:
-            if check_issues(record):
-                return 'Fix issues'
-    return 'Ready for submission'
+    if rules_type == 'samples':
+        return ALLOWED_SAMPLES_TYPES
+    elif rules_type == 'analyses':
+        return ALLOWED_ANALYSES_TYPES
+    else:
+        return ALLOWED_EXPERIMENTS_TYPES
 
 
-def check_issues(record):
+def is_record_to_check(records_to_check, name, index):
     """
-    This function will return True if any issues exist
-    :param record: record to check
-    :return: True if any issues and False otherwise
+    This function will check whether record should be checked
+    :param records_to_check: dict with record types as keys and sets of
+    indexes as values, None means all records
+    :param name: record type
+    :param index: index of record
+    :return: True if record should be checked
     """
-    for key, value in record.items():
-        if key in ['samples_core', 'custom', 'experiments_core',
-                   'input_dna', 'dna-binding_proteins', 'teleostei_embryo',
-                   'teleostei_post-hatching']:
-            if check_issues(value):
-                return True
-        if isinstance(value, list):
-            for item in value:
-                if 'errors' in item and len(item['errors']) > 0:
-                    return True
-        else:
-            if 'errors' in value and len(value['errors']) > 0:
-                return True
-    return False
+    return records_to_check is None or index in records_to_check.get(name, ())
+
+
+def get_module_name(name):
+    """
+    This function will return name of module fields of record type
+    :param name: record type, ex. 'chip-seq_input_dna'
+    :return: name of module fields or None if record type has no module
+    """
+    if name not in MODULE_RULES:
+        return None
+    if 'chip-seq' in name:
+        return name.split("chip-seq_")[-1]
+    return name
+
+
+def get_validation_document(json_to_test, rules_type, structure,
+                            records_to_check=None):
+    """
+    This function will create document all checks add their issues to
+    :param json_to_test: json to test
+    :param rules_type: type of rules: samples, experiments or analyses
+    :param structure: structure of original template
+    :param records_to_check: dict with record types as keys and sets of
+    indexes as values, other records are None, all records are created if it
+    is None
+    :return: dict with record types as keys and lists of record structures
+    as values
+    """
+    validation_document = dict()
+    for name in get_allowed_types(rules_type):
+        if name in json_to_test:
+            module_name = get_module_name(name)
+            validation_document[name] = [
+                get_record_structure(structure[name], record, module_name)
+                if is_record_to_check(records_to_check, name, index) else None
+                for index, record in enumerate(json_to_test[name])]
+    return validation_document
+
+
+def get_records_chunks(json_to_test, rules_type, chunk_size):
+    """
+    This function will split records of all sheets into chunks, so they
+    could be checked by different workers
+    :param json_to_test: json to test
+    :param rules_type: type of rules: samples, experiments or analyses
+    :param chunk_size: maximum number of records in chunk
+    :return: list of dicts with record types as keys and [start, end] ranges
+    of indexes as values
+    """
+    chunks = list()
+    chunk = dict()
+    chunk_length = 0
+    for name in get_allowed_types(rules_type):
+        if name not in json_to_test:
+            continue
+        start = 0
+        while start < len(json_to_test[name]):
+            end = min(len(json_to_test[name]),
+                      start + chunk_size - chunk_length)
+            chunk[name] = [start, end]
+            chunk_length += end - start
+            start = end
+            if chunk_length == chunk_size:
+                chunks.append(chunk)
+                chunk = dict()
+                chunk_length = 0
+    if chunk_length > 0:
+        chunks.append(chunk)
+    return chunks
+
+
+def get_chunk_records(chunk):
+    """
+    This function will convert chunk to records_to_check format
+    :param chunk: dict with record types as keys and [start, end] ranges of
+    indexes as values
+    :return: dict with record types as keys and sets of indexes as values
+    """
+    return {name: set(range(start, end))
+            for name, (start, end) in chunk.items()}
 
 
 def get_record_structure(structure, record, module_name=None):
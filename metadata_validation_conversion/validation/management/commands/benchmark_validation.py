@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from metadata_validation_conversion.constants import ELIXIR_VALIDATOR_URL, \
+    ELIXIR_VALIDATOR_BATCH_URL
+from validation.helpers import validate, validate_batch
+
+BENCHMARK_SCHEMA = {
+    'type': 'object',
+    'required': ['sample_name'],
+    'properties': {
+        'sample_name': {
+            'type': 'object',
+            'properties': {'value': {'type': 'string'}}
+        },
+        'organism': {
+            'type': 'object',
+            'properties': {'text': {'type': 'string'},
+                           'term': {'type': 'string'}}
+        }
+    }
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare per-record validation with batch validation, run it ' \
+           'against stand-in validator (see run_stub_validator) by pointing ' \
+           'ELIXIR_VALIDATOR_URL and ELIXIR_VALIDATOR_BATCH_URL to it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=1000)
+        parser.add_argument('--objects-per-record', type=int, default=2,
+                            help='number of schemas checked per record')
+
+    def handle(self, *args, **options):
+        items = list()
+        for index in range(options['records']):
+            record = {
+                'sample_name': {'value': f"sample_{index}"},
+                'organism': {'text': 'Bos taurus', 'term': 'NCBITaxon:9913'}
+            }
+            for _ in range(options['objects_per_record']):
+                items.append((record, BENCHMARK_SCHEMA))
+        self.stdout.write(f"Validator: {ELIXIR_VALIDATOR_URL}, batch "
+                          f"endpoint: {ELIXIR_VALIDATOR_BATCH_URL or 'none'}")
+        self.stdout.write(f"Objects to validate: {len(items)}")
+
+        start = time.perf_counter()
+        for data, schema in items:
+            validate(data, schema)
+        per_record_time = time.perf_counter() - start
+        self.stdout.write(f"Per-record validation: {per_record_time:.2f}s")
+
+        start = time.perf_counter()
+        validate_batch(items)
+        batch_time = time.perf_counter() - start
+        self.stdout.write(f"Batch validation: {batch_time:.2f}s "
+                          f"({per_record_time / batch_time:.1f}x)")
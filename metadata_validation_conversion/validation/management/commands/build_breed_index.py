@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from metadata_validation_conversion.constants import BREED_INDEX_PATH
+from validation.breed_index import build_breed_index
+
+
+class Command(BaseCommand):
+    help = 'Fetch breeds of all species from LBO into breed index, so ' \
+           'breeds are checked without network calls, run it on deploy'
+
+    def handle(self, *args, **options):
+        try:
+            classes = build_breed_index()
+        except Exception as err:
+            raise CommandError(f"Couldn't build breed index: {err!r}")
+        for lbo_class, breeds in sorted(classes.items()):
+            self.stdout.write(f"{lbo_class}: {breeds} breeds")
+        self.stdout.write(f"Breed index is written to {BREED_INDEX_PATH}")
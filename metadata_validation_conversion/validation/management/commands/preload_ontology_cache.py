@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from validation.get_ontology_text_async import preload_terms
+from validation.tasks import preload_ontology_terms
+
+
+class Command(BaseCommand):
+    help = 'Fill OLS cache with terms used by rules, so validation of usual ' \
+           'submissions never waits for OLS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('terms', nargs='*',
+                            help='other term ids to preload')
+        parser.add_argument('--force', action='store_true',
+                            help='ask OLS again about cached terms')
+        parser.add_argument('--queue', action='store_true',
+                            help='run preloading on validation workers')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            task = preload_ontology_terms.apply_async(
+                args=(options['terms'], options['force']), queue='validation')
+            self.stdout.write(f"Preloading started, task id: {task.id}")
+            return
+        terms, cached = preload_terms(options['terms'], options['force'])
+        self.stdout.write(f"{cached} of {terms} terms are in cache")
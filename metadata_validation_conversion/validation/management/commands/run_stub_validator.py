@@ -0,0 +1,50 @@
+import asyncio
+
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from validation.JsonSchemaValidator import JsonSchemaValidator
+
+
+class Command(BaseCommand):
+    help = 'Run local stand-in for elixir-validator, it implements ' \
+           '/validate and /validate/batch endpoints using in-process ' \
+           'validator (graph_restriction is not checked) and answers after ' \
+           'configurable latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=3020)
+        parser.add_argument('--latency', type=float, default=20.0,
+                            help='latency of every request in milliseconds')
+
+    def handle(self, *args, **options):
+        latency = options['latency'] / 1000
+        validator = JsonSchemaValidator()
+
+        def get_response(data, schema):
+            errors, paths = validator.validate(data, schema)
+            return [{'dataPath': path, 'errors': [error]}
+                    for error, path in zip(errors, paths)]
+
+        async def validate(request):
+            payload = await request.json()
+            await asyncio.sleep(latency)
+            return web.json_response(
+                get_response(payload['object'], payload['schema']))
+
+        async def validate_batch(request):
+            payload = await request.json()
+            await asyncio.sleep(latency)
+            return web.json_response(
+                [get_response(item['object'],
+                              payload['schemas'][item['schema']])
+                 for item in payload['objects']])
+
+        app = web.Application(client_max_size=1024 ** 3)
+        app.add_routes([web.post('/validate', validate),
+                        web.post('/validate/batch', validate_batch)])
+        self.stdout.write(f"Stand-in validator is listening on "
+                          f"http://{options['host']}:{options['port']}")
+        web.run_app(app, host=options['host'], port=options['port'],
+                    print=None)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from metadata_validation_conversion.constants import RULES_VERSION, \
+    SCHEMA_CACHE_DIR
+from metadata_validation_conversion.schema_cache import schema_cache, \
+    get_all_rules_urls
+
+
+class Command(BaseCommand):
+    help = 'Load all rules used by conversion and validation into schema ' \
+           'cache, run it on deploy so workers never wait for GitHub'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='revalidate schemas even if they are fresh')
+
+    def handle(self, *args, **options):
+        urls = get_all_rules_urls()
+        self.stdout.write(f"Rules version: {RULES_VERSION}, cache "
+                          f"directory: {SCHEMA_CACHE_DIR or 'none'}")
+        failed = list()
+        for url in urls:
+            try:
+                digest = schema_cache.warm([url], force=options['force'])[url]
+            except Exception as err:
+                failed.append(url)
+                self.stderr.write(f"{url}: {err}")
+                continue
+            self.stdout.write(f"{digest[:12]} {url}")
+        if failed:
+            raise CommandError(f"Couldn't load {len(failed)} of {len(urls)} "
+                               f"schemas")
+        self.stdout.write(f"Loaded {len(urls)} schemas")
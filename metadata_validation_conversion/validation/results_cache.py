@@ -0,0 +1,150 @@
+import hashlib
+import json
+
+from metadata_validation_conversion.constants import VALIDATION_CACHE_TTL, \
+    MODULE_RULES
+from metadata_validation_conversion.helpers import get_rules_urls
+from metadata_validation_conversion.persistent_cache import PersistentCache
+from metadata_validation_conversion.schema_cache import schema_cache
+from .get_ontology_text_async import get_ids
+from .helpers import get_allowed_types, get_module_name, \
+    is_record_to_check
+
+# change it when checks change, so results of old checks aren't reused
+VALIDATION_CACHE_VERSION = 2
+
+validation_cache = PersistentCache('validation', VALIDATION_CACHE_TTL)
+
+
+def get_digest(value):
+    """
+    This function will return digest of JSON-like value
+    :param value: value to hash
+    :return: sha1 hex digest
+    """
+    dumped = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha1(dumped.encode('utf-8')).hexdigest()
+
+
+def get_records_keys(json_to_test, rules_type, structure,
+                     records_to_check=None):
+    """
+    This function will return cache keys of all records, key of record
+    depends on its values, structure of its table and digests of rules it is
+    checked against, so any change of these makes record checked again
+    :param json_to_test: json to test
+    :param rules_type: type of rules: samples, experiments or analyses
+    :param structure: structure of original template
+    :param records_to_check: dict with record types as keys and sets of
+    indexes as values, all records are used if it is None
+    :return: dict with (record type, record index) as keys and cache keys as
+    values
+    """
+    keys = dict()
+    for name, url in get_allowed_types(rules_type).items():
+        if name not in json_to_test:
+            continue
+        digests = [schema_cache.get_digest(rules_url) for rules_url in
+                   get_rules_urls(url, rules_type, MODULE_RULES.get(name))]
+        for index, record in enumerate(json_to_test[name]):
+            if not is_record_to_check(records_to_check, name, index):
+                continue
+            keys[(name, index)] = get_digest(
+                [VALIDATION_CACHE_VERSION, rules_type, name, structure[name],
+                 digests, record])
+    return keys
+
+
+def get_cached_records(records_keys):
+    """
+    This function will return cached validation results of records
+    :param records_keys: result of get_records_keys
+    :return: dict with (record type, record index) as keys and record
+    structures with issues as values
+    """
+    if VALIDATION_CACHE_TTL <= 0:
+        return dict()
+    cached_results = validation_cache.get_many(set(records_keys.values()))
+    return {destination: cached_results[key]
+            for destination, key in records_keys.items()
+            if key in cached_results}
+
+
+def cache_records(records_keys, destinations, json_to_test, rules_type,
+                  validation_document, ontology_ids):
+    """
+    This function will save validation results of records, records with
+    terms OLS couldn't be asked about are skipped, so they are checked again
+    :param records_keys: result of get_records_keys
+    :param destinations: (record type, record index) tuples of records to save
+    :param json_to_test: json to test
+    :param rules_type: type of rules: samples, experiments or analyses
+    :param validation_document: document with issues of records
+    :param ontology_ids: dict with term_ids as keys and ols results as values
+    """
+    if VALIDATION_CACHE_TTL <= 0:
+        return
+    if rules_type == 'samples':
+        core_name = 'samples_core'
+    elif rules_type == 'experiments':
+        core_name = 'experiments_core'
+    else:
+        core_name = None
+    results_to_cache = dict()
+    for name, index in destinations:
+        term_ids = get_ids([json_to_test[name][index]], core_name,
+                           get_module_name(name))
+        if any(term_id and term_id not in ontology_ids
+               for term_id in term_ids):
+            continue
+        results_to_cache[records_keys[(name, index)]] = \
+            validation_document[name][index]
+    validation_cache.set_many(results_to_cache)
+
+
+def get_relationships_key(action, record_name, relationship_graph):
+    """
+    This function will return cache key of relationships issues of record,
+    it depends on record and all entities it refers to
+    :param action: action of submission: submission or update
+    :param record_name: name of the record
+    :param relationship_graph: RelationshipGraph object with BioSamples
+    entities added
+    :return: cache key
+    """
+    return get_digest([VALIDATION_CACHE_VERSION, action, record_name,
+                       relationship_graph.nodes[record_name],
+                       relationship_graph.get_neighbours(record_name)])
+
+
+def get_cached_relationships_errors(relationships_keys):
+    """
+    This function will return cached relationships issues of records
+    :param relationships_keys: dict with record names as keys and results of
+    get_relationships_key as values
+    :return: dict with record names as keys and lists of (relation, error)
+    tuples as values
+    """
+    if VALIDATION_CACHE_TTL <= 0:
+        return dict()
+    cached_results = validation_cache.get_many(
+        {f"relationships:{key}" for key in relationships_keys.values()})
+    return {record_name: [tuple(error) for error in
+                          cached_results[f"relationships:{key}"]]
+            for record_name, key in relationships_keys.items()
+            if f"relationships:{key}" in cached_results}
+
+
+def cache_relationships_errors(relationships_keys, records_errors):
+    """
+    This function will save relationships issues of records
+    :param relationships_keys: dict with record names as keys and results of
+    get_relationships_key as values
+    :param records_errors: dict with record names as keys and lists of
+    (relation, error) tuples as values
+    """
+    if VALIDATION_CACHE_TTL <= 0:
+        return
+    validation_cache.set_many(
+        {f"relationships:{relationships_keys[record_name]}": errors
+         for record_name, errors in records_errors.items()})
@@ -0,0 +1,59 @@
+import re
+
+from metadata_validation_conversion.payload_store import save, load, \
+    REF_KEY
+
+
+def save_results_pages(results, summary, page_size):
+    """
+    This function will split validation results of every sheet into pages
+    and save them, so front-end could load them one by one
+    :param results: validation document with all issues
+    :param summary: numbers of issues from IssueCounters.get_summary
+    :param page_size: number of records in one page
+    :return: dict with id of results, page size and numbers of records and
+    pages of every sheet, with numbers of pages that have records with issues
+    """
+    pages = dict()
+    sheets = dict()
+    for name, records in results.items():
+        pages[name] = [save(records[start:start + page_size])[REF_KEY]
+                       for start in range(0, len(records), page_size)]
+        records_with_issues = summary['sheets'].get(name, dict()).get(
+            'records', dict())
+        sheets[name] = {
+            'records': len(records),
+            'pages': len(pages[name]),
+            'pages_with_issues': sorted({int(index) // page_size
+                                         for index in records_with_issues})
+        }
+    results_id = save({'page_size': page_size, 'pages': pages})[REF_KEY]
+    return {'results_id': results_id, 'page_size': page_size,
+            'sheets': sheets}
+
+
+def load_results_page(results_id, sheet_name, page):
+    """
+    This function will return one page of validation results
+    :param results_id: id of results returned by save_results_pages
+    :param sheet_name: name of the sheet
+    :param page: number of page, starting from 0
+    :return: dict with sheet, page, index of first record of page in sheet
+    and list of all records of page with their issues
+    """
+    # ids come from front-end, so they shouldn't point outside of store
+    if not isinstance(results_id, str) or \
+            re.fullmatch('[0-9a-f]{64}', results_id) is None:
+        raise ValueError(f"Wrong results id {results_id}")
+    results = load({REF_KEY: results_id})
+    if not isinstance(results, dict) or 'pages' not in results:
+        raise ValueError(f"Wrong results id {results_id}")
+    pages = results['pages'].get(sheet_name, list())
+    if not isinstance(page, int) or not 0 <= page < len(pages):
+        raise ValueError(f"There is no page {page} of sheet {sheet_name}")
+    return {
+        'sheet': sheet_name,
+        'page': page,
+        'start': page * results['page_size'],
+        'records': load({REF_KEY: pages[page]})
+    }
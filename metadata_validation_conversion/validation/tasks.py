@@ -1,15 +1,18 @@
 from abc import ABC
 
 from metadata_validation_conversion.celery import app
-from metadata_validation_conversion.helpers import send_message
-from .ElixirValidatorResults import ElixirValidatorResults
-from .JoinedResults import JoinedResults
-from .RelationshipsIssues import RelationshipsIssues
-from .WarningsAndAdditionalChecks import WarningsAndAdditionalChecks
-from .helpers import get_submission_status
-
-from celery import Task
-from metadata_validation_conversion.constants import SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES
+from metadata_validation_conversion.helpers import send_message, \
+    get_upstream_result
+from metadata_validation_conversion.payload_store import save, load, is_ref
+from .ValidationEngine import ValidationEngine
+from .helpers import get_records_chunks, get_chunk_records, \
+    get_allowed_types
+from .get_ontology_text_async import preload_terms
+from .results_pages import save_results_pages
+
+from celery import Task, chord
+from metadata_validation_conversion.constants import SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES, \
+    VALIDATION_CHUNK_SIZE, VALIDATION_RESULTS_PAGE_SIZE
 from .update_utils import check_biosampleid
 
 
@@ -32,6 +35,7 @@ def verify_sample_ids(json_to_test, room_id):
     """
     erroneous_sample_ids = list()
     reg_valid_sample_ids = list()
+    json_to_test = load(json_to_test)
     for sheetname, submitted_data in json_to_test.items():
         if sheetname not in SAMPLES_ALLOWED_SPECIAL_SHEET_NAMES:
             for ele in submitted_data:
@@ -67,61 +71,175 @@ def verify_sample_ids(json_to_test, room_id):
     return reg_valid_sample_ids, erroneous_sample_ids
 
 
-@app.task(base=LogErrorsTask)
-def validate_against_schema(json_to_test, rules_type, structure, room_id):
+@app.task(base=LogErrorsTask, bind=True)
+def validate_records(self, json_to_test, data_type, structure, action,
+                     room_id):
     """
-    Task to send json data to elixir-validator
-    :param json_to_test: json to test against schema
-    :param rules_type: type of rules to validate
+    This task will run all checks on records and send results to front-end,
+    big submissions are split into chunks checked by several workers
+    :param json_to_test: json to test
+    :param data_type: type of data to validate
     :param structure: structure of original template
-    :return: all issues in dict
+    :param action: could be 'submission' or 'update'
+    :param room_id: room id to create ws url
+    :return: reference to all issues in dict
     """
-    elixir_validation_results = ElixirValidatorResults(json_to_test,
-                                                       rules_type,
-                                                       structure)
-    return elixir_validation_results.run_validation()
+    records = load(json_to_test)
+    if VALIDATION_CHUNK_SIZE > 0:
+        chunks = get_records_chunks(records, data_type, VALIDATION_CHUNK_SIZE)
+        if len(chunks) > 1:
+            # tasks get references, so records aren't copied to every chunk
+            if not is_ref(json_to_test):
+                json_to_test = save(json_to_test)
+            if not is_ref(structure):
+                structure = save(structure)
+            chunks_tasks = list()
+            offset = 0
+            for chunk in chunks:
+                chunks_tasks.append(validate_records_chunk.s(
+                    json_to_test, data_type, structure, action, chunk,
+                    offset, room_id=room_id).set(queue='validation'))
+                offset += sum(end - start for start, end in chunk.values())
+            return self.replace(chord(
+                chunks_tasks,
+                join_validation_chunks.s(
+                    json_to_test, data_type, structure, action,
+                    room_id=room_id).set(queue='validation')))
+    validation_engine = ValidationEngine(records, data_type, load(structure),
+                                         action)
+    results = validation_engine.run_validation()
+    send_validation_results(results, validation_engine.issue_counters,
+                            room_id)
+    return save(results)
 
 
 @app.task(base=LogErrorsTask)
-def collect_warnings_and_additional_checks(json_to_test, rules_type,
-                                           structure, room_id):
+def validate_records_chunk(json_to_test, data_type, structure, action, chunk,
+                           offset, room_id):
     """
-    Task to do additional checks inside python app
-    :param json_to_test: json to test against additional checks
-    :param rules_type: type of rules to validate
+    This task will run checks that don't depend on other records for chunk
+    of records and send progress to front-end
+    :param json_to_test: json to test
+    :param data_type: type of data to validate
     :param structure: structure of original template
-    :return: all issues in dict
+    :param action: could be 'submission' or 'update'
+    :param chunk: dict with record types as keys and [start, end] ranges of
+    indexes as values
+    :param offset: number of records in previous chunks
+    :param room_id: room id to create ws url
+    :return: reference to dict with records and summary keys, records are
+    dict with record types as keys and dicts with indexes and issues of
+    records as values, summary has numbers of issues of these records
     """
-    additional_checks_object = WarningsAndAdditionalChecks(json_to_test,
-                                                           rules_type,
-                                                           structure)
-    return additional_checks_object.collect_warnings_and_additional_checks()
+    records = load(json_to_test)
+    validation_engine = ValidationEngine(
+        records, data_type, load(structure), action, get_chunk_records(chunk))
+    validation_document = validation_engine.run_records_validation()
+    results = dict()
+    for name, (start, end) in chunk.items():
+        results[name] = {index: validation_document[name][index]
+                         for index in range(start, end)}
+    total = sum(len(records[name]) for name in get_allowed_types(data_type)
+                if name in records)
+    done = sum(end - start for start, end in chunk.values())
+    send_message(room_id=room_id,
+                 validation_status=f"Validated records {offset + 1}-"
+                                   f"{offset + done} of {total}")
+    return save({'records': results,
+                 'summary': validation_engine.issue_counters.get_summary()})
 
 
 @app.task(base=LogErrorsTask)
-def collect_relationships_issues(json_to_test, validation_type, structure, action, room_id):
+def join_validation_chunks(chunks_results, json_to_test, data_type,
+                           structure, action, room_id):
     """
-    This task will do relationships check
-    :param json_to_test: json to be tested
+    This task will put results of all chunks together in original order,
+    check relationships and send results to front-end
+    :param chunks_results: results of validate_records_chunk tasks
+    :param json_to_test: json to test
+    :param data_type: type of data to validate
     :param structure: structure of original template
-    :return: all issues in dict
+    :param action: could be 'submission' or 'update'
+    :param room_id: room id to create ws url
+    :return: reference to all issues in dict
+    """
+    records = load(json_to_test)
+    validation_engine = ValidationEngine(records, data_type, load(structure),
+                                         action)
+    issue_counters = validation_engine.issue_counters
+    results = {name: [None] * len(records[name])
+               for name in get_allowed_types(data_type) if name in records}
+    for chunk_results in chunks_results:
+        chunk_results = load(chunk_results)
+        for name, chunk_records in chunk_results['records'].items():
+            for index, record in chunk_records.items():
+                results[name][index] = record
+        # records were counted by chunks, relationships are counted now
+        issue_counters.update(chunk_results['summary'])
+    results = validation_engine.run_relationships_validation(results)
+    send_validation_results(results, issue_counters, room_id)
+    return save(results)
+
+
+def send_validation_results(results, issue_counters, room_id):
     """
-    relationships_issues_object = RelationshipsIssues(json_to_test, validation_type, structure, action)
-    return relationships_issues_object.collect_relationships_issues()
+    This function will send status and numbers of issues to front-end,
+    results of small submissions are sent in the same message, results of
+    big ones are saved in pages front-end asks for
+    :param results: validation document with all issues
+    :param issue_counters: IssueCounters object with numbers of issues
+    :param room_id: room id to create ws url
+    """
+    summary = issue_counters.get_summary()
+    records_number = sum(len(records) for records in results.values())
+    if 0 < VALIDATION_RESULTS_PAGE_SIZE < records_number:
+        send_message(validation_status='Finished', room_id=room_id,
+                     submission_status=issue_counters.get_status(),
+                     validation_summary=summary,
+                     results_pages=save_results_pages(
+                         results, summary, VALIDATION_RESULTS_PAGE_SIZE))
+    else:
+        send_message(validation_status='Finished', room_id=room_id,
+                     table_data=results,
+                     submission_status=issue_counters.get_status(),
+                     validation_summary=summary)
+
+
+@app.task
+def preload_ontology_terms(extra_terms=None, force=False):
+    """
+    This task will fill OLS cache with terms used by rules
+    :param extra_terms: other term_ids to preload
+    :param force: ask OLS again about terms that are already cached
+    :return: number of terms to preload and number of terms in cache
+    """
+    return preload_terms(extra_terms, force)
 
 
-@app.task(base=LogErrorsTask)
-def join_validation_results(results, room_id):
+@app.task(base=LogErrorsTask, bind=True)
+def start_validation(self, conversion_task_id, data_type, action, room_id):
     """
-    This task will join results from previous two tasks
+    This task will wait for conversion results and replace itself with
+    validation task, so its id becomes id of validation results
+    :param conversion_task_id: id of conversion task
+    :param data_type: type of data to validate
+    :param action: could be 'submission' or 'update'
     :param room_id: room id to create ws url
-    :param results: list with results of previous two tasks
-    :return: joined issues in dict
+    :return: reference to validation results
     """
-    joined_results_object = JoinedResults(results)
-    results = joined_results_object.join_results()
-    submission_status = get_submission_status(results)
-    send_message(validation_status='Finished', room_id=room_id,
-                 table_data=results, submission_status=submission_status)
-    return results
+    json_to_test, structure = get_upstream_result(self, conversion_task_id)
+    # sample name should be a valid BioSampleId
+    if data_type == 'samples' and action == 'update':
+        sample_ids = verify_sample_ids(json_to_test, room_id)
+        if sample_ids is None:
+            return 'Error'
+        reg_valid_sample_ids, erroneous_sample_ids = sample_ids
+        if erroneous_sample_ids:
+            send_message(room_id=room_id,
+                         validation_status=f"Erroneous BioSample IDs provided. Please check the following ids:"
+                                           f"{erroneous_sample_ids}")
+            return 'Error'
+    return self.replace(
+        validate_records.s(json_to_test, data_type, structure, action,
+                           room_id=room_id).set(queue='validation'))
 
@@ -1,3 +1,62 @@
-from django.test import TestCase
+import sys
+import threading
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .JsonSchemaValidator import JsonSchemaValidator
+
+
+class JsonSchemaValidatorTestCase(SimpleTestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'term': {'type': 'string',
+                     'graph_restriction': {'classes': ['OBI:0100026']}}
+        }
+    }
+
+    @staticmethod
+    def remote_validate(data, schema):
+        if data.startswith('wrong'):
+            return ['not in graph'], ['']
+        return [], []
+
+    def test_graph_restriction(self):
+        validator = JsonSchemaValidator(self.remote_validate)
+        results = validator.validate_batch(
+            [({'term': term}, self.schema)
+             for term in ['right_1', 'wrong_1', 'wrong_1']])
+        self.assertEqual(results, [([], []),
+                                   (['not in graph'], ['/term']),
+                                   (['not in graph'], ['/term'])])
+
+    def test_concurrent_batches(self):
+        validator = JsonSchemaValidator(self.remote_validate)
+        errors = list()
+
+        def validate(thread_index):
+            for batch_index in range(200):
+                terms = [f"{prefix}_{thread_index}_{batch_index}_{index}"
+                         for index in range(5)
+                         for prefix in ['right', 'wrong']]
+                results = validator.validate_batch(
+                    [({'term': term}, self.schema) for term in terms])
+                expected = [(['not in graph'], ['/term'])
+                            if term.startswith('wrong') else ([], [])
+                            for term in terms]
+                if results != expected:
+                    errors.append(thread_index)
+                    return
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=validate, args=(index,))
+                       for index in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual(errors, list())
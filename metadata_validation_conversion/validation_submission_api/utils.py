@@ -1,10 +1,8 @@
 from metadata_validation_conversion.constants import ALLOWED_TEMPLATES
 from metadata_validation_conversion.celery import app
+from metadata_validation_conversion.payload_store import load
 from conversion.ReadExcelFile import ReadExcelFile
-from validation.tasks import validate_against_schema, \
-    collect_warnings_and_additional_checks, \
-        join_validation_results, \
-            collect_relationships_issues
+from validation.tasks import validate_records
 from submission.tasks import generate_annotated_template, \
             prepare_samples_data, prepare_analyses_data, prepare_experiments_data, \
                 submit_to_biosamples, submit_data_to_ena
@@ -33,20 +31,10 @@ def convert_template(file, type):
 def validate(conv_result, type, annotate_template):
     json_to_test, structure = conv_result[0], conv_result[1]
     room_id = 'room'
-    if type == 'samples':
-        task1 = validate_against_schema.s(json_to_test,'samples', structure, room_id=room_id).set(queue='validation')
-        task2 = collect_warnings_and_additional_checks.s(json_to_test, 'samples', structure, room_id=room_id).set(queue='validation')
-        task3 = collect_relationships_issues.s(json_to_test, structure, room_id=room_id).set(queue='validation')
-        join_results = join_validation_results.s(room_id=room_id).set(queue='validation')
-        my_chord = chord((task1, task2, task3), join_results)
-    else:
-        task1 = validate_against_schema.s(json_to_test, type, structure, room_id=room_id).set(queue='validation')
-        task2 = collect_warnings_and_additional_checks.s(json_to_test, type, structure, room_id=room_id).set(queue='validation')
-        join_results = join_validation_results.s(room_id=room_id).set(queue='validation')
-        my_chord = chord((task1, task2), join_results)
-    res = my_chord.apply_async()
+    validate_task = validate_records.s(json_to_test, type, structure, 'submission', room_id=room_id).set(queue='validation')
+    res = validate_task.apply_async()
     validation_result = app.AsyncResult(res.id)
-    result = validation_result.get()
+    result = load(validation_result.get())
     if annotate_template == 'true':
         generate_template_task = generate_annotated_template.s(
             result, room_id=room_id, data_type=type).set(queue='validation')
@@ -1,7 +1,12 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
 import json
+import zlib
+from asgiref.sync import sync_to_async
 from celery.result import AsyncResult
 
+from metadata_validation_conversion.payload_store import PayloadNotFound
+from validation.results_pages import load_results_page
+
 
 class SubmissionConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -26,6 +31,9 @@ class SubmissionConsumer(AsyncWebsocketConsumer):
     # Receive message from WebSocket
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
+        if text_data_json.get('action') == 'get_results_page':
+            await self.send_results_page(text_data_json)
+            return
         message = text_data_json['response']
 
         # Send message to room group
@@ -46,6 +54,23 @@ class SubmissionConsumer(AsyncWebsocketConsumer):
             'response': message
         }))
 
+    # Send requested page of validation results to this WebSocket only
+    async def send_results_page(self, request):
+        try:
+            results_page = await sync_to_async(load_results_page)(
+                request.get('results_id'), request.get('sheet'),
+                request.get('page'))
+            message = {'results_page': results_page}
+        except (ValueError, PayloadNotFound) as err:
+            message = {'errors': str(err)}
+        text_data = json.dumps({'response': message})
+        # Pages are zlib compressed binary messages if client asks for it
+        if request.get('compress'):
+            await self.send(bytes_data=zlib.compress(
+                text_data.encode('utf-8')))
+        else:
+            await self.send(text_data=text_data)
+
 
 class GraphQLTaskStatusConsumer(AsyncWebsocketConsumer):
     async def connect(self):